@@ -0,0 +1,130 @@
+import itertools
+import time
+import numpy as np
+from benchmarks.fixtures import FPS, LIVE_CHUNK, LIVE_RATE, clip_frames, pcm_chunks, synthetic_audio, synthetic_frames
+from benchmarks.timing import measure, rate, summarize
+
+
+def _audio(config):
+    return pcm_chunks(synthetic_audio(config.duration, LIVE_RATE))
+
+
+def _frames(config):
+    n = int(config.duration * FPS)
+    return clip_frames(config.video, n) if config.video else synthetic_frames(n)
+
+
+def bench_streaming_mfcc(config):
+    """StreamingMFCC.push on one live-sized chunk (the core of extract_mfcc)."""
+    from scripts.streaming_mfcc import StreamingMFCC
+    stream = StreamingMFCC(sr=LIVE_RATE, n_mfcc=13, hop_length=LIVE_CHUNK)
+    chunks = [np.frombuffer(c, dtype=np.int16).astype(np.float32) / 32768.0 for c in _audio(config)]
+    return summarize(measure(stream.push, chunks))
+
+
+def bench_predictor(config):
+    """One warmed-up model call on a full feature window, as predict_speech_dysfunction makes it."""
+    from scripts.model_loader import WINDOW_LENGTH, get_predictor
+    predictor = get_predictor()
+    window = np.random.default_rng(0).normal(size=(1, WINDOW_LENGTH, 14)).astype(np.float32)
+    return summarize(measure(predictor, [window] * config.iterations))
+
+
+def bench_lip_tracker(config):
+    """LipTracker.process per frame (the core of extract_lip_distance)."""
+    from scripts.lip_tracker import LipTracker
+    tracker = LipTracker()
+    frames = _frames(config)
+    result = summarize(measure(tracker.process, frames))
+    result["detection_rate"] = tracker.stats()["detection_rate"]
+    return result
+
+
+def _live_module():
+    import real_time_analysis
+    real_time_analysis.get_predictor()
+    real_time_analysis.mfcc_stream.reset()
+    real_time_analysis.feature_window.clear()
+    real_time_analysis.lip_tracker.reset()
+    return real_time_analysis
+
+
+def bench_live_stages(config):
+    """Per-stage latency of the live loop's own functions on synthetic capture data."""
+    live = _live_module()
+    chunks, frames = _audio(config), _frames(config)
+    mfcc_samples, lip_samples, predict_samples = [], [], []
+    for chunk, frame in zip(chunks, itertools.cycle(frames)):
+        started = time.perf_counter()
+        lip_distance = live.extract_lip_distance(frame)
+        lip_done = time.perf_counter()
+        mfcc_features = live.extract_mfcc(chunk)
+        mfcc_done = time.perf_counter()
+        lip_samples.append(lip_done - started)
+        mfcc_samples.append(mfcc_done - lip_done)
+        if len(mfcc_features):
+            live.predict_speech_dysfunction(mfcc_features[-1:], lip_distance)
+            predict_samples.append(time.perf_counter() - mfcc_done)
+    return {
+        "extract_lip_distance": summarize(lip_samples),
+        "extract_mfcc": summarize(mfcc_samples),
+        "predict_speech_dysfunction": summarize(predict_samples),
+    }
+
+
+def bench_live_loop(config):
+    """End-to-end frames per second: serial analyze_chunk throughput, and the threaded engine at capture pace."""
+    from capture_pipeline import AnalysisEngine
+    live = _live_module()
+    chunks, frames = _audio(config), _frames(config)
+
+    pairs = list(zip(chunks, itertools.cycle(frames)))
+    started = time.perf_counter()
+    for chunk, frame in pairs:
+        live.analyze_chunk(chunk, frame)
+    max_fps = rate(len(pairs), time.perf_counter() - started)
+
+    # Paced sources: chunks and frames arrive no faster than a real microphone and camera deliver them
+    live.mfcc_stream.reset()
+    live.feature_window.clear()
+    live.lip_tracker.reset()
+    chunk_duration = LIVE_CHUNK / LIVE_RATE
+    audio_source, video_source = itertools.cycle(chunks), itertools.cycle(frames)
+
+    def read_audio():
+        time.sleep(chunk_duration)
+        return next(audio_source)
+
+    def read_frame():
+        time.sleep(1.0 / FPS)
+        return True, next(video_source)
+
+    latencies = []
+
+    def analyze(chunk, frame):
+        t = time.perf_counter()
+        result = live.analyze_chunk(chunk, frame)
+        latencies.append(time.perf_counter() - t)
+        return result
+
+    engine = AnalysisEngine(read_audio, read_frame, analyze, chunk_duration)
+    engine.start()
+    time.sleep(config.duration)
+    engine.stop()
+    stats = engine.stats()
+    return {
+        "max_fps": max_fps,
+        "paced_fps": rate(stats["chunks_analyzed"], config.duration),
+        "target_fps": LIVE_RATE / LIVE_CHUNK,
+        "dropped_audio": stats["dropped_audio"],
+        "analyze": summarize(latencies),
+    }
+
+
+BENCHMARKS = [
+    ("live.streaming_mfcc", bench_streaming_mfcc),
+    ("live.predictor", bench_predictor),
+    ("live.lip_tracker", bench_lip_tracker),
+    ("live.stages", bench_live_stages),
+    ("live.loop", bench_live_loop),
+]
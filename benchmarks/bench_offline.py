@@ -0,0 +1,89 @@
+import os
+import shutil
+import time
+from benchmarks.fixtures import clip_frames, make_fixture_files
+from benchmarks.timing import SkipBenchmark, rate, summarize
+
+
+def _fixtures(config, sr):
+    folder = os.path.join(config.workdir, f"fixtures_{sr}")
+    frames = clip_frames(config.video) if config.video else None
+    return make_fixture_files(folder, config.files, config.duration, sr, frames)
+
+
+def _require_ffmpeg():
+    """Skip, rather than fail, the cases that shell out to the ffmpeg binary when it isn't installed."""
+    if shutil.which("ffmpeg") is None:
+        raise SkipBenchmark("ffmpeg not found on PATH")
+
+
+def _run_files(func, jobs, duration):
+    """Run `func(*args)` for every job; files per second and per-file latency."""
+    func(*jobs[0])  # Untimed warm-up (imports, JIT caches)
+    samples = []
+    for args in jobs:
+        started = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - started)
+    total = sum(samples)
+    return {
+        "files": len(jobs),
+        "files_per_second": rate(len(jobs), total),
+        "realtime_factor": rate(len(jobs) * duration, total),
+        "per_file": summarize(samples),
+    }
+
+
+def bench_extract_audio(config):
+    _require_ffmpeg()
+    from scripts.extract_audio import extract_audio
+    out = os.path.join(config.workdir, "audio")
+    os.makedirs(out, exist_ok=True)
+    jobs = [(mp4, os.path.join(out, os.path.basename(wav))) for wav, mp4 in _fixtures(config, 44100)]
+    return _run_files(extract_audio, jobs, config.duration)
+
+
+def bench_extract_mfcc(config):
+    from scripts.extract_mfcc import SAMPLE_RATE, extract_mfcc
+    out = os.path.join(config.workdir, "mfcc")
+    os.makedirs(out, exist_ok=True)
+    jobs = [(wav, os.path.join(out, os.path.basename(wav) + ".npy")) for wav, _ in _fixtures(config, SAMPLE_RATE)]
+    return _run_files(extract_mfcc, jobs, config.duration)
+
+
+def bench_stream_mfcc(config):
+    """extract_mfcc_from_video: one ffmpeg pass piping PCM into the MFCC extractor, no WAV reload."""
+    _require_ffmpeg()
+    from scripts.extract_mfcc import SAMPLE_RATE, extract_mfcc_from_video
+    out = os.path.join(config.workdir, "stream_mfcc")
+    os.makedirs(out, exist_ok=True)
+    jobs = [(wav, os.path.join(out, os.path.basename(wav) + ".npy")) for wav, _ in _fixtures(config, SAMPLE_RATE)]
+    return _run_files(extract_mfcc_from_video, jobs, config.duration)
+
+
+def bench_extract_mouth_motion(config):
+    from scripts.extract_mouth_motion import extract_mouth_motion
+    out = os.path.join(config.workdir, "mouth_motion")
+    os.makedirs(out, exist_ok=True)
+    jobs = [(mp4, os.path.join(out, os.path.basename(mp4) + ".npy"), False) for _, mp4 in _fixtures(config, 44100)]
+    return _run_files(extract_mouth_motion, jobs, config.duration)
+
+
+def bench_analyze_recording(config):
+    _require_ffmpeg()
+    from scripts.analyze_recording import analyze_recording
+    from scripts.lip_tracker import LipTracker
+    from scripts.model_loader import get_predictor
+    get_predictor()
+    tracker = LipTracker()
+    jobs = [(mp4, wav) for wav, mp4 in _fixtures(config, 44100)]
+    return _run_files(lambda mp4, wav: analyze_recording(mp4, wav, tracker=tracker), jobs, config.duration)
+
+
+BENCHMARKS = [
+    ("offline.extract_audio", bench_extract_audio),
+    ("offline.extract_mfcc", bench_extract_mfcc),
+    ("offline.stream_mfcc", bench_stream_mfcc),
+    ("offline.extract_mouth_motion", bench_extract_mouth_motion),
+    ("offline.analyze_recording", bench_analyze_recording),
+]
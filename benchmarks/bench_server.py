@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.timing import SkipBenchmark, rate, summarize
+
+# Canned model output, long enough to pass the app's validity filter
+STUB_LESSON = " ".join(["Practice slow, controlled speech with short pauses between phrases."] * 12)
+
+
+def start_stub_llm(delay):
+    """Local stand-in for the inference API: answers every POST with STUB_LESSON after `delay` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            body = json.dumps([{"generated_text": STUB_LESSON}]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+class _MemoryBatch:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref, data))
+
+    def commit(self):
+        for ref, data in self.writes:
+            self.docs[ref] = data
+
+
+class _MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, doc_id):
+        return (self.name, doc_id)
+
+
+class MemoryFirestore:
+    """Just enough of the Firestore client for the write-behind writer, so benchmarks never touch real data."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return _MemoryCollection(name)
+
+    def batch(self):
+        return _MemoryBatch(self.docs)
+
+
+def _firebase_stubs():
+    """Stand-ins for the firebase_admin modules server/app.py imports, so it starts without credentials."""
+    firebase_admin = types.ModuleType("firebase_admin")
+    credentials = types.ModuleType("firebase_admin.credentials")
+    firestore = types.ModuleType("firebase_admin.firestore")
+    credentials.Certificate = lambda path: None
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    firestore.client = MemoryFirestore
+    firestore.SERVER_TIMESTAMP = "SERVER_TIMESTAMP"
+    firestore.Query = types.SimpleNamespace(ASCENDING="ASCENDING", DESCENDING="DESCENDING")
+    firebase_admin.credentials, firebase_admin.firestore = credentials, firestore
+    return {"firebase_admin": firebase_admin, "firebase_admin.credentials": credentials,
+            "firebase_admin.firestore": firestore}
+
+
+_app_module = None
+
+
+def _load_app(config):
+    """Import server/app.py against the stub LLM and an in-memory lesson store."""
+    global _app_module
+    if _app_module is None:
+        stub = start_stub_llm(config.llm_delay)
+        os.environ["INFERENCE_API_URL"] = f"http://127.0.0.1:{stub.server_port}"
+        os.environ["LESSON_CACHE_FIRESTORE"] = "0"
+        os.environ.setdefault("HUGGINGFACE_API_KEY", "benchmark")
+        # Firebase is initialised at import, so it is swapped out only for the import
+        stubs = _firebase_stubs()
+        saved = {name: sys.modules.get(name) for name in stubs}
+        sys.modules.update(stubs)
+        try:
+            from server import app as app_module
+        except Exception as e:
+            # Needs the server's packages at import time
+            raise SkipBenchmark(f"server.app could not start: {str(e)}")
+        finally:
+            for name, module in saved.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+        from server.lesson_store import WriteBehindWriter
+        app_module.lesson_writer = WriteBehindWriter(MemoryFirestore(), "lessons")
+        app_module.pdf_cache.folder = os.path.join(config.workdir, "pdfs")
+        _app_module = app_module
+    return _app_module
+
+
+def _generate(app_module, speech_issue):
+    """Submit a lesson and poll until it finishes; returns (submit seconds, total seconds)."""
+    client = app_module.app.test_client()
+    started = time.perf_counter()
+    response = client.post("/generate_lesson", json={"user_id": uuid.uuid4().hex, "speech_issue": speech_issue})
+    submitted = time.perf_counter()
+    status_url = response.get_json()["status_url"]
+    while True:
+        job = client.get(status_url).get_json()
+        if job["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.005)
+    return submitted - started, time.perf_counter() - started
+
+
+def _generate_many(config, issues):
+    app_module = _load_app(config)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.clients) as pool:
+        results = list(pool.map(lambda issue: _generate(app_module, issue), issues))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(issues),
+        "requests_per_second": rate(len(issues), elapsed),
+        "submit": summarize([submit for submit, _ in results]),
+        "end_to_end": summarize([total for _, total in results]),
+    }
+
+
+def bench_generate_lesson_miss(config):
+    """Distinct speech issues: every lesson goes to the (stubbed) model."""
+    return _generate_many(config, [f"issue {uuid.uuid4().hex}" for _ in range(config.requests)])
+
+
+def bench_generate_lesson_hit(config):
+    """One repeated speech issue: served by the lesson cache after the first request."""
+    issue = f"issue {uuid.uuid4().hex}"
+    _generate(_load_app(config), issue)
+    return _generate_many(config, [issue] * config.requests)
+
+
+def bench_download_lesson(config):
+    """Cached PDF downloads, and revalidations answered with 304 via the ETag."""
+    app_module = _load_app(config)
+    client = app_module.app.test_client()
+    response = client.post("/generate_lesson", json={"user_id": "benchmark", "speech_issue": "lisp"})
+    status_url = response.get_json()["status_url"]
+    while client.get(status_url).get_json()["status"] not in ("succeeded", "failed"):
+        time.sleep(0.005)
+
+    def download(_):
+        return app_module.app.test_client().get("/download_lesson/benchmark")
+
+    etag = download(None).headers["ETag"].strip('"')
+
+    def revalidate(_):
+        return app_module.app.test_client().get("/download_lesson/benchmark", headers={"If-None-Match": f'"{etag}"'})
+
+    results = {}
+    for name, func in (("download", download), ("revalidate", revalidate)):
+        samples = []
+
+        def timed(i):
+            t = time.perf_counter()
+            func(i)
+            samples.append(time.perf_counter() - t)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=config.clients) as pool:
+            list(pool.map(timed, range(config.requests)))
+        elapsed = time.perf_counter() - started
+        results[name] = dict(summarize(samples), requests_per_second=rate(config.requests, elapsed))
+    return results
+
+
+BENCHMARKS = [
+    ("server.generate_lesson_miss", bench_generate_lesson_miss),
+    ("server.generate_lesson_hit", bench_generate_lesson_hit),
+    ("server.download_lesson", bench_download_lesson),
+]
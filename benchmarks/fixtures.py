@@ -0,0 +1,95 @@
+import os
+import wave
+import cv2
+import numpy as np
+
+# Live loop capture format (see real_time_analysis.py)
+LIVE_RATE = 16000
+LIVE_CHUNK = 512
+FRAME_SIZE = (640, 480)
+FPS = 30.0
+
+
+def synthetic_audio(duration, sr, seed=0):
+    """Speech-like test signal: a gliding harmonic tone with syllable-rate bursts over background noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sr)) / sr
+    pitch = 140 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2  # ~4 syllables per second
+    noise = rng.normal(scale=0.05, size=len(t))
+    return (0.3 * envelope * voiced + noise).astype(np.float32)
+
+
+def pcm_chunks(y, chunk=LIVE_CHUNK):
+    """Split a float signal into int16 byte chunks, as PyAudio's stream.read() returns them."""
+    pcm = (np.clip(y, -1, 1) * 32767).astype(np.int16)
+    return [pcm[i:i + chunk].tobytes() for i in range(0, len(pcm) - chunk + 1, chunk)]
+
+
+def synthetic_face(index, size=FRAME_SIZE, fps=FPS):
+    """A drawn face whose mouth opens and closes over time; enough texture for the lip tracker's optical flow."""
+    width, height = size
+    frame = np.full((height, width, 3), (60, 50, 40), dtype=np.uint8)
+    cx, cy = width // 2, height // 2
+    cv2.ellipse(frame, (cx, cy), (110, 145), 0, 0, 360, (150, 180, 220), -1)  # Skin
+    for dx in (-45, 45):
+        cv2.ellipse(frame, (cx + dx, cy - 40), (20, 10), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(frame, (cx + dx, cy - 40), 7, (40, 30, 20), -1)
+    cv2.line(frame, (cx, cy - 25), (cx - 8, cy + 25), (120, 140, 180), 3)  # Nose
+    opening = int(4 + 14 * abs(np.sin(2 * np.pi * 2 * index / fps)))
+    cv2.ellipse(frame, (cx, cy + 70), (40, opening), 0, 0, 360, (60, 40, 140), -1)  # Lips
+    cv2.ellipse(frame, (cx, cy + 70), (34, max(opening - 6, 1)), 0, 0, 360, (30, 20, 40), -1)  # Mouth
+    return frame
+
+
+def synthetic_frames(n, size=FRAME_SIZE, fps=FPS):
+    return [synthetic_face(i, size, fps) for i in range(n)]
+
+
+def clip_frames(path, limit=None):
+    """Frames of a recorded sample clip, for benchmarking on real faces instead of drawn ones."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise IOError(f"Could not read frames from {path}")
+    return frames
+
+
+def write_wav(path, y, sr):
+    pcm = (np.clip(y, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(pcm.tobytes())
+
+
+def write_video(path, frames, fps=FPS):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def make_fixture_files(folder, n_files, duration, sr, frames=None):
+    """Write `n_files` synthetic WAV + MP4 pairs of `duration` seconds; returns [(wav_path, mp4_path)]."""
+    os.makedirs(folder, exist_ok=True)
+    n_frames = int(duration * FPS)
+    video_frames = frames[:n_frames] if frames is not None else synthetic_frames(n_frames)
+    paths = []
+    for i in range(n_files):
+        wav_path = os.path.join(folder, f"sample_{i}.wav")
+        mp4_path = os.path.join(folder, f"sample_{i}.mp4")
+        write_wav(wav_path, synthetic_audio(duration, sr, seed=i), sr)
+        write_video(mp4_path, video_frames)
+        paths.append((wav_path, mp4_path))
+    return paths
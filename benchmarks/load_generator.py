@@ -0,0 +1,127 @@
+"""Synthetic load for the streaming analysis server (server/stream_server.py).
+
+    python -m benchmarks.load_generator --url http://127.0.0.1:5002 --sessions 32 --duration 30
+
+Each simulated client opens a session and streams synthetic speech in real time (one request per
+`--records` chunks), then reports throughput, per-request latency percentiles and the server's
+batching stats. Without --url the server runs in-process on a free port.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from benchmarks.fixtures import LIVE_CHUNK, LIVE_RATE, synthetic_audio
+from benchmarks.timing import SkipBenchmark, rate, summarize
+
+
+def session_records(duration, seed, records_per_request):
+    """Request bodies for one client: int16 chunks each followed by a float32 lip distance."""
+    from server.stream_server import RECORD_DTYPE
+
+    y = synthetic_audio(duration, LIVE_RATE, seed=seed)
+    pcm = (np.clip(y, -1, 1) * 32767).astype(np.int16)
+    n = len(pcm) // LIVE_CHUNK
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records["samples"] = pcm[:n * LIVE_CHUNK].reshape(n, LIVE_CHUNK)
+    records["lip_distance"] = 8 + 4 * np.sin(np.arange(n) * 2 * np.pi * 4 * LIVE_CHUNK / LIVE_RATE)
+    return [records[i:i + records_per_request].tobytes() for i in range(0, n, records_per_request)]
+
+
+def run_client(url, index, duration, records_per_request, realtime, latencies, statuses, lock):
+    http = requests.Session()  # Keep-alive, like a long-lived streaming client
+    response = http.post(f"{url}/sessions")
+    if response.status_code != 200:
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return None
+    session_id = response.json()["session_id"]
+    interval = records_per_request * LIVE_CHUNK / LIVE_RATE
+
+    started = time.perf_counter()
+    for i, body in enumerate(session_records(duration, index, records_per_request)):
+        if realtime:
+            # Send each chunk when it would have finished recording
+            delay = started + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent = time.perf_counter()
+        response = http.post(f"{url}/sessions/{session_id}/chunks", data=body,
+                             headers={"Content-Type": "application/octet-stream"})
+        elapsed = time.perf_counter() - sent
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+    return http.delete(f"{url}/sessions/{session_id}").json()
+
+
+def run_load(url, sessions=16, duration=10.0, records_per_request=1, realtime=True):
+    """Stream from `sessions` concurrent clients; returns throughput, latency and batching stats."""
+    latencies, statuses, lock = [], {}, threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        summaries = list(pool.map(
+            lambda i: run_client(url, i, duration, records_per_request, realtime, latencies, statuses, lock),
+            range(sessions)))
+    elapsed = time.perf_counter() - started
+    chunks = sum(s["chunks"] for s in summaries if s)
+    return {
+        "sessions": sessions,
+        "chunks": chunks,
+        "chunks_per_second": rate(chunks, elapsed),
+        "requests_per_second": rate(len(latencies), elapsed),
+        "latency": summarize(latencies),
+        "shed": sum(s["shed"] for s in summaries if s),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "server": requests.get(f"{url}/stats").json(),
+    }
+
+
+def start_local_server():
+    """Serve server/stream_server.py on a free local port; returns its URL."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    try:
+        from server import stream_server
+        stream_server.get_batcher()
+    except FileNotFoundError as e:
+        raise SkipBenchmark(str(e))
+    server = make_server("127.0.0.1", 0, stream_server.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="stream-server", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+_local_url = None
+
+
+def bench_stream_analysis(config):
+    """Concurrent real-time clients against the streaming server with cross-session batching."""
+    global _local_url
+    if _local_url is None:
+        _local_url = start_local_server()
+    return run_load(_local_url, sessions=config.clients, duration=config.duration)
+
+
+BENCHMARKS = [
+    ("server.stream_analysis", bench_stream_analysis),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate streaming load against the analysis server.")
+    parser.add_argument("--url", help="Server URL (default: start one in-process)")
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent streaming clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of audio per client")
+    parser.add_argument("--records", type=int, default=1, help="Chunks per request")
+    parser.add_argument("--no-realtime", action="store_true", help="Send as fast as possible instead of in real time")
+    args = parser.parse_args()
+
+    url = (args.url or start_local_server()).rstrip("/")
+    print(json.dumps(run_load(url, args.sessions, args.duration, args.records, not args.no_realtime), indent=2))
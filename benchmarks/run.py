@@ -0,0 +1,151 @@
+"""Offline performance benchmarks for the live loop, the feature scripts and the lesson server.
+
+    python -m benchmarks.run                      # everything, compared against benchmarks/baseline.json
+    python -m benchmarks.run --only live --quick  # a subset, with smaller fixtures
+    python -m benchmarks.run --update-baseline    # accept the current numbers as the new baseline
+
+Results are written as JSON. Benchmarks whose packages, credentials or files aren't available are
+reported as skipped. The run exits non-zero when a metric regresses past the baseline tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from benchmarks import bench_live, bench_offline, bench_server, load_generator
+from benchmarks.timing import SkipBenchmark
+
+BENCHMARKS = bench_live.BENCHMARKS + bench_offline.BENCHMARKS + bench_server.BENCHMARKS + load_generator.BENCHMARKS
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_FOLDER, "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARK_FOLDER, "results", "latest.json")
+
+# Allowed relative regression before a metric fails the comparison
+DEFAULT_TOLERANCE = 0.25
+
+# Metrics compared against the baseline: latency percentiles (lower is better) and throughputs (higher is better)
+LOWER_IS_BETTER = ("p50_ms", "p90_ms", "p99_ms")
+HIGHER_IS_BETTER = ("fps", "files_per_second", "requests_per_second", "chunks_per_second", "realtime_factor")
+
+
+def flatten(results, prefix=""):
+    """{"live.stages": {"extract_mfcc": {"p50_ms": 1}}} -> {"live.stages.extract_mfcc.p50_ms": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def direction(metric):
+    """'lower' or 'higher' if the metric is compared against the baseline, else None."""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf in LOWER_IS_BETTER:
+        return "lower"
+    if leaf in HIGHER_IS_BETTER or leaf.endswith("_fps"):
+        return "higher"
+    return None
+
+
+def make_baseline(results, tolerance=DEFAULT_TOLERANCE):
+    metrics = {}
+    for metric, value in flatten(results).items():
+        better = direction(metric)
+        if better is not None:
+            metrics[metric] = {"value": value, "better": better, "tolerance": tolerance}
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": platform.node(), "metrics": metrics}
+
+
+def compare(results, baseline):
+    """Regressions beyond each metric's tolerance, as (metric, baseline value, current value, change)."""
+    current = flatten(results)
+    regressions = []
+    for metric, entry in baseline.get("metrics", {}).items():
+        if metric not in current or not entry["value"]:
+            continue
+        change = (current[metric] - entry["value"]) / entry["value"]
+        worse = change > entry["tolerance"] if entry["better"] == "lower" else change < -entry["tolerance"]
+        if worse:
+            regressions.append((metric, entry["value"], current[metric], change))
+    return regressions
+
+
+def run(names, config):
+    results, skipped, failed = {}, {}, {}
+    for name, func in BENCHMARKS:
+        if names and not any(name == n or name.startswith(n + ".") for n in names):
+            continue
+        print(f"⏱️  {name}")
+        try:
+            results[name] = func(config)
+        except (ImportError, SkipBenchmark) as e:
+            print(f"   skipped: {str(e)}")
+            skipped[name] = str(e)
+        except Exception as e:
+            print(f"   failed: {str(e)}")
+            failed[name] = str(e)
+    return results, skipped, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline performance benchmarks.")
+    parser.add_argument("--only", nargs="+", default=[],
+                        help="Benchmark names or groups to run (e.g. live, offline.extract_mfcc)")
+    parser.add_argument("--quick", action="store_true", help="Smaller fixtures for a fast smoke run")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of synthetic audio/video per fixture")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per micro-benchmark")
+    parser.add_argument("--files", type=int, default=4, help="Fixture files per offline script")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per server benchmark")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients for server benchmarks")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="Stub LLM response time in seconds")
+    parser.add_argument("--video", help="Recorded sample clip to use instead of the synthetic face")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative regression allowed per metric when writing a baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    config = parser.parse_args()
+    if config.quick:
+        config.duration, config.iterations, config.files, config.requests = 2.0, 50, 1, 20
+
+    with tempfile.TemporaryDirectory(prefix="talkify-bench-") as workdir:
+        config.workdir = workdir
+        results, skipped, failed = run(config.only, config)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"node": platform.node(), "platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(config).items() if key not in ("workdir", "output", "baseline")},
+        "results": results,
+        "skipped": skipped,
+        "failed": failed,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(config.output)), exist_ok=True)
+    with open(config.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {config.output}")
+
+    if config.update_baseline:
+        with open(config.baseline, "w") as f:
+            json.dump(make_baseline(results, config.tolerance), f, indent=2)
+        print(f"✅ Baseline updated: {config.baseline}")
+        sys.exit(1 if failed else 0)
+
+    if not os.path.exists(config.baseline):
+        print("No baseline to compare against; create one with --update-baseline.")
+        sys.exit(1 if failed else 0)
+
+    with open(config.baseline, "r") as f:
+        regressions = compare(results, json.load(f))
+    for metric, before, after, change in regressions:
+        print(f"⚠️ Regression: {metric} {before:.3f} → {after:.3f} ({change:+.0%})")
+    if not regressions:
+        print("✅ No regressions against the baseline.")
+    sys.exit(1 if regressions or failed else 0)
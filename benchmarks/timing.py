@@ -0,0 +1,38 @@
+import time
+import numpy as np
+
+
+def measure(func, inputs, warmup=3):
+    """Call `func(item)` for every item after `warmup` untimed calls; returns per-call seconds."""
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        func(item)
+    samples = []
+    for item in inputs:
+        started = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples):
+    """Latency distribution of per-call seconds, in milliseconds."""
+    ms = 1000.0 * np.asarray(samples, dtype=np.float64)
+    if len(ms) == 0:
+        return {"count": 0}
+    return {
+        "count": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def rate(count, seconds):
+    return count / seconds if seconds > 0 else 0.0
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark whose environment (credentials, devices, optional packages) isn't available."""
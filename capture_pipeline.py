@@ -0,0 +1,223 @@
+import collections
+import threading
+import time
+import instrumentation
+
+# Frame-drop policies for a full ring buffer
+DROP_OLDEST = "drop_oldest"  # Evict the oldest item to make room (lowest latency)
+DROP_NEWEST = "drop_newest"  # Reject the incoming item (keeps the backlog intact)
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+CAPTURE_SECONDS = instrumentation.histogram(
+    "capture_read_seconds", "Time spent in one audio/video device read", ["source"])
+DROPPED = instrumentation.counter("capture_dropped", "Items dropped by a full capture buffer", ["buffer"])
+AUDIO_OVERFLOWS = instrumentation.counter("capture_audio_overflows", "Audio device buffer overruns")
+
+
+class RingBuffer:
+    """Bounded, thread-safe buffer of timestamped items.
+
+    `dropped` counts items discarded before any reader saw them; evicting an item that `get()`,
+    `latest()` or `nearest()` already returned is normal turnover, not a drop.
+    """
+
+    def __init__(self, capacity, drop_policy=DROP_OLDEST, name=None):
+        if capacity < 1:
+            raise ValueError("RingBuffer capacity must be at least 1")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self.name = name  # Label for the dropped-items metric
+        self.dropped = 0
+        self._items = collections.deque()  # [timestamp, item, seen]
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def _drop(self):
+        self.dropped += 1
+        if self.name is not None:
+            DROPPED.inc(buffer=self.name)
+
+    def _read(self, entry):
+        entry[2] = True
+        return entry[0], entry[1]
+
+    def put(self, item, timestamp=None):
+        """Add an item, applying the drop policy when full. Returns False if the item was rejected."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                if self.drop_policy == DROP_NEWEST:
+                    self._drop()
+                    return False
+                if not self._items.popleft()[2]:
+                    self._drop()
+            self._items.append([timestamp, item, False])
+            self._cond.notify()
+            return True
+
+    def get(self, timeout=None):
+        """Pop the oldest (timestamp, item) pair, or None if nothing arrives before the timeout."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._read(self._items.popleft())
+
+    def latest(self):
+        """Return the newest (timestamp, item) pair without removing it."""
+        with self._cond:
+            return self._read(self._items[-1]) if self._items else None
+
+    def nearest(self, timestamp):
+        """Return the (timestamp, item) pair closest in time to `timestamp` without removing it."""
+        with self._cond:
+            if not self._items:
+                return None
+            return self._read(min(self._items, key=lambda entry: abs(entry[0] - timestamp)))
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+
+class AnalysisEngine:
+    """Runs audio capture, video capture and inference on separate threads.
+
+    `read_audio()` must return one chunk of raw audio and raise IOError on input overflow,
+    `read_frame()` follows the `cv2.VideoCapture.read()` contract, and `analyze(audio_chunk, frame)`
+    returns the label to display, or None when there is nothing to report yet. The caller's thread
+    is left free to render. `drop_policy` governs the audio queue only.
+    """
+
+    def __init__(self, read_audio, read_frame, analyze, chunk_duration,
+                 audio_capacity=32, video_capacity=4, drop_policy=DROP_OLDEST):
+        self.read_audio = read_audio
+        self.read_frame = read_frame
+        self.analyze = analyze
+        self.chunk_duration = chunk_duration
+
+        # The drop policy applies to the audio queue, which inference consumes. Frames are only ever
+        # peeked at (latest for display, nearest for alignment), so the video buffer always keeps the newest
+        self.audio_buffer = RingBuffer(audio_capacity, drop_policy, name="audio")
+        self.video_buffer = RingBuffer(video_capacity, DROP_OLDEST, name="video")
+
+        self.audio_overflows = 0
+        self.frames_captured = 0
+        self.chunks_captured = 0
+        self.chunks_analyzed = 0
+        self.error = None
+
+        self._result = None
+        self._result_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start the capture and inference threads."""
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._audio_loop, name="audio-capture", daemon=True),
+            threading.Thread(target=self._video_loop, name="video-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all threads to stop and wait for them to exit."""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self):
+        return not self._stop_event.is_set()
+
+    def latest_frame(self):
+        """Newest captured frame, or None before the first frame arrives."""
+        entry = self.video_buffer.latest()
+        return entry[1] if entry else None
+
+    def latest_result(self):
+        """Most recent analysis result as a dict, or None before the first prediction."""
+        with self._result_lock:
+            return self._result
+
+    def stats(self):
+        """Capture and drop counters for the current session."""
+        return {
+            "chunks_captured": self.chunks_captured,
+            "chunks_analyzed": self.chunks_analyzed,
+            "frames_captured": self.frames_captured,
+            "dropped_audio": self.audio_buffer.dropped + self.audio_overflows,
+            "audio_overflows": self.audio_overflows,
+            "dropped_video": self.video_buffer.dropped,
+        }
+
+    def _fail(self, message):
+        self.error = message
+        self._stop_event.set()
+
+    def _audio_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                with CAPTURE_SECONDS.time(source="audio"):
+                    chunk = self.read_audio()
+            except IOError:
+                # The device buffer overran before we read it; that audio is gone
+                self.audio_overflows += 1
+                AUDIO_OVERFLOWS.inc()
+                continue
+            except Exception as e:
+                self._fail(f"Audio capture error: {str(e)}")
+                break
+            # Timestamp the chunk at its midpoint so it can be aligned with video frames
+            self.audio_buffer.put(chunk, time.monotonic() - self.chunk_duration / 2)
+            self.chunks_captured += 1
+
+    def _video_loop(self):
+        while not self._stop_event.is_set():
+            with CAPTURE_SECONDS.time(source="video"):
+                ret, frame = self.read_frame()
+            if not ret:
+                self._fail("Error: Failed to capture frame.")
+                break
+            self.video_buffer.put(frame)
+            self.frames_captured += 1
+
+    def _inference_loop(self):
+        while not self._stop_event.is_set():
+            entry = self.audio_buffer.get(timeout=0.1)
+            if entry is None:
+                continue
+            timestamp, chunk = entry
+
+            frame_entry = self.video_buffer.nearest(timestamp)
+            if frame_entry is None:
+                continue
+
+            started = time.monotonic()
+            try:
+                condition = self.analyze(chunk, frame_entry[1])
+            except Exception as e:
+                print(f"Inference error: {str(e)}")
+                continue
+
+            self.chunks_analyzed += 1
+            if condition is None:
+                continue
+            with self._result_lock:
+                self._result = {
+                    "condition": condition,
+                    "timestamp": timestamp,
+                    "latency": time.monotonic() - started,
+                    "av_skew": frame_entry[0] - timestamp,
+                }
@@ -4,6 +4,18 @@ import { useNavigate } from "react-router-dom";
 import { jsPDF } from "jspdf";
 import "./section.css";
 
+const LESSON_POLL_INTERVAL_MS = 1000;
+
+const waitForLessonJob = async (statusUrl) => {
+  while (true) {
+    const { data } = await axios.get(`http://127.0.0.1:5000${statusUrl}`);
+    if (data.status === "succeeded" || data.status === "failed") {
+      return data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, LESSON_POLL_INTERVAL_MS));
+  }
+};
+
 const Section = ({ user }) => {
   const navigate = useNavigate();
   const [lesson, setLesson] = useState("");
@@ -30,7 +42,12 @@ const Section = ({ user }) => {
         speech_issue: userSpeechIssue,
       });
 
-      setLesson(response.data.lesson);
+      // Lesson generation runs as a background job; poll until it finishes
+      const job = await waitForLessonJob(response.data.status_url);
+      if (job.status !== "succeeded") {
+        throw new Error(job.error || "Lesson generation failed");
+      }
+      setLesson(job.result.lesson);
     } catch (error) {
       console.error("Error generating lesson:", error);
       setError("Failed to generate lesson. Please try again.");
@@ -0,0 +1,296 @@
+import bisect
+import math
+import os
+import threading
+import time
+
+# Set INSTRUMENTATION=0 to turn every timer and counter into a no-op
+ENABLED = os.environ.get("INSTRUMENTATION", "1") != "0"
+
+# Latency buckets in seconds, from sub-millisecond DSP up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic count, optionally split by labels.
+
+    Exposed as `<name>_total`; in the 0.0.4 text format the HELP and TYPE lines must use that same name.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.family = name if name.endswith("_total") else name + "_total"
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            values = {(): 0}
+        return [(self.family, _format_labels(self.labelnames, key), value) for key, value in values.items()]
+
+
+class Gauge:
+    """Current value: set explicitly, or read from `func()` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), func=None):
+        self.name = name
+        self.family = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.func = func
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.func is not None:
+            try:
+                return [(self.name, "", self.func())]
+            except Exception:
+                return []
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Histogram:
+    """Bucketed distribution of observations (usually seconds), optionally split by labels.
+
+    An observation is one bisect and a few additions under a lock, cheap enough for per-chunk use
+    in the live loop. Quantiles are estimated from the buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.family = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the duration of its block."""
+        return _Timer(self, labels)
+
+    def _snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def samples(self):
+        samples = []
+        for key, series in self._snapshot().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = ("le", _format_value(bound) if bound == math.inf else repr(bound))
+                samples.append((self.name + "_bucket", _format_labels(self.labelnames, key, le), cumulative))
+            samples.append((self.name + "_sum", _format_labels(self.labelnames, key), series[-1]))
+            samples.append((self.name + "_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+    def summary(self):
+        """{label values: {"count", "mean", "p50", "p90", "p99"}} with bucket-interpolated quantiles."""
+        result = {}
+        for key, series in self._snapshot().items():
+            counts = series[:-1]
+            total = sum(counts)
+            if not total:
+                continue
+            stats = {"count": total, "mean": series[-1] / total}
+            for q in (0.5, 0.9, 0.99):
+                stats[f"p{int(q * 100)}"] = self._quantile(counts, total, q)
+            result[key] = stats
+        return result
+
+    def _quantile(self, counts, total, q):
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            if count and cumulative + count >= rank:
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+
+class Registry:
+    """Named metrics; `counter()`, `gauge()` and `histogram()` return the existing metric on repeat calls."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=(), func=None):
+        gauge = self._get_or_create(Gauge, name, help, labelnames)
+        if func is not None:
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.family} {metric.help}")
+            lines.append(f"# TYPE {metric.family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """One human-readable line per histogram series and counter, for CLI reports."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                for key, stats in metric.summary().items():
+                    label = f"{metric.name}{{{','.join(key)}}}" if key else metric.name
+                    lines.append(f"{label}: n={stats['count']} mean={1000 * stats['mean']:.2f}ms "
+                                 f"p50={1000 * stats['p50']:.2f}ms p90={1000 * stats['p90']:.2f}ms "
+                                 f"p99={1000 * stats['p99']:.2f}ms")
+            elif isinstance(metric, Counter):
+                for name, labels, value in metric.samples():
+                    if value:
+                        lines.append(f"{name}{labels}: {value:g}")
+        return lines
+
+
+# Process-wide registry shared by every instrumented module
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def metrics_response(registry=REGISTRY):
+    """(body, status, headers) for a Flask /metrics view."""
+    return registry.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+
+class SummaryReporter:
+    """Prints the registry's summary every `interval` seconds from a background thread."""
+
+    def __init__(self, interval=10.0, registry=REGISTRY, title="Metrics"):
+        self.interval = interval
+        self.registry = registry
+        self.title = title
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not ENABLED or self.interval <= 0:
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.report()
+
+    def report(self):
+        lines = self.registry.summary_lines()
+        if lines:
+            print(f"📊 {self.title}\n  " + "\n  ".join(lines))
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,14 +1,20 @@
+import collections
+import os
 import cv2
 import numpy as np
-import librosa
 import pyaudio  # type: ignore
 import time
-import mediapipe as mp
-from scripts.train_model import model
+import uuid
+import instrumentation
+from scripts.lip_tracker import LipTracker
+from scripts.model_loader import WINDOW_LENGTH, get_predictor, load_numpy_model
+from capture_pipeline import AnalysisEngine, DROP_OLDEST
+from session_aggregator import SessionAggregator, condition_for
+from scripts.streaming_mfcc import StreamingMFCC
+from scripts.vad import ENERGY_THRESHOLD_DB, HANGOVER_SECONDS, MAX_ZCR_HZ, VoiceActivityDetector
 
-# Initialize MediaPipe Face Mesh for Lip Tracking
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True)
+# Lip tracker: full FaceMesh detection every few frames, optical flow on the mouth region in between
+lip_tracker = LipTracker()
 
 # Audio recording parameters
 FORMAT = pyaudio.paInt16
@@ -16,6 +22,39 @@ CHANNELS = 1
 RATE = 16000
 CHUNK = 512  
 
+# Streaming MFCC extractor; keeps the STFT overlap between chunks (hop == CHUNK, so one frame per chunk)
+mfcc_stream = StreamingMFCC(sr=RATE, n_mfcc=13, hop_length=CHUNK)
+
+# Voice activity gate: silent chunks skip MFCC extraction and inference, so the condition holds between sentences
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1") == "1"
+vad = VoiceActivityDetector(
+    RATE, CHUNK,
+    energy_threshold=float(os.environ.get("VAD_ENERGY_DB", str(ENERGY_THRESHOLD_DB))),
+    max_zcr_hz=float(os.environ.get("VAD_MAX_ZCR_HZ", str(MAX_ZCR_HZ))),
+    hangover_seconds=float(os.environ.get("VAD_HANGOVER_SECONDS", str(HANGOVER_SECONDS))),
+)
+in_speech = False
+
+# Per-stage latency of the live loop, reported every METRICS_INTERVAL seconds and on /metrics
+STAGE_SECONDS = instrumentation.histogram("analysis_stage_seconds", "Live analysis stage latency", ["stage"])
+PREDICTIONS = instrumentation.counter("analysis_predictions", "Live predictions by condition", ["condition"])
+VAD_CHUNKS = instrumentation.counter("analysis_vad_chunks", "Live audio chunks by voice activity decision", ["decision"])
+METRICS_INTERVAL = 10.0
+
+# Every prediction of the current session is folded into this; the final condition comes from all of them.
+# Each session's predictions are also appended to a compact binary timeline (SESSION_TIMELINES=0 to skip)
+SESSION_FOLDER = os.environ.get("SESSION_FOLDER", "data/sessions")
+SESSION_TIMELINES = os.environ.get("SESSION_TIMELINES", "1") == "1"
+aggregator = SessionAggregator()
+
+# Most recent combined feature vectors, fed to the model as one sequence
+feature_window = collections.deque(maxlen=WINDOW_LENGTH)
+
+# Carry the LSTM state across chunks so each prediction costs one recurrent step;
+# STREAMING_INFERENCE=0 rescores the whole window with the configured backend instead
+STREAMING_INFERENCE = os.environ.get("STREAMING_INFERENCE", "1") == "1"
+lstm_stream = None
+
 # Maximum camera runtime (10 minutes)
 MAX_RUNTIME = 0.5 * 60  
 
@@ -44,45 +83,84 @@ def display_paragraph(frame):
     frame[:overlay.shape[0], :overlay.shape[1]] = overlay
     return frame
 
+def pcm_to_float(audio_data):
+    """Scale int16 PCM to [-1, 1] like librosa.load so features match the training data."""
+    return np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+def detect_speech(y):
+    """Whether this chunk is speech; on the way into silence the MFCC stream restarts, like a new utterance."""
+    global in_speech
+    with STAGE_SECONDS.time(stage="vad"):
+        speech = vad.is_speech(y)
+    if in_speech and not speech:
+        mfcc_stream.reset()
+    in_speech = speech
+    VAD_CHUNKS.inc(decision="speech" if speech else "silence")
+    return speech
+
+def reset_vad():
+    global in_speech
+    vad.reset()
+    in_speech = False
+
 def extract_mfcc(audio_data):
-    """Extract MFCC features from audio data."""
+    """Extract the MFCC frames completed by this chunk of audio data (may be empty while priming)."""
     try:
-        y = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
-        mfccs = librosa.feature.mfcc(y=y, sr=RATE, n_mfcc=13)
-        return mfccs.T
+        y = pcm_to_float(audio_data) if isinstance(audio_data, bytes) else audio_data
+        with STAGE_SECONDS.time(stage="mfcc"):
+            return mfcc_stream.push(y)
     except Exception as e:
         print(f"Error extracting MFCC features: {str(e)}")
         return np.zeros((1, 13))
 
 def extract_lip_distance(frame):
-    """Extract lip distance changes using MediaPipe from a video frame."""
+    """Extract lip distance from a raw camera frame using the shared lip tracker."""
     try:
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                top_lip = face_landmarks.landmark[13]
-                bottom_lip = face_landmarks.landmark[14]
-                return abs(top_lip.y - bottom_lip.y)
-        return 0.0
+        with STAGE_SECONDS.time(stage="facemesh"):
+            lip_distance = lip_tracker.process(frame)
+        return lip_distance if lip_distance is not None else 0.0
     except Exception as e:
         print(f"Error extracting lip features: {str(e)}")
         return 0.0
 
+def get_lstm_stream():
+    """The live session's stateful LSTM, built from the saved model's weights on first use."""
+    global lstm_stream
+    if lstm_stream is None:
+        lstm_stream = load_numpy_model().stream()
+    return lstm_stream
+
+def warm_up_model():
+    """Load the model used by the live loop before any device is opened."""
+    if STREAMING_INFERENCE:
+        get_lstm_stream().step(np.zeros(14, dtype=np.float32))
+    else:
+        get_predictor()
+
 def predict_speech_dysfunction(mfcc_features, lip_distance):
     """Predict speech dysfunction based on MFCC & lip motion features."""
     try:
         # Combine features for single frame
         combined_features = np.hstack((lip_distance, mfcc_features[0]))  # Shape: (14,)
-        
-        # Reshape to match model's expected input shape (None, 1, 14)
-        model_input = combined_features.reshape(-1, 1, 14)
-        
-        # Make prediction
-        predictions = model.predict(model_input)
-        
-        return "Stutter" if predictions[0] < 0.5 else "Lisp"
+
+        if STREAMING_INFERENCE:
+            # Advance the session's LSTM state by this frame only
+            with STAGE_SECONDS.time(stage="inference"):
+                predictions = get_lstm_stream().step(combined_features)[-1:]
+        else:
+            feature_window.append(combined_features)
+
+            # Predict on the most recent frames, the same window shape the model was trained on (1, T, 14)
+            model_input = np.array(feature_window).reshape(1, -1, 14)
+
+            # Make prediction with the cached, warmed-up model
+            with STAGE_SECONDS.time(stage="inference"):
+                predictions = get_predictor()(model_input)
+
+        condition = condition_for(predictions[0])
+        PREDICTIONS.inc(condition=condition)
+        aggregator.update(predictions[0])
+        return condition
     except Exception as e:
         print(f"Error in prediction: {str(e)}")
         return "Error: Could not complete analysis"
@@ -110,8 +188,27 @@ def generate_lesson_plan(condition):
     else:
         return "No clear condition detected. Try again with a clearer audio sample."
 
-def start_analysis():
-    """Runs real-time AI speech analysis."""
+def analyze_chunk(audio_data, frame):
+    """Run lip tracking, MFCC extraction and prediction for one aligned audio chunk and frame."""
+    # The lip tracker runs on every frame so its optical flow stays locked on through pauses
+    lip_distance = extract_lip_distance(frame)
+    y = pcm_to_float(audio_data)
+    if VAD_ENABLED and not detect_speech(y):
+        return None  # Silence: keep showing the last condition
+    mfcc_features = extract_mfcc(y)
+    if len(mfcc_features) == 0:
+        return None  # Not enough audio buffered for the first STFT frame yet
+    return predict_speech_dysfunction(mfcc_features[-1:], lip_distance)
+
+def start_analysis(drop_policy=DROP_OLDEST, stop_event=None, session_id=None):
+    """Runs real-time AI speech analysis until time runs out, 'Q' is pressed or `stop_event` is set.
+
+    Returns a dict with the final condition, lesson plan, capture stats, session summary and any error.
+    """
+    global aggregator
+    # Load and warm up the model before any device is opened
+    warm_up_model()
+
     # Initialize audio stream
     audio = pyaudio.PyAudio()
     stream = audio.open(format=FORMAT, channels=CHANNELS, 
@@ -122,37 +219,62 @@ def start_analysis():
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("Error: Could not open webcam.")
-        return
+        stream.close()
+        audio.terminate()
+        return {"condition": None, "lesson_plan": None, "error": "Could not open webcam."}
+
+    # Capture and inference run on their own threads; this thread only renders
+    engine = AnalysisEngine(
+        read_audio=lambda: stream.read(CHUNK, exception_on_overflow=True),
+        read_frame=cap.read,
+        analyze=analyze_chunk,
+        chunk_duration=CHUNK / RATE,
+        drop_policy=drop_policy,
+    )
 
+    mfcc_stream.reset()
+    feature_window.clear()
+    if STREAMING_INFERENCE:
+        get_lstm_stream().reset()
+    lip_tracker.reset()
+    reset_vad()
+    session_id = session_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    timeline_path = os.path.join(SESSION_FOLDER, f"{session_id}.timeline") if SESSION_TIMELINES else None
+    aggregator = SessionAggregator(timeline_path)
+    condition = "Unknown"
+    session = {"condition": None, "lesson_plan": None, "error": None}
     start_time = time.time()  # Track start time
+    reporter = instrumentation.SummaryReporter(METRICS_INTERVAL, title="Live analysis")
 
     try:
+        engine.start()
+        reporter.start()
+
         while True:
             elapsed_time = time.time() - start_time
             if elapsed_time > MAX_RUNTIME:
                 print("Session ended: Maximum time reached.")
                 break
 
-            # Capture video frame
-            ret, frame = cap.read()
-            if not ret:
-                print("Error: Failed to capture frame.")
+            if stop_event is not None and stop_event.is_set():
+                print("Session ended: Cancelled.")
                 break
 
-            # Display paragraph on the frame
-            frame = display_paragraph(frame)
-
-            # Extract lip distance
-            lip_distance = extract_lip_distance(frame)
-
-            # Capture audio data
-            audio_data = stream.read(CHUNK, exception_on_overflow=False)
+            if engine.error:
+                print(engine.error)
+                session["error"] = engine.error
+                break
 
-            # Extract MFCC features
-            mfcc_features = extract_mfcc(audio_data)
+            # Render the newest frame; the raw frame stays untouched for lip tracking
+            frame = engine.latest_frame()
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            render_started = time.perf_counter()
+            frame = display_paragraph(frame.copy())
 
-            # Predict speech dysfunction
-            condition = predict_speech_dysfunction(mfcc_features, lip_distance)
+            # Show the smoothed vote so a single noisy frame doesn't flip the label
+            condition = aggregator.current_condition() or condition
 
             # Display prediction on the frame
             cv2.putText(frame, f"Condition: {condition}", (50, 450),
@@ -164,24 +286,49 @@ def start_analysis():
 
             # Show the frame
             cv2.imshow("Reading Task", frame)
+            STAGE_SECONDS.observe(time.perf_counter() - render_started, stage="render")
 
             # Break the loop if 'q' is pressed
             if cv2.waitKey(1) & 0xFF == ord("q"):
                 break
 
+        engine.stop()
+        session["capture_stats"] = engine.stats()
+        session["lip_tracker_stats"] = lip_tracker.stats()
+        print(f"Capture stats: {session['capture_stats']}")
+        print(f"Lip tracker stats: {session['lip_tracker_stats']}")
+        if VAD_ENABLED:
+            session["vad_stats"] = vad.stats()
+            print(f"🔇 Voice activity gate skipped {session['vad_stats']['saved_fraction']:.0%} of chunks "
+                  f"({session['vad_stats']['skipped_chunks']}/{session['vad_stats']['chunks']})")
+        session["metrics"] = instrumentation.REGISTRY.summary_lines()
+
+        # The lesson plan follows the whole session's vote, not the last frame
+        session["summary"] = aggregator.close()
+        condition = session["summary"]["condition"] or condition
+        print(f"📊 Session: {condition} from {session['summary']['predictions']} predictions "
+              f"({session['summary']['votes']})")
+
         # Generate and print lesson plan at the end
         lesson_plan = generate_lesson_plan(condition)
         print(lesson_plan)
+        session.update(condition=condition, lesson_plan=lesson_plan)
 
     except Exception as e:
         print(f"Program error: {str(e)}")
+        session["error"] = str(e)
     finally:
+        aggregator.close()
+        reporter.stop()
+        engine.stop()
         stream.stop_stream()
         stream.close()
         audio.terminate()
         cap.release()
         cv2.destroyAllWindows()
 
+    return session
+
 # Prevent script from running automatically when imported
 if __name__ == "__main__":
     start_analysis()
\ No newline at end of file
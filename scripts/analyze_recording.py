@@ -0,0 +1,144 @@
+import argparse
+import json
+import time
+import cv2
+import numpy as np
+import os
+import sys
+
+# Run as `python -m scripts.analyze_recording` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.decode_stream import stream_features, stream_mfcc
+from scripts.extract_mfcc import N_MFCC, SAMPLE_RATE
+from scripts.feature_store import DEFAULT_VIDEO_FPS, FRAME_RATE, align_motion
+from scripts.lip_tracker import LipTracker
+from scripts.model_loader import BACKENDS, WINDOW_LENGTH, WINDOW_STRIDE, get_predictor
+from session_aggregator import condition_for, majority_condition
+
+# Windows scored per model call
+BATCH_SIZE = 512
+
+
+def track_lips(video_path, tracker=None):
+    """Lip distance for every frame of a video (0.0 where no face is found, like the live loop) and its fps."""
+    tracker = tracker or LipTracker()
+    tracker.reset()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_VIDEO_FPS
+
+    distances = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        lip_distance = tracker.process(frame)
+        distances.append(lip_distance if lip_distance is not None else 0.0)
+    cap.release()
+    return np.asarray(distances, dtype=np.float32), float(fps)
+
+
+def recording_features(video_path, audio_path=None, tracker=None):
+    """Combined (time, 14) lip distance + MFCC features on the MFCC frame timeline."""
+    if audio_path is None:
+        # One ffmpeg pass decodes both the audio and the frames
+        tracker = tracker or LipTracker()
+        mfcc, distances, fps, duration = stream_features(video_path, tracker, SAMPLE_RATE, N_MFCC)
+        motion = np.asarray([d if d is not None else 0.0 for d in distances], dtype=np.float32)
+    else:
+        mfcc, duration = stream_mfcc(audio_path, SAMPLE_RATE, N_MFCC)
+        motion, fps = track_lips(video_path, tracker)
+    if len(motion) == 0:
+        raise ValueError(f"No video frames read from {video_path}")
+
+    # The lip track is held past its last frame so the full audio is scored
+    length = len(mfcc)
+    lip = align_motion(motion, fps, length)
+    return np.hstack((lip[:, None], mfcc)), duration
+
+
+def predict_timeline(features, window=WINDOW_LENGTH, stride=WINDOW_STRIDE, batch_size=BATCH_SIZE,
+                     model_path=None, backend=None):
+    """Score every `window`-frame slice (every `stride` frames) in batches; returns starts and probabilities."""
+    if len(features) < window:
+        # Shorter than one window: score the whole recording as a single sequence
+        return np.zeros(1, dtype=np.int64), get_predictor(model_path, backend)(features[None])
+
+    # (n_windows, window, features) view over the feature rows; batches are copied as they're scored
+    windows = np.lib.stride_tricks.sliding_window_view(features, window, axis=0)[::stride].transpose(0, 2, 1)
+    starts = np.arange(len(windows), dtype=np.int64) * stride
+
+    predictor = get_predictor(model_path, backend)
+    probabilities = np.concatenate([
+        predictor(np.ascontiguousarray(windows[i:i + batch_size]))
+        for i in range(0, len(windows), batch_size)
+    ])
+    return starts, probabilities
+
+
+def analyze_recording(video_path, audio_path=None, window=WINDOW_LENGTH, stride=WINDOW_STRIDE,
+                      batch_size=BATCH_SIZE, model_path=None, backend=None, tracker=None):
+    """Run the live analysis pipeline over a recorded video (and optional separate audio) with no display."""
+    started = time.perf_counter()
+    features, duration = recording_features(video_path, audio_path, tracker)
+    starts, probabilities = predict_timeline(features, window, stride, batch_size, model_path, backend)
+    elapsed = time.perf_counter() - started
+
+    span = min(window, len(features))
+    timeline = [
+        {"start": round(start / FRAME_RATE, 3), "end": round((start + span) / FRAME_RATE, 3),
+         "probability": float(probability), "condition": condition_for(probability)}
+        for start, probability in zip(starts, probabilities)
+    ]
+    mean_probability = float(np.mean(probabilities))
+    stutter_votes = int(np.count_nonzero(probabilities < 0.5))
+    return {
+        "video": video_path,
+        "audio": audio_path,
+        "duration": duration,
+        "frames": len(features),
+        "window": window,
+        "stride": stride,
+        "condition": majority_condition([stutter_votes, len(probabilities) - stutter_votes], mean_probability),
+        "mean_probability": mean_probability,
+        "timeline": timeline,
+        "elapsed": elapsed,
+        "speedup": duration / elapsed if elapsed > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze recorded videos offline and write a prediction timeline.")
+    parser.add_argument("videos", nargs="+", help="Recorded video files")
+    parser.add_argument("--audio", help="Separate audio file (only with a single video)")
+    parser.add_argument("--window", type=int, default=WINDOW_LENGTH, help="Window length in MFCC frames")
+    parser.add_argument("--stride", type=int, default=WINDOW_STRIDE, help="Frames between window starts")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Windows per model call")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Inference backend (default: MODEL_BACKEND)")
+    parser.add_argument("--output", help="Write the results as JSON to this file instead of stdout")
+    args = parser.parse_args()
+    if args.audio and len(args.videos) > 1:
+        parser.error("--audio can only be used with a single video")
+
+    tracker = LipTracker()
+    results = []
+    for video in args.videos:
+        try:
+            result = analyze_recording(video, args.audio, args.window, args.stride, args.batch_size,
+                                       backend=args.backend, tracker=tracker)
+        except Exception as e:
+            print(f"Error analyzing {video}: {str(e)}")
+            results.append({"video": video, "error": str(e)})
+            continue
+        print(f"✅ {video}: {result['condition']} ({len(result['timeline'])} windows, "
+              f"{result['duration']:.1f}s in {result['elapsed']:.1f}s, {result['speedup']:.1f}x real time)")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,189 @@
+import os
+import subprocess
+import threading
+import cv2
+import ffmpeg
+import numpy as np
+from scripts.extract_mfcc import N_MFCC, SAMPLE_RATE
+from scripts.feature_store import DEFAULT_VIDEO_FPS
+from scripts.streaming_mfcc import StreamingMFCC
+
+# Audio samples read from ffmpeg per chunk (~1.5 s at 44.1 kHz, so each read is a few hundred KB)
+CHUNK_SAMPLES = 1 << 16
+
+
+def _drain(pipe, sink):
+    """Collect a pipe's output on a thread so ffmpeg never blocks on a full stderr buffer."""
+    sink.append(pipe.read())
+    pipe.close()
+
+
+class FFmpegDecoder:
+    """One ffmpeg process decoding a file's audio to mono float32 PCM on stdout, and optionally its video
+    to raw BGR frames on a second pipe, in a single pass over the input.
+
+    Use as a context manager; leaving it early stops ffmpeg. Frames must be read on a thread started
+    with `start_frame_reader`, so leaving the block can wait for it before closing the frame pipe.
+    """
+
+    def __init__(self, path, sr=SAMPLE_RATE, video=False):
+        self.path = path
+        self.sr = sr
+        self.video = video
+        self.width = self.height = None
+        self.fps = DEFAULT_VIDEO_FPS
+        self.process = None
+        self._frames = None
+        self._readers = []
+        self._stderr = []
+
+    def _probe_video(self):
+        # OpenCV reads the stream header only; the frames themselves come from ffmpeg
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {self.path}")
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = float(cap.get(cv2.CAP_PROP_FPS) or DEFAULT_VIDEO_FPS)
+        cap.release()
+
+    def __enter__(self):
+        stream = ffmpeg.input(self.path)
+        outputs = [stream.audio.output("pipe:1", format="f32le", ac=1, ar=self.sr)]
+        pass_fds = ()
+        if self.video:
+            self._probe_video()
+            read_fd, write_fd = os.pipe()
+            # The child inherits the write end under the same number, so ffmpeg can write to pipe:<fd>
+            outputs.append(stream.video.output(f"pipe:{write_fd}", format="rawvideo", pix_fmt="bgr24"))
+            pass_fds = (write_fd,)
+        args = ffmpeg.merge_outputs(*outputs).global_args("-nostdin", "-loglevel", "error").compile()
+
+        try:
+            self.process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds)
+        except BaseException:
+            if self.video:
+                os.close(read_fd)
+            raise
+        finally:
+            if self.video:
+                os.close(write_fd)  # Only ffmpeg holds the write end, so EOF arrives when it exits
+        if self.video:
+            self._frames = os.fdopen(read_fd, "rb")
+        threading.Thread(target=_drain, args=(self.process.stderr, self._stderr), daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+        # ffmpeg has exited, so frame readers see EOF; wait for them before closing the pipe under them
+        for reader in self._readers:
+            reader.join()
+        if self._frames is not None:
+            self._frames.close()
+        return False
+
+    def start_frame_reader(self, target):
+        """Run `target()` (which consumes `frames()`) on a thread that is joined when the block exits."""
+        reader = threading.Thread(target=target, daemon=True)
+        self._readers.append(reader)
+        reader.start()
+        return reader
+
+    def pcm_chunks(self, chunk_samples=CHUNK_SAMPLES):
+        """Yield float32 sample arrays of up to `chunk_samples` as ffmpeg decodes them."""
+        while True:
+            data = self.process.stdout.read(4 * chunk_samples)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32)
+
+    def frames(self):
+        """Yield decoded (height, width, 3) BGR frames; read these on a separate thread from the audio."""
+        frame_bytes = self.width * self.height * 3
+        while True:
+            data = self._frames.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def check(self):
+        """Wait for ffmpeg and raise ffmpeg.Error if it failed."""
+        self.process.wait()
+        if self.process.returncode != 0:
+            stderr = b"".join(self._stderr)
+            raise ffmpeg.Error("ffmpeg", None, stderr or f"exit status {self.process.returncode}".encode())
+
+
+class _MFCCAccumulator:
+    """Feeds PCM chunks to StreamingMFCC and keeps only log-mel frames (a quarter of the PCM's size).
+
+    The top_db floor needs the whole file's loudest bin, so the DCT is applied once at the end;
+    the result matches compute_mfcc on the full signal.
+    """
+
+    def __init__(self, sr, n_mfcc):
+        self.stream = StreamingMFCC(sr, n_mfcc=n_mfcc)
+        self.blocks = []
+        self.samples = 0
+
+    def push(self, samples):
+        self.samples += len(samples)
+        log_mel = self.stream.log_mel(samples)
+        if len(log_mel):
+            self.blocks.append(log_mel.astype(np.float32))
+
+    def finish(self):
+        self.push(np.zeros(self.stream.n_fft // 2, dtype=np.float32))  # librosa's centred padding
+        self.samples -= self.stream.n_fft // 2
+        if not self.blocks:
+            return np.empty((0, self.stream.n_mfcc), dtype=np.float32)
+        log_mel = np.vstack(self.blocks)
+        return self.stream.to_mfcc(log_mel, log_mel.max()).astype(np.float32)
+
+
+def stream_mfcc(path, sr=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """MFCCs (time, n_mfcc) of any file ffmpeg can read, decoded and resampled in one pass with no WAV.
+
+    Returns the MFCCs and the audio duration in seconds.
+    """
+    mfcc = _MFCCAccumulator(sr, n_mfcc)
+    with FFmpegDecoder(path, sr) as decoder:
+        for samples in decoder.pcm_chunks():
+            mfcc.push(samples)
+        decoder.check()
+    return mfcc.finish(), mfcc.samples / sr
+
+
+def stream_features(video_path, tracker, sr=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """MFCCs and per-frame lip distances from a single ffmpeg pass over a video.
+
+    Lip tracking runs on a second thread while the audio is consumed on this one, so neither pipe
+    stalls ffmpeg. Returns (mfcc, lip distances with None where no face was found, fps, duration).
+    """
+    tracker.reset()
+    mfcc = _MFCCAccumulator(sr, n_mfcc)
+    distances = []
+    errors = []
+
+    with FFmpegDecoder(video_path, sr, video=True) as decoder:
+        def track():
+            try:
+                for frame in decoder.frames():
+                    distances.append(tracker.process(frame))
+            except Exception as e:
+                errors.append(e)
+                for _ in decoder.frames():  # Keep draining so ffmpeg can finish the audio
+                    pass
+
+        tracker_thread = decoder.start_frame_reader(track)
+        for samples in decoder.pcm_chunks():
+            mfcc.push(samples)
+        tracker_thread.join()
+        decoder.check()
+
+    if errors:
+        raise errors[0]
+    return mfcc.finish(), distances, decoder.fps, mfcc.samples / sr
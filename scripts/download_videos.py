@@ -1,27 +1,230 @@
-import yt_dlp
+import argparse
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlparse
+import yt_dlp
+
+# Concurrent downloads; they're network-bound, so threads are enough
+DEFAULT_WORKERS = 4
+
+# Attempts per video and the base of the exponential backoff between them (seconds)
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 2.0
+
+MANIFEST_NAME = "manifest.json"
+
+# Errors that won't go away on a retry
+PERMANENT_ERRORS = ("Video unavailable", "Private video", "removed", "copyright", "Unsupported URL",
+                    "confirm your age", "HTTP Error 404", "HTTP Error 410")
 
 def read_links_from_file(file_path):
     with open(file_path, "r") as file:
-        return [line.strip() for line in file.readlines()]
+        return [line.strip() for line in file if line.strip()]
+
+def video_id_from_url(url):
+    """Extract the video ID from a YouTube URL (or the file name of a direct media link), or None."""
+    parsed = urlparse(url)
+    if parsed.hostname and parsed.hostname.endswith("youtu.be"):
+        return parsed.path.lstrip("/") or None
+    video_id = parse_qs(parsed.query).get("v", [None])[0]
+    if video_id or (parsed.hostname and "youtube" in parsed.hostname):
+        return video_id
+    # Direct links: yt-dlp's generic extractor uses the file name without its extension as the ID
+    return os.path.splitext(os.path.basename(parsed.path))[0] or None
+
+def find_downloaded(video_id, output_folder):
+    """Return the path of an already-downloaded, non-empty video with this ID, if any."""
+    for name in os.listdir(output_folder):
+        stem, ext = os.path.splitext(name)
+        path = f"{output_folder}/{name}"
+        if stem == video_id and ext not in (".part", ".ytdl") and os.path.getsize(path) > 0:
+            return path
+    return None
+
+def is_on_disk(entry):
+    """Whether a manifest entry's file still exists, is non-empty and has the size recorded at download."""
+    path = entry.get("path") if entry.get("status") == "downloaded" else None
+    if not path or not os.path.isfile(path):
+        return False
+    size = os.path.getsize(path)
+    return size > 0 and entry.get("size") in (None, size)
+
+def output_path(info):
+    """The file yt-dlp actually wrote, which differs from `id.ext` when formats are merged or remuxed."""
+    for download in info.get("requested_downloads") or []:
+        if download.get("filepath"):
+            return download["filepath"]
+    return info.get("filepath") or info.get("_filename")
+
+def is_transient(error):
+    message = str(error)
+    return not any(marker.lower() in message.lower() for marker in PERMANENT_ERRORS)
+
+def load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except ValueError:
+        print(f"⚠️ Ignoring unreadable manifest: {path}")
+        return {}
+
+def save_manifest(manifest, output_folder):
+    """Write the manifest atomically so an interrupted run never leaves it half-written."""
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+class DownloadManager:
+    """Downloads a list of links with bounded concurrency, resume, retries and a manifest of output paths.
 
-def download_videos(video_links, output_folder):
+    Each worker thread keeps one YoutubeDL instance for all of its downloads. Partial `.part` files
+    are resumed on the next attempt or run, and one failing link never stops the others.
+    """
+
+    def __init__(self, output_folder, workers=DEFAULT_WORKERS, max_attempts=MAX_ATTEMPTS,
+                 backoff=BACKOFF_SECONDS, ydl_opts=None):
+        self.output_folder = output_folder
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.ydl_opts = {
+            'format': 'bestvideo+bestaudio/best',
+            'outtmpl': f'{output_folder}/%(id)s.%(ext)s',
+            'continuedl': True,  # Resume .part files left by an interrupted download
+            'retries': 3,  # yt-dlp's own retries for dropped connections within one attempt
+            'fragment_retries': 3,
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+        }
+        self.ydl_opts.update(ydl_opts or {})
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.manifest = {}
+
+    def _ydl(self):
+        if getattr(self._local, "ydl", None) is None:
+            self._local.ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+        return self._local.ydl
+
+    def _record(self, key, entry):
+        with self._lock:
+            self.manifest[key] = entry
+            save_manifest(self.manifest, self.output_folder)
+
+    def _download(self, url):
+        """Download one link, retrying transient failures with jittered exponential backoff."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                info = self._ydl().extract_info(url, download=True)
+                return info, attempt
+            except Exception as e:
+                if attempt == self.max_attempts or not is_transient(e):
+                    raise
+                delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                print(f"⚠️ {url}: attempt {attempt} failed ({str(e).strip()}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _process(self, url, video_id):
+        started = time.time()
+        key = video_id or url
+        try:
+            info, attempts = self._download(url)
+        except Exception as e:
+            self._record(key, {"url": url, "status": "failed", "error": str(e).strip()})
+            raise
+        path = output_path(info) or find_downloaded(info["id"], self.output_folder)
+        entry = {"url": url, "status": "downloaded", "id": info["id"], "path": path, "attempts": attempts,
+                 "seconds": round(time.time() - started, 2),
+                 "size": os.path.getsize(path) if path and os.path.isfile(path) else None}
+        if key != info["id"]:
+            with self._lock:
+                self.manifest.pop(key, None)
+        self._record(info["id"], entry)
+        return path
+
+    def _pending(self, video_links):
+        """Links still to download, after dropping duplicates and videos already on disk.
+
+        A manifest entry only counts if its file is still there with the recorded size; otherwise the
+        video is looked up by ID on disk, and downloaded again when no complete file is found.
+        """
+        pending = {}
+        for url in video_links:
+            video_id = video_id_from_url(url)
+            key = video_id or url
+            if key in pending:
+                continue
+            entry = self.manifest.get(key, {})
+            if is_on_disk(entry):
+                continue
+            if entry.get("status") == "downloaded":
+                print(f"⚠️ {key}: {entry.get('path')} is missing or incomplete")
+                self.manifest.pop(key)
+                if entry.get("path") and os.path.isfile(entry["path"]):
+                    os.remove(entry["path"])  # yt-dlp would otherwise skip a file that's already there
+            existing = find_downloaded(video_id, self.output_folder) if video_id else None
+            if existing:
+                self.manifest[key] = {"url": url, "status": "downloaded", "id": video_id, "path": existing,
+                                      "size": os.path.getsize(existing)}
+                continue
+            pending[key] = (url, video_id)
+        return list(pending.values())
+
+    def run(self, video_links):
+        """Download every link; returns (paths of all videos on disk, links that failed)."""
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.manifest = load_manifest(self.output_folder)
+        pending = self._pending(video_links)
+        save_manifest(self.manifest, self.output_folder)
+
+        skipped = len(set(video_id_from_url(url) or url for url in video_links)) - len(pending)
+        if skipped:
+            print(f"Already downloaded: {skipped} video(s) in {self.output_folder}")
+
+        total = len(pending)
+        failed = []
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._process, url, video_id): url for url, video_id in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                url = futures[future]
+                try:
+                    path = future.result()
+                    print(f"[{done}/{total}] ✅ Downloaded: {path}")
+                except Exception as e:
+                    failed.append(url)
+                    print(f"[{done}/{total}] ❌ Failed: {url} ({str(e).strip()})")
+
+        if total:
+            print(f"Downloaded {total - len(failed)}/{total} videos in {time.time() - started:.1f}s "
+                  f"with {self.workers} worker(s).")
+        paths = [entry["path"] for entry in self.manifest.values() if is_on_disk(entry)]
+        return sorted(paths), failed
+
+def download_videos(video_links, output_folder, workers=DEFAULT_WORKERS):
     """Download multiple YouTube videos."""
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-
-    video_paths = []
-    for url in video_links:
-        ydl_opts = {'format': 'bestvideo+bestaudio/best', 'outtmpl': f'{output_folder}/%(id)s.%(ext)s'}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            video_paths.append(f"{output_folder}/{info['id']}.{info['ext']}")
-    
-    return video_paths
+    paths, failed = DownloadManager(output_folder, workers).run(video_links)
+    if failed:
+        print(f"⚠️ {len(failed)} video(s) failed; rerun to retry them")
+    return paths
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the training videos listed in the link files.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent downloads (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
     stuttering_links = read_links_from_file("stuttering_videos.txt")
     lisp_links = read_links_from_file("lisp_videos.txt")
-    
-    stuttering_videos = download_videos(stuttering_links, "data/videos/stuttering")
-    lisp_videos = download_videos(lisp_links, "data/videos/lisp")
\ No newline at end of file
+
+    stuttering_videos = download_videos(stuttering_links, "data/videos/stuttering", args.workers)
+    lisp_videos = download_videos(lisp_links, "data/videos/lisp", args.workers)
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+
+# Run as `python -m scripts.export_model` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.model_loader import (MODEL_FOLDER, MODEL_PATH, N_FEATURES, TFLITE_QUANTIZATIONS, get_predictor,
+                                  load_model, tflite_path)
+
+REPORT_PATH = os.path.join(MODEL_FOLDER, "export_report.json")
+
+# Windows scored per backend when measuring accuracy drift
+EVAL_WINDOWS = 2000
+LATENCY_CALLS = 300
+
+
+def export_tflite(quantization="float16", model_path=MODEL_PATH, output_path=None):
+    """Convert the Keras model to TFLite with a batch of 1 and a dynamic time axis.
+
+    float16 stores weights as half floats; int8 stores weights as 8-bit integers with dynamic-range
+    quantization (activations stay float, so no calibration data is needed).
+    """
+    import tensorflow as tf
+
+    if quantization not in TFLITE_QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization} (choose from {', '.join(TFLITE_QUANTIZATIONS)})")
+    output_path = output_path or tflite_path(quantization)
+
+    # Rebuild on a fixed batch of 1: the LSTM only lowers to TFLite ops with a static batch size
+    model = load_model(model_path)
+    inputs = tf.keras.Input(shape=(None, N_FEATURES), batch_size=1)
+    outputs = inputs
+    for layer in model.layers:
+        outputs = layer(outputs)
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.Model(inputs, outputs))
+    if quantization != "float32":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+
+    tflite_model = converter.convert()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    print(f"✅ Exported {quantization} TFLite model: {output_path} ({len(tflite_model) / 1024:.0f} KB)")
+    return output_path
+
+
+def evaluation_windows(window, stride, max_windows=EVAL_WINDOWS, seed=0):
+    """Held-out (windows, labels) from the feature store, or random windows without labels if there's no store."""
+    from scripts.feature_store import open_store
+    from scripts.sequence_dataset import split_videos, window_starts
+
+    rng = np.random.default_rng(seed)
+    try:
+        store = open_store()
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ No feature store ({str(e)}); measuring drift on random windows only")
+        return rng.normal(size=(min(max_windows, 256), window, N_FEATURES)).astype(np.float32), None
+
+    _, val_ids = split_videos(store)
+    starts, labels = window_starts(store, val_ids or store.video_ids, window, stride)
+    if len(starts) > max_windows:
+        chosen = np.sort(rng.choice(len(starts), max_windows, replace=False))
+        starts, labels = starts[chosen], labels[chosen]
+    windows = np.stack([store.features(start, start + window) for start in starts]).astype(np.float32)
+    return windows, labels
+
+
+def probe(backend, path, window, calls=LATENCY_CALLS):
+    """Load time, single-window latency and peak memory of one backend (run in a fresh process).
+
+    Nothing else is imported first, so a TFLite backend is measured without TensorFlow when the
+    standalone runtime is installed.
+    """
+    started = time.perf_counter()
+    predictor = get_predictor(path, backend)
+    load_seconds = time.perf_counter() - started
+
+    sample = np.random.default_rng(0).normal(size=(1, window, N_FEATURES)).astype(np.float32)
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        predictor(sample)
+        latencies.append(time.perf_counter() - started)
+    latencies = 1000.0 * np.asarray(latencies)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / 1024.0 if sys.platform != "darwin" else peak_rss / (1024.0 * 1024.0)
+    return {"load_seconds": load_seconds, "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)), "peak_rss_mb": peak_rss_mb}
+
+
+def compare(quantizations=TFLITE_QUANTIZATIONS, model_path=MODEL_PATH, report_path=REPORT_PATH):
+    """Export every quantization and report accuracy drift, latency and memory against the Keras model."""
+    from scripts.sequence_dataset import WINDOW_LENGTH, WINDOW_STRIDE
+
+    candidates = [("keras", "keras", model_path)]
+    for quantization in quantizations:
+        candidates.append((f"tflite-{quantization}", "tflite", export_tflite(quantization, model_path)))
+
+    windows, labels = evaluation_windows(WINDOW_LENGTH, WINDOW_STRIDE)
+    reference = get_predictor(model_path, "keras")(windows)
+
+    rows = []
+    for name, backend, path in candidates:
+        probabilities = get_predictor(path, backend)(windows)
+        drift = np.abs(probabilities - reference)
+        row = {
+            "backend": name,
+            "artifact": path,
+            "size_kb": os.path.getsize(path) / 1024.0,
+            "windows": len(windows),
+            "agreement": float(np.mean((probabilities >= 0.5) == (reference >= 0.5))),
+            "max_abs_drift": float(drift.max()),
+            "mean_abs_drift": float(drift.mean()),
+            "accuracy": float(np.mean((probabilities >= 0.5) == (labels >= 0.5))) if labels is not None else None,
+        }
+
+        # Latency and memory in a clean interpreter, so one backend's runtime doesn't inflate another's footprint
+        output = subprocess.run([sys.executable, "-m", "scripts.export_model", "--probe", backend, path,
+                                 str(WINDOW_LENGTH)],
+                                capture_output=True, text=True, check=True).stdout
+        row.update(json.loads(output.strip().splitlines()[-1]))
+        rows.append(row)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "window": WINDOW_LENGTH, "results": rows}
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'backend':<16}{'size KB':>9}{'accuracy':>10}{'agree':>8}{'max drift':>11}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+    for row in rows:
+        accuracy = f"{row['accuracy']:.4f}" if row["accuracy"] is not None else "-"
+        print(f"{row['backend']:<16}{row['size_kb']:>9.0f}{accuracy:>10}{row['agreement']:>8.4f}"
+              f"{row['max_abs_drift']:>11.2e}{row['p50_ms']:>9.3f}{row['p99_ms']:>9.3f}{row['peak_rss_mb']:>9.0f}")
+    print(f"Report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the speech dysfunction model for lightweight inference.")
+    parser.add_argument("--quantization", choices=TFLITE_QUANTIZATIONS, default="float16")
+    parser.add_argument("--compare", action="store_true",
+                        help="Export every quantization and compare it against the Keras model")
+    parser.add_argument("--probe", nargs=3, metavar=("BACKEND", "PATH", "WINDOW"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        backend, path, window = args.probe
+        print(json.dumps(probe(backend, path, int(window))))
+    elif args.compare:
+        compare()
+    else:
+        export_tflite(args.quantization)
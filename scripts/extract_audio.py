@@ -1,5 +1,15 @@
 import ffmpeg
 import os
+import sys
+
+# Run as `python -m scripts.extract_audio` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_cache import FeatureCache, run_cached
+from scripts.parallel_runner import run_jobs, worker_arg_parser
+
+# Parameters that affect the extracted audio; changing them invalidates cached outputs
+AUDIO_PARAMS = {"format": "wav"}
 
 def extract_audio(video_path, output_audio_path):
     """Extracts audio from a video file and saves it as WAV format."""
@@ -7,14 +17,15 @@ def extract_audio(video_path, output_audio_path):
         (
             ffmpeg
             .input(video_path)
-            .output(output_audio_path, format='wav')
+            .output(output_audio_path, format=AUDIO_PARAMS["format"])
             .run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
         )
         print(f"✅ Extracted: {video_path} → {output_audio_path}")
     except ffmpeg.Error as e:
         print(f"Error extracting audio from {video_path}: {e}")
+        raise  # Let the runner record this file as failed
 
-def process_videos(videos_folder, audio_folder):
+def process_videos(videos_folder, audio_folder, workers=1):
     """Processes all videos in a folder and extracts their audio."""
     if not os.path.exists(videos_folder):
         print(f"Warning: {videos_folder} does not exist. Skipping...")
@@ -22,21 +33,26 @@ def process_videos(videos_folder, audio_folder):
     
     os.makedirs(audio_folder, exist_ok=True)
 
+    jobs = []
     for video in os.listdir(videos_folder):
         if video.lower().endswith(('.mp4', '.mkv', '.avi', '.mov')):  # Ensure only video files are processed
             video_path = os.path.join(videos_folder, video)
             audio_path = os.path.join(audio_folder, os.path.splitext(video)[0] + ".wav")
-            
-            print(f"Extracting audio from: {video_path} → {audio_path}")
-            extract_audio(video_path, audio_path)
+            jobs.append((video_path, (video_path, audio_path)))
         else:
             print(f"Skipping non-video file: {video}")
 
+    print(f"Extracting audio from {len(jobs)} videos in {videos_folder} → {audio_folder}")
+    cache = FeatureCache("audio", AUDIO_PARAMS)
+    return run_cached(cache, lambda stale: run_jobs(extract_audio, stale, workers=workers), jobs, audio_folder)
+
 if __name__ == "__main__":
+    args = worker_arg_parser("Extract WAV audio from the downloaded videos.").parse_args()
+
     # Process Stuttering Videos
-    process_videos("data/videos/stuttering", "data/audio/stuttering")
+    process_videos("data/videos/stuttering", "data/audio/stuttering", workers=args.workers)
 
     # Process Lisp Videos
-    process_videos("data/videos/lisp", "data/audio/lisp")
+    process_videos("data/videos/lisp", "data/audio/lisp", workers=args.workers)
 
     print("Audio extraction complete for both stuttering and lisp videos.")
@@ -1,30 +1,128 @@
 import librosa
 import numpy as np
 import os
+import sys
+
+# Run as `python -m scripts.extract_mfcc` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_cache import FeatureCache, run_cached
+from scripts.parallel_runner import run_jobs, worker_arg_parser
+from scripts.streaming_mfcc import HOP_LENGTH, N_FFT, compute_mfcc
+from scripts.vad import VAD_PARAMS, speech_mask
+
+SAMPLE_RATE = 44100
+N_MFCC = 13
+
+# Parameters that affect the MFCC features; changing them invalidates cached outputs
+MFCC_PARAMS = {"sr": SAMPLE_RATE, "n_mfcc": N_MFCC, "n_fft": N_FFT, "hop_length": HOP_LENGTH}
+
+# Per-frame speech masks from the live loop's voice activity detector, used to trim silence from training data
+VAD_FOLDER = "data/features/vad"
+SPEECH_MASK_PARAMS = {"sr": SAMPLE_RATE, "hop_length": HOP_LENGTH, **VAD_PARAMS}
 
 def extract_mfcc(audio_path, output_path):
     """Extracts MFCC features from an audio file and saves them as a NumPy file."""
-    y, sr = librosa.load(audio_path, sr=44100)
-    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-    np.save(output_path, mfccs.T)  # Save as (time, features) numpy array
+    y, sr = librosa.load(audio_path, sr=SAMPLE_RATE)
+    mfccs = compute_mfcc(y, sr, n_mfcc=N_MFCC)  # Same extractor as the live path
+    np.save(output_path, mfccs)  # Save as (time, features) numpy array
+
+def extract_mfcc_from_video(video_path, output_path):
+    """Extracts MFCC features straight from a video's audio track in one ffmpeg pass, with no WAV on disk."""
+    from scripts.decode_stream import stream_mfcc
+
+    mfccs, _ = stream_mfcc(video_path, SAMPLE_RATE, N_MFCC)
+    np.save(output_path, mfccs)
+
+def extract_speech_mask(source_path, output_path):
+    """Saves a boolean speech mask on the MFCC frame timeline for a WAV file or a video's audio track."""
+    if source_path.endswith(".wav"):
+        y, _ = librosa.load(source_path, sr=SAMPLE_RATE)
+    else:
+        from scripts.decode_stream import FFmpegDecoder
+
+        with FFmpegDecoder(source_path, SAMPLE_RATE) as decoder:
+            chunks = list(decoder.pcm_chunks())
+            decoder.check()
+        y = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    mask = speech_mask(y, SAMPLE_RATE, HOP_LENGTH)
+    np.save(output_path, mask)
+    print(f"✅ Speech mask: {output_path} ({mask.mean():.0%} speech)")
 
-def process_audio_files(audio_folder, mfcc_folder):
+def process_speech_masks(source_folder, vad_folder, extensions=(".wav",), workers=1):
+    """Writes a speech mask for every WAV (or video) file in a folder."""
+    if not os.path.exists(source_folder):
+        print(f"Warning: {source_folder} does not exist. Skipping...")
+        return
+    os.makedirs(vad_folder, exist_ok=True)
+
+    jobs = []
+    for name in os.listdir(source_folder):
+        if name.lower().endswith(extensions):
+            source_path = os.path.join(source_folder, name)
+            mask_path = os.path.join(vad_folder, os.path.splitext(name)[0] + ".npy")
+            jobs.append((source_path, (source_path, mask_path)))
+
+    print(f"Detecting speech in {len(jobs)} files in {source_folder} → {vad_folder}")
+    cache = FeatureCache("vad", SPEECH_MASK_PARAMS)
+    return run_cached(cache, lambda stale: run_jobs(extract_speech_mask, stale, workers=workers), jobs, vad_folder)
+
+def process_audio_files(audio_folder, mfcc_folder, workers=1):
     """Processes all audio files in a folder and extracts MFCCs."""
     os.makedirs(mfcc_folder, exist_ok=True)
 
+    jobs = []
     for audio in os.listdir(audio_folder):
         if audio.endswith(".wav"):  # Ensure we process only WAV files
             audio_path = os.path.join(audio_folder, audio)
             mfcc_path = os.path.join(mfcc_folder, os.path.splitext(audio)[0] + ".npy")
+            jobs.append((audio_path, (audio_path, mfcc_path)))
 
-            print(f"Extracting MFCC from: {audio_path} → {mfcc_path}")
-            extract_mfcc(audio_path, mfcc_path)
+    print(f"Extracting MFCC from {len(jobs)} files in {audio_folder} → {mfcc_folder}")
+    cache = FeatureCache("mfcc", MFCC_PARAMS)
+    return run_cached(cache, lambda stale: run_jobs(extract_mfcc, stale, workers=workers), jobs, mfcc_folder)
+
+def process_videos(videos_folder, mfcc_folder, workers=1):
+    """Extracts MFCCs directly from all videos in a folder, skipping the intermediate WAV files."""
+    if not os.path.exists(videos_folder):
+        print(f"Warning: {videos_folder} does not exist. Skipping...")
+        return
+    os.makedirs(mfcc_folder, exist_ok=True)
+
+    jobs = []
+    for video in os.listdir(videos_folder):
+        if video.lower().endswith(('.mp4', '.mkv', '.avi', '.mov', '.webm')):
+            video_path = os.path.join(videos_folder, video)
+            mfcc_path = os.path.join(mfcc_folder, os.path.splitext(video)[0] + ".npy")
+            jobs.append((video_path, (video_path, mfcc_path)))
+
+    print(f"Extracting MFCC from {len(jobs)} videos in {videos_folder} → {mfcc_folder}")
+    cache = FeatureCache("mfcc", MFCC_PARAMS)
+    return run_cached(cache, lambda stale: run_jobs(extract_mfcc_from_video, stale, workers=workers), jobs, mfcc_folder)
 
 if __name__ == "__main__":
-    # Process Stuttering Audio
-    process_audio_files("data/audio/stuttering", "data/features/mfcc/stuttering")
+    parser = worker_arg_parser("Extract MFCC features from the extracted audio.")
+    parser.add_argument("--from-videos", action="store_true",
+                        help="Decode the videos' audio directly instead of reading extracted WAV files")
+    parser.add_argument("--vad", action="store_true",
+                        help=f"Also write speech masks to {VAD_FOLDER} for trimming silence in the feature store")
+    args = parser.parse_args()
+
+    if args.from_videos:
+        process_videos("data/videos/stuttering", "data/features/mfcc/stuttering", workers=args.workers)
+        process_videos("data/videos/lisp", "data/features/mfcc/lisp", workers=args.workers)
+    else:
+        # Process Stuttering Audio
+        process_audio_files("data/audio/stuttering", "data/features/mfcc/stuttering", workers=args.workers)
+
+        # Process Lisp Audio
+        process_audio_files("data/audio/lisp", "data/features/mfcc/lisp", workers=args.workers)
 
-    # Process Lisp Audio
-    process_audio_files("data/audio/lisp", "data/features/mfcc/lisp")
+    if args.vad:
+        source_folder = "data/videos" if args.from_videos else "data/audio"
+        extensions = ('.mp4', '.mkv', '.avi', '.mov', '.webm') if args.from_videos else (".wav",)
+        for category in ("stuttering", "lisp"):
+            process_speech_masks(os.path.join(source_folder, category), os.path.join(VAD_FOLDER, category),
+                                 extensions, workers=args.workers)
 
-    print("MFCC extraction complete for both stuttering and lisp audio files.")
\ No newline at end of file
+    print("MFCC extraction complete for both stuttering and lisp audio files.")
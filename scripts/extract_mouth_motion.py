@@ -1,20 +1,33 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import os
+import sys
 
-# Initialize MediaPipe FaceMesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+# Run as `python -m scripts.extract_mouth_motion` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def get_lip_distance(landmarks):
-    """Calculate vertical distance between upper and lower lip landmarks."""
-    upper_lip = np.array([landmarks[13].x, landmarks[13].y])
-    lower_lip = np.array([landmarks[14].x, landmarks[14].y])
-    return np.linalg.norm(upper_lip - lower_lip)
+from scripts.feature_cache import FeatureCache, run_cached
+from scripts.lip_tracker import FACE_MESH_PARAMS, TRACKER_PARAMS, LipTracker
+from scripts.parallel_runner import run_jobs, worker_arg_parser
+
+# Lip distance recorded for frames without a face, as in the live loop; keeps one sample per video frame
+# so the track stays aligned with the audio
+NO_FACE_DISTANCE = 0.0
+
+# Lip tracker (and its FaceMesh), created once per process; instances must not be shared across processes
+lip_tracker = None
+
+def init_lip_tracker():
+    """Create this process's lip tracker."""
+    global lip_tracker
+    if lip_tracker is None:
+        lip_tracker = LipTracker()
+    return lip_tracker
 
 def extract_mouth_motion(video_path, output_path, visualize=True):
-    """Extracts lip motion data from a video and saves it as a .npy file. Optionally visualizes the landmarks."""
+    """Extracts lip motion data (one value per frame) from a video and saves it as a .npy file. Optionally visualizes the landmarks."""
+    tracker = init_lip_tracker()
+    tracker.reset()
     cap = cv2.VideoCapture(video_path)
     mouth_motion_data = []
 
@@ -23,22 +36,17 @@ def extract_mouth_motion(video_path, output_path, visualize=True):
         if not ret:
             break
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_mesh.process(frame_rgb)
-
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                lip_distance = get_lip_distance(face_landmarks.landmark)
-                mouth_motion_data.append(lip_distance)
-
-                if visualize:
-                    for idx in [13, 14]:  # Upper and lower lip landmarks
-                        x, y = int(face_landmarks.landmark[idx].x * frame.shape[1]), int(face_landmarks.landmark[idx].y * frame.shape[0])
-                        cv2.circle(frame, (x, y), 3, (0, 255, 0), -1)  # Draw green circles on lips
-                    
-                    cv2.putText(frame, f"Lip Distance: {lip_distance:.2f}", (10, 30), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA)
-                
+        # Same tracker as the live loop, so offline and live lip features match
+        lip_distance = tracker.process(frame)
+        mouth_motion_data.append(lip_distance if lip_distance is not None else NO_FACE_DISTANCE)
+
+        if lip_distance is not None and visualize:
+            for x, y in tracker.lip_points():  # Upper and lower lip landmarks
+                cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)  # Draw green circles on lips
+
+            cv2.putText(frame, f"Lip Distance: {lip_distance:.2f}", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2, cv2.LINE_AA)
+
         if visualize:
             cv2.imshow("Mouth Motion Detection", frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):  # Press 'q' to stop visualization
@@ -48,26 +56,45 @@ def extract_mouth_motion(video_path, output_path, visualize=True):
     if visualize:
         cv2.destroyAllWindows()
 
-    np.save(output_path, mouth_motion_data)  # Save as numpy file
-    print(f"Saved mouth motion data: {output_path}")
+    np.save(output_path, np.asarray(mouth_motion_data, dtype=np.float32))  # Save as numpy file
+    stats = tracker.stats()
+    print(f"Saved mouth motion data: {output_path} "
+          f"({stats['mean_cost_ms']:.1f} ms/frame, {stats['detection_rate']:.0%} full detections)")
 
-def process_videos(videos_folder, output_folder, visualize=True):
+def process_videos(videos_folder, output_folder, visualize=True, workers=1):
     """Processes all videos in a folder and extracts mouth motion data with optional visualization."""
     os.makedirs(output_folder, exist_ok=True)
 
+    if visualize and workers > 1:
+        print("Visualization needs a single worker; running headless.")
+        visualize = False
+
+    jobs = []
     for video in os.listdir(videos_folder):
         if video.endswith(".mp4"):  # Ensure only video files are processed
             video_path = os.path.join(videos_folder, video)
             output_path = os.path.join(output_folder, os.path.splitext(video)[0] + ".npy")
+            jobs.append((video_path, (video_path, output_path, visualize)))
 
-            print(f"Processing video: {video_path}")
-            extract_mouth_motion(video_path, output_path, visualize=visualize)
+    print(f"Processing {len(jobs)} videos in {videos_folder}")
+    cache = FeatureCache("mouth_motion", {**FACE_MESH_PARAMS, **TRACKER_PARAMS,
+                                         "no_face_distance": NO_FACE_DISTANCE})
+    run = lambda stale: run_jobs(extract_mouth_motion, stale, workers=workers, initializer=init_lip_tracker)
+    return run_cached(cache, run, jobs, output_folder)
 
 if __name__ == "__main__":
+    parser = worker_arg_parser("Extract lip motion features from the downloaded videos.")
+    parser.add_argument("--no-visualize", action="store_true",
+                        help="Run headless without the landmark preview window")
+    args = parser.parse_args()
+    visualize = not args.no_visualize
+
     # Process Stuttering Videos with Visualization
-    process_videos("data/videos/stuttering", "data/features/mouth_motion/stuttering", visualize=True)
+    process_videos("data/videos/stuttering", "data/features/mouth_motion/stuttering",
+                   visualize=visualize, workers=args.workers)
 
     # Process Lisp Videos with Visualization
-    process_videos("data/videos/lisp", "data/features/mouth_motion/lisp", visualize=True)
+    process_videos("data/videos/lisp", "data/features/mouth_motion/lisp",
+                   visualize=visualize, workers=args.workers)
 
-    print("Mouth motion extraction complete for both stuttering and lisp videos.")
\ No newline at end of file
+    print("Mouth motion extraction complete for both stuttering and lisp videos.")
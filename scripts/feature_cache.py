@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+# One manifest per pipeline stage, so stages can run concurrently without clobbering each other
+MANIFEST_FOLDER = "data/manifests"
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_hash(params):
+    """Stable hash of a JSON-serialisable parameter dict."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FeatureCache:
+    """Manifest of built artifacts keyed on the source file's content hash and the extraction parameters.
+
+    Source hashes are reused while a file's size and mtime are unchanged, so checking an unchanged
+    corpus only costs a `stat` per file.
+    """
+
+    def __init__(self, stage, params, manifest_folder=MANIFEST_FOLDER):
+        self.stage = stage
+        self.params = params
+        self.params_hash = params_hash(params)
+        self.path = os.path.join(manifest_folder, f"{stage}.json")
+        self.entries = {}
+        self._hashes = {}  # (source, size, mtime_ns) -> sha256 computed during this run
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.entries = json.load(f).get("entries", {})
+
+    def _source_state(self, source, entry=None):
+        stat = os.stat(source)
+        state = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        key = (source, state["size"], state["mtime_ns"])
+        if entry and entry.get("size") == state["size"] and entry.get("mtime_ns") == state["mtime_ns"]:
+            state["sha256"] = entry["sha256"]
+        else:
+            if key not in self._hashes:
+                self._hashes[key] = file_hash(source)
+            state["sha256"] = self._hashes[key]
+        return state
+
+    def is_fresh(self, source, output):
+        """True if `output` exists and was built from the current contents of `source` with these params."""
+        entry = self.entries.get(output)
+        if entry is None or not os.path.exists(output) or entry.get("source") != source:
+            return False
+        if entry.get("params_hash") != self.params_hash:
+            return False
+        return self._source_state(source, entry)["sha256"] == entry["sha256"]
+
+    def stale(self, jobs):
+        """Filter (name, args) jobs down to the ones whose output (args[1]) is missing or out of date."""
+        return [job for job in jobs if not self.is_fresh(job[1][0], job[1][1])]
+
+    def record(self, source, output):
+        """Record that `output` was built from `source`."""
+        entry = self._source_state(source, self.entries.get(output))
+        entry.update({"source": source, "params_hash": self.params_hash})
+        self.entries[output] = entry
+
+    def prune(self, output_folder=None):
+        """Delete tracked outputs whose source is gone. Returns the removed output paths."""
+        removed = []
+        for output, entry in list(self.entries.items()):
+            if output_folder and os.path.normpath(os.path.dirname(output)) != os.path.normpath(output_folder):
+                continue
+            if not os.path.exists(entry["source"]):
+                if os.path.exists(output):
+                    os.remove(output)
+                del self.entries[output]
+                removed.append(output)
+                print(f"🗑️ Removed stale output: {output}")
+        return removed
+
+    def save(self):
+        """Write the manifest atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"stage": self.stage, "params": self.params, "entries": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def run_cached(cache, run, jobs, output_folder):
+    """Prune orphaned outputs, run `run(stale_jobs)` and record the jobs that succeeded.
+
+    `jobs` are (name, (source, output, ...)) tuples and `run` returns the names of failed jobs.
+    """
+    cache.prune(output_folder)
+    stale_jobs = cache.stale(jobs)
+    print(f"{len(jobs) - len(stale_jobs)}/{len(jobs)} outputs up to date in {output_folder}")
+
+    failed = run(stale_jobs) if stale_jobs else []
+    for name, args in stale_jobs:
+        if name not in failed:
+            cache.record(args[0], args[1])
+    cache.save()
+    return failed
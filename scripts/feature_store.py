@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import cv2
+import numpy as np
+import sys
+
+# Run as `python -m scripts.feature_store` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.extract_mfcc import MFCC_PARAMS, VAD_FOLDER
+
+STORE_FOLDER = "data/features/store"
+MOTION_FOLDER = "data/features/mouth_motion"
+MFCC_FOLDER = "data/features/mfcc"
+VIDEOS_FOLDER = "data/videos"
+
+# Class label for each dataset category
+LABELS = {"stuttering": 0, "lisp": 1}
+
+# Every feature kind is stored on the MFCC frame timeline
+FRAME_RATE = MFCC_PARAMS["sr"] / MFCC_PARAMS["hop_length"]
+DEFAULT_VIDEO_FPS = 30.0
+
+
+def video_fps(category, video_id, videos_folder=VIDEOS_FOLDER):
+    """Frame rate of the source video, falling back to DEFAULT_VIDEO_FPS when it can't be read."""
+    folder = os.path.join(videos_folder, category)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            if os.path.splitext(name)[0] == video_id:
+                cap = cv2.VideoCapture(os.path.join(folder, name))
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                cap.release()
+                if fps and fps > 0:
+                    return float(fps)
+    return DEFAULT_VIDEO_FPS
+
+
+def aligned_length(n_motion, fps, n_mfcc_frames, frame_rate=FRAME_RATE):
+    """Number of MFCC frames covered by both the lip motion track and the audio."""
+    motion_duration = (n_motion - 1) / fps
+    return min(n_mfcc_frames, int(np.floor(motion_duration * frame_rate)) + 1)
+
+
+def align_motion(motion, fps, length, frame_rate=FRAME_RATE):
+    """Resample a lip motion track recorded at `fps` onto the first `length` MFCC frame times."""
+    source_times = np.arange(len(motion)) / fps
+    target_times = np.arange(length) / frame_rate
+    return np.interp(target_times, source_times, motion).astype(np.float32)
+
+
+def _scan(motion_folder, mfcc_folder, videos_folder):
+    """Pair motion and MFCC files by video ID and work out each video's aligned length."""
+    entries = []
+    seen = set()
+    for category, label in LABELS.items():
+        motion_dir = os.path.join(motion_folder, category)
+        mfcc_dir = os.path.join(mfcc_folder, category)
+        if not os.path.isdir(motion_dir) or not os.path.isdir(mfcc_dir):
+            print(f"⚠️ Warning: Missing feature folders for {category}")
+            continue
+
+        motion_ids = {os.path.splitext(f)[0] for f in os.listdir(motion_dir) if f.endswith(".npy")}
+        mfcc_ids = {os.path.splitext(f)[0] for f in os.listdir(mfcc_dir) if f.endswith(".npy")}
+        for video_id in sorted(motion_ids ^ mfcc_ids):
+            print(f"Skipping {category}/{video_id}: missing motion or MFCC features")
+
+        for video_id in sorted(motion_ids & mfcc_ids):
+            if video_id in seen:
+                print(f"Skipping {category}/{video_id}: video ID already used by another category")
+                continue
+            motion_path = os.path.join(motion_dir, video_id + ".npy")
+            mfcc_path = os.path.join(mfcc_dir, video_id + ".npy")
+            motion = np.load(motion_path, mmap_mode="r")
+            mfcc = np.load(mfcc_path, mmap_mode="r")
+            if motion.ndim != 1 or mfcc.ndim != 2 or len(motion) < 2 or len(mfcc) < 1:
+                print(f"Skipping invalid file: Motion {motion.shape}, MFCC {mfcc.shape}")
+                continue
+
+            fps = video_fps(category, video_id, videos_folder)
+            length = aligned_length(len(motion), fps, len(mfcc))
+            seen.add(video_id)
+            entries.append({
+                "video_id": video_id, "category": category, "label": label, "fps": fps,
+                "length": length, "n_mfcc": mfcc.shape[1],
+                "motion_path": motion_path, "mfcc_path": mfcc_path,
+            })
+    return entries
+
+
+def source_state(motion_folder, mfcc_folder, vad_folder=None):
+    """Size and mtime of every per-video feature file a store is built from, keyed by kind/category/file."""
+    folders = {"motion": motion_folder, "mfcc": mfcc_folder}
+    if vad_folder:
+        folders["vad"] = vad_folder
+    state = {}
+    for kind, folder in folders.items():
+        for category in LABELS:
+            directory = os.path.join(folder, category)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".npy"):
+                    stat = os.stat(os.path.join(directory, name))
+                    state[f"{kind}/{category}/{name}"] = [stat.st_size, stat.st_mtime_ns]
+    return state
+
+
+def _speech_rows(entries, vad_folder):
+    """Aligned row indices to keep for each video: its speech frames, or every frame when it has no mask."""
+    keep = {}
+    for entry in entries:
+        mask_path = os.path.join(vad_folder, entry["category"], entry["video_id"] + ".npy")
+        if not os.path.exists(mask_path):
+            print(f"⚠️ No speech mask for {entry['category']}/{entry['video_id']}; keeping silence")
+            continue
+        mask = np.load(mask_path)[:entry["length"]]
+        keep[entry["video_id"]] = np.flatnonzero(mask)
+    return keep
+
+
+def build_store(store_folder=STORE_FOLDER, motion_folder=MOTION_FOLDER, mfcc_folder=MFCC_FOLDER,
+                videos_folder=VIDEOS_FOLDER, trim_silence=False, vad_folder=VAD_FOLDER):
+    """Consolidate the per-video .npy files into one memory-mapped array per feature kind.
+
+    Videos are processed one at a time, so peak memory is one video's features regardless of corpus size.
+    With `trim_silence`, frames outside the speech masks written by `extract_mfcc --vad` are dropped
+    after the lip track is aligned, so both feature kinds lose the same frames.
+    """
+    # Taken before reading, so a file rewritten mid-build makes the store stale rather than silently mixed
+    sources = {"motion_folder": motion_folder, "mfcc_folder": mfcc_folder, "videos_folder": videos_folder,
+               "vad_folder": vad_folder if trim_silence else None}
+    source_files = source_state(motion_folder, mfcc_folder, sources["vad_folder"])
+    entries = _scan(motion_folder, mfcc_folder, videos_folder)
+    if not entries:
+        raise ValueError("No training data found! Ensure feature extraction scripts have been run.")
+
+    keep = _speech_rows(entries, vad_folder) if trim_silence else {}
+    aligned_frames = sum(entry["length"] for entry in entries)
+    for entry in entries:
+        if entry["video_id"] in keep:
+            entry["length"], entry["aligned_length"] = len(keep[entry["video_id"]]), entry["length"]
+
+    n_mfcc = entries[0]["n_mfcc"]
+    total = sum(entry["length"] for entry in entries)
+    os.makedirs(store_folder, exist_ok=True)
+
+    lip = np.lib.format.open_memmap(os.path.join(store_folder, "lip_distance.npy"), mode="w+",
+                                    dtype=np.float32, shape=(total,))
+    mfcc = np.lib.format.open_memmap(os.path.join(store_folder, "mfcc.npy"), mode="w+",
+                                     dtype=np.float32, shape=(total, n_mfcc))
+
+    videos = {}
+    offset = 0
+    for entry in entries:
+        length = entry["length"]
+        aligned_length = entry.get("aligned_length", length)
+        rows = keep.get(entry["video_id"], slice(None))
+        motion = np.load(entry["motion_path"])
+        lip[offset:offset + length] = align_motion(motion, entry["fps"], aligned_length)[rows]
+        mfcc[offset:offset + length] = np.load(entry["mfcc_path"], mmap_mode="r")[:aligned_length][rows]
+        videos[entry["video_id"]] = {
+            "category": entry["category"], "label": entry["label"], "fps": entry["fps"],
+            "offset": offset, "length": length,
+        }
+        offset += length
+
+    lip.flush()
+    mfcc.flush()
+    del lip, mfcc
+
+    index = {"frame_rate": FRAME_RATE, "n_frames": total, "n_mfcc": n_mfcc, "trim_silence": trim_silence,
+             "mfcc_params": MFCC_PARAMS, "sources": sources, "source_files": source_files, "videos": videos}
+    with open(os.path.join(store_folder, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+
+    print(f"✅ Feature store built: {len(videos)} videos, {total} frames → {store_folder}")
+    if trim_silence:
+        print(f"Trimmed silence: kept {total}/{aligned_frames} frames ({total / max(aligned_frames, 1):.0%})")
+    return FeatureStore(store_folder)
+
+
+class FeatureStore:
+    """Read-only view of the consolidated feature arrays; slices are memory-mapped, never copied."""
+
+    def __init__(self, store_folder=STORE_FOLDER):
+        index_path = os.path.join(store_folder, "index.json")
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(
+                f"No feature store at {store_folder}. Build it with `python -m scripts.feature_store`.")
+        index = _read_index(store_folder)
+        self.folder = store_folder
+        self.frame_rate = index["frame_rate"]
+        self.n_mfcc = index["n_mfcc"]
+        self.videos = index["videos"]
+        self.lip_distance = np.load(os.path.join(store_folder, "lip_distance.npy"), mmap_mode="r")
+        self.mfcc = np.load(os.path.join(store_folder, "mfcc.npy"), mmap_mode="r")
+
+    @property
+    def n_features(self):
+        return 1 + self.n_mfcc
+
+    def __len__(self):
+        return len(self.videos)
+
+    @property
+    def video_ids(self):
+        return list(self.videos)
+
+    def label(self, video_id):
+        return self.videos[video_id]["label"]
+
+    def frame_range(self, video_id):
+        """(start, stop) rows of this video in the feature arrays."""
+        entry = self.videos[video_id]
+        return entry["offset"], entry["offset"] + entry["length"]
+
+    def get(self, video_id):
+        """Memory-mapped (lip_distance, mfcc) views for one video."""
+        start, stop = self.frame_range(video_id)
+        return self.lip_distance[start:stop], self.mfcc[start:stop]
+
+    def features(self, start, stop):
+        """Combined (stop - start, 1 + n_mfcc) feature rows; only this slice is read into memory."""
+        return np.hstack((self.lip_distance[start:stop, None], self.mfcc[start:stop]))
+
+
+def _read_index(store_folder):
+    with open(os.path.join(store_folder, "index.json"), "r") as f:
+        return json.load(f)
+
+
+def stale_reason(index, trim_silence=None):
+    """Why a store with this index no longer matches its source files and settings, or None if it does."""
+    if "source_files" not in index:
+        return "it predates source tracking"
+    if index.get("mfcc_params") != MFCC_PARAMS:
+        return "MFCC parameters changed"
+    if trim_silence is not None and index["trim_silence"] != trim_silence:
+        return "it was built with --trim-silence" if index["trim_silence"] else "it was built without --trim-silence"
+    sources = index["sources"]
+    state = source_state(sources["motion_folder"], sources["mfcc_folder"], sources["vad_folder"])
+    if not state:
+        return None  # Only the store was copied here; nothing to compare it with
+    recorded = index["source_files"]
+    changed = sorted(name for name in state.keys() | recorded.keys() if state.get(name) != recorded.get(name))
+    if changed:
+        return f"{len(changed)} source feature file(s) changed, e.g. {changed[0]}"
+    return None
+
+
+def open_store(store_folder=STORE_FOLDER, trim_silence=None):
+    """Open the feature store, building it from the per-video files if it doesn't exist yet.
+
+    A store whose source files, MFCC parameters or silence trimming no longer match is rebuilt from the
+    same folders. `trim_silence=None` keeps whatever the existing store was built with.
+    """
+    if not os.path.exists(os.path.join(store_folder, "index.json")):
+        return build_store(store_folder, trim_silence=bool(trim_silence))
+    index = _read_index(store_folder)
+    reason = stale_reason(index, trim_silence)
+    if reason is None:
+        return FeatureStore(store_folder)
+
+    print(f"⚠️ Feature store at {store_folder} is out of date ({reason}); rebuilding")
+    sources = index.get("sources", {})
+    if trim_silence is None:
+        trim_silence = index.get("trim_silence", False)
+    return build_store(store_folder, motion_folder=sources.get("motion_folder", MOTION_FOLDER),
+                       mfcc_folder=sources.get("mfcc_folder", MFCC_FOLDER),
+                       videos_folder=sources.get("videos_folder", VIDEOS_FOLDER), trim_silence=trim_silence,
+                       vad_folder=sources.get("vad_folder") or VAD_FOLDER)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the consolidated feature store from the per-video features.")
+    parser.add_argument("--trim-silence", action="store_true",
+                        help=f"Drop non-speech frames using the masks in {VAD_FOLDER} (see extract_mfcc --vad)")
+    args = parser.parse_args()
+    build_store(trim_silence=args.trim_silence)
@@ -0,0 +1,134 @@
+import time
+import cv2
+import mediapipe as mp
+import numpy as np
+
+# FaceMesh settings shared by the offline extractor and the live loop
+FACE_MESH_PARAMS = {"min_detection_confidence": 0.5, "min_tracking_confidence": 0.5}
+
+# Upper/lower inner lip, used for the distance
+UPPER_LIP, LOWER_LIP = 13, 14
+# Lip landmarks tracked between detections; the outer points give optical flow more texture
+MOUTH_LANDMARKS = (UPPER_LIP, LOWER_LIP, 0, 17, 61, 291, 78, 308)
+
+# Default tracker settings; changing them changes the extracted features
+TRACKER_PARAMS = {"detect_every": 10, "roi_scale": 0.5, "roi_margin": 0.6, "max_flow_error": 20.0}
+
+_LK_PARAMS = {
+    "winSize": (15, 15),
+    "maxLevel": 2,
+    "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+}
+
+
+def create_face_mesh():
+    return mp.solutions.face_mesh.FaceMesh(**FACE_MESH_PARAMS)
+
+
+class LipTracker:
+    """Lip distance from full FaceMesh detection every `detect_every` frames, optical flow in between.
+
+    Between detections only the mouth region is cropped, downsampled by `roi_scale` and tracked with
+    pyramidal Lucas-Kanade. A fresh detection runs as soon as any tracked point is lost or its flow
+    error exceeds `max_flow_error`. Distances are in FaceMesh's normalised image coordinates.
+    """
+
+    def __init__(self, face_mesh=None, detect_every=TRACKER_PARAMS["detect_every"],
+                 roi_scale=TRACKER_PARAMS["roi_scale"], roi_margin=TRACKER_PARAMS["roi_margin"],
+                 max_flow_error=TRACKER_PARAMS["max_flow_error"]):
+        self.face_mesh = face_mesh or create_face_mesh()
+        self.detect_every = detect_every
+        self.roi_scale = roi_scale
+        self.roi_margin = roi_margin
+        self.max_flow_error = max_flow_error
+        self.reset()
+
+    def reset(self):
+        """Forget the tracked mouth and the cost counters (e.g. at a video or session boundary)."""
+        self._forget()
+        self.frames = 0
+        self.detections = 0
+        self.total_cost = 0.0
+        self.last_cost = 0.0
+
+    def _forget(self):
+        self.points = None  # Pixel coordinates of MOUTH_LANDMARKS in the full frame
+        self._roi = None
+        self._prev_roi = None
+        self._since_detection = 0
+
+    def _detect(self, frame):
+        self.detections += 1
+        height, width = frame.shape[:2]
+        results = self.face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.multi_face_landmarks:
+            self._forget()
+            return None
+
+        landmarks = results.multi_face_landmarks[0].landmark
+        self.points = np.array([[landmarks[i].x * width, landmarks[i].y * height] for i in MOUTH_LANDMARKS],
+                               dtype=np.float32)
+
+        # Mouth bounding box, padded so the lips can move without leaving the crop
+        (x0, y0), (x1, y1) = self.points.min(axis=0), self.points.max(axis=0)
+        pad = self.roi_margin * max(x1 - x0, y1 - y0)
+        x0, y0 = max(int(x0 - pad), 0), max(int(y0 - pad), 0)
+        x1, y1 = min(int(x1 + pad) + 1, width), min(int(y1 + pad) + 1, height)
+        self._roi = (x0, y0, x1, y1)
+        self._prev_roi = self._crop(frame)
+        self._since_detection = 0
+        return self.points
+
+    def _crop(self, frame):
+        x0, y0, x1, y1 = self._roi
+        gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        if self.roi_scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.roi_scale, fy=self.roi_scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _track(self, frame):
+        x0, y0 = self._roi[:2]
+        roi = self._crop(frame)
+        prev_points = ((self.points - (x0, y0)) * self.roi_scale).reshape(-1, 1, 2).astype(np.float32)
+        next_points, status, error = cv2.calcOpticalFlowPyrLK(self._prev_roi, roi, prev_points, None, **_LK_PARAMS)
+        if next_points is None or not status.all() or error.max() > self.max_flow_error:
+            return None  # Tracking confidence dropped; caller falls back to detection
+
+        self.points = next_points.reshape(-1, 2) / self.roi_scale + (x0, y0)
+        self._prev_roi = roi
+        self._since_detection += 1
+        return self.points
+
+    def process(self, frame):
+        """Lip distance for this frame, or None when no face is found."""
+        started = time.perf_counter()
+        points = None
+        if self.points is not None and self._since_detection < self.detect_every - 1:
+            points = self._track(frame)
+        if points is None:
+            points = self._detect(frame)
+
+        distance = None
+        if points is not None:
+            height, width = frame.shape[:2]
+            upper, lower = points[0], points[1]
+            distance = float(np.hypot((upper[0] - lower[0]) / width, (upper[1] - lower[1]) / height))
+
+        self.last_cost = time.perf_counter() - started
+        self.total_cost += self.last_cost
+        self.frames += 1
+        return distance
+
+    def lip_points(self):
+        """Pixel coordinates of the upper and lower lip, for visualisation."""
+        return None if self.points is None else self.points[:2]
+
+    def stats(self):
+        """Per-frame cost and how often full detection ran."""
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "detection_rate": self.detections / self.frames if self.frames else 0.0,
+            "mean_cost_ms": 1000.0 * self.total_cost / self.frames if self.frames else 0.0,
+            "last_cost_ms": 1000.0 * self.last_cost,
+        }
@@ -0,0 +1,159 @@
+import os
+import threading
+import numpy as np
+
+# Saved model artifacts: the Keras model written by scripts/train_model.py, and the
+# TFLite exports written by scripts/export_model.py
+MODEL_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "model")
+MODEL_PATH = os.path.join(MODEL_FOLDER, "speech_dysfunction_model.h5")
+
+# Lip distance + 13 MFCCs per time step
+N_FEATURES = 14
+
+# Default sliding-window geometry, in MFCC frames (~11.6 ms each at 44.1 kHz / hop 512); kept here, with
+# no TensorFlow import, so inference paths that use another backend never load TF
+WINDOW_LENGTH = 32
+WINDOW_STRIDE = 8
+
+TFLITE_QUANTIZATIONS = ("float32", "float16", "int8")
+
+# Inference backend used when callers don't pick one: "keras" (full TensorFlow), "tflite" or "numpy"
+DEFAULT_BACKEND = os.environ.get("MODEL_BACKEND", "keras")
+DEFAULT_TFLITE_QUANTIZATION = os.environ.get("MODEL_TFLITE_QUANTIZATION", "float16")
+
+# In-process registry so every caller shares one loaded model and one warmed-up predictor
+_lock = threading.Lock()
+_models = {}
+_predictors = {}
+
+
+def tflite_path(quantization=DEFAULT_TFLITE_QUANTIZATION):
+    return os.path.join(MODEL_FOLDER, f"speech_dysfunction_model.{quantization}.tflite")
+
+
+def load_model(path=MODEL_PATH):
+    """Load the saved Keras model once per process and return the cached instance."""
+    import tensorflow as tf
+
+    path = os.path.abspath(path)
+    with _lock:
+        if path not in _models:
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Model not found at {path}. Train it first with `python -m scripts.train_model`.")
+            _models[path] = tf.keras.models.load_model(path, compile=False)
+            print(f"✅ Loaded model: {path}")
+        return _models[path]
+
+
+def load_numpy_model(path=MODEL_PATH):
+    """Load the saved model's weights into the NumPy LSTM once per process (no TensorFlow needed)."""
+    from scripts.streaming_lstm import NumpyLSTM
+
+    key = ("numpy", os.path.abspath(path))
+    with _lock:
+        if key not in _models:
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"Model not found at {path}. Train it first with `python -m scripts.train_model`.")
+            _models[key] = NumpyLSTM(path)
+            print(f"✅ Loaded NumPy model: {path}")
+        return _models[key]
+
+
+def _keras_predictor(path):
+    import tensorflow as tf
+
+    model = load_model(path)
+
+    # Trace once with a dynamic batch/time signature so per-call cost is a graph execution,
+    # not the setup that model.predict() repeats on every call
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, None, N_FEATURES), dtype=tf.float32)])
+    def infer(x):
+        return model(x, training=False)
+
+    return lambda features: infer(features).numpy().reshape(-1)
+
+
+def _tflite_interpreter(path):
+    try:
+        from ai_edge_litert.interpreter import Interpreter  # Standalone runtime, no TensorFlow needed
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=1)
+
+
+def _tflite_predictor(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"TFLite model not found at {path}. Export it with `python -m scripts.export_model`.")
+    interpreter = _tflite_interpreter(path)
+    input_index = interpreter.get_input_details()[0]["index"]
+    output_index = interpreter.get_output_details()[0]["index"]
+    interpreter.allocate_tensors()
+    shape = [tuple(interpreter.get_input_details()[0]["shape"])]
+    interpreter_lock = threading.Lock()  # Interpreters are not thread-safe
+    print(f"✅ Loaded TFLite model: {path}")
+
+    def infer(features):
+        # The export has a batch of 1 and a dynamic time axis; resize only when the window length changes
+        outputs = np.empty(len(features), dtype=np.float32)
+        with interpreter_lock:
+            for i, sample in enumerate(features):
+                sample_shape = (1,) + sample.shape
+                if sample_shape != shape[0]:
+                    interpreter.resize_tensor_input(input_index, sample_shape)
+                    interpreter.allocate_tensors()
+                    shape[0] = sample_shape
+                interpreter.set_tensor(input_index, sample[None])
+                interpreter.invoke()
+                outputs[i] = interpreter.get_tensor(output_index).reshape(-1)[0]
+        return outputs
+
+    return infer
+
+
+# name -> (predictor factory taking a model path, default model path)
+BACKENDS = {
+    "keras": (_keras_predictor, lambda: MODEL_PATH),
+    "tflite": (_tflite_predictor, lambda: tflite_path()),
+    "numpy": (lambda path: load_numpy_model(path).predict, lambda: MODEL_PATH),
+}
+
+
+def get_predictor(path=None, backend=None):
+    """Return a warmed-up function mapping a (batch, time_steps, 14) array to class probabilities.
+
+    `backend` defaults to the MODEL_BACKEND environment variable and `path` to that backend's artifact.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend} (choose from {', '.join(BACKENDS)})")
+    factory, default_path = BACKENDS[backend]
+    path = os.path.abspath(path or default_path())
+    key = (backend, path)
+    with _lock:
+        predictor = _predictors.get(key)
+    if predictor is not None:
+        return predictor
+
+    infer = factory(path)
+
+    def predictor(features):
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim < 3:
+            features = features.reshape(-1, 1, N_FEATURES)  # One time step per sample
+        return infer(features)
+
+    predictor(np.zeros((1, 1, N_FEATURES), dtype=np.float32))  # Warm-up trace
+
+    with _lock:
+        _predictors.setdefault(key, predictor)
+        return _predictors[key]
+
+
+def clear_cache():
+    """Drop all cached models and predictors (e.g. after retraining)."""
+    with _lock:
+        _models.clear()
+        _predictors.clear()
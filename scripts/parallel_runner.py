@@ -0,0 +1,64 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def worker_arg_parser(description):
+    """Argument parser with the --workers option shared by the extraction scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of worker processes (default: {DEFAULT_WORKERS})")
+    return parser
+
+
+def _run_job(func, args):
+    """Run one job and return an error message instead of raising, so one bad file never stops the run."""
+    try:
+        func(*args)
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {str(e)}"
+
+
+def run_jobs(func, jobs, workers=1, initializer=None, initargs=()):
+    """Run `func(*args)` for every (name, args) job, in worker processes when `workers` > 1.
+
+    Every process calls `initializer(*initargs)` once before its first job, so per-process state
+    such as a FaceMesh instance is never shared. Returns the names of the jobs that failed.
+    """
+    jobs = sorted(jobs, key=lambda job: job[0])
+    total = len(jobs)
+    failed = []
+    if not jobs:
+        return failed
+
+    started = time.time()
+
+    def report(done, name, error):
+        if error:
+            failed.append(name)
+            print(f"[{done}/{total}] ❌ Failed: {name} ({error})")
+        else:
+            print(f"[{done}/{total}] ✅ Done: {name}")
+
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for done, (name, args) in enumerate(jobs, start=1):
+            report(done, name, _run_job(func, args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(_run_job, func, args): name for name, args in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    error = future.result()
+                except Exception as e:  # The worker process itself died
+                    error = f"{type(e).__name__}: {str(e)}"
+                report(done, futures[future], error)
+
+    print(f"Processed {total - len(failed)}/{total} files in {time.time() - started:.1f}s "
+          f"with {max(workers, 1)} worker(s).")
+    return failed
@@ -0,0 +1,84 @@
+import numpy as np
+from scripts.model_loader import WINDOW_LENGTH, WINDOW_STRIDE
+
+
+def split_videos(store, validation_split=0.2, seed=0):
+    """Split the store's video IDs into train/validation sets per video, stratified by label."""
+    rng = np.random.default_rng(seed)
+    train_ids, val_ids = [], []
+    for label in sorted({store.label(video_id) for video_id in store.video_ids}):
+        ids = sorted(video_id for video_id in store.video_ids if store.label(video_id) == label)
+        rng.shuffle(ids)
+        n_val = int(round(len(ids) * validation_split))
+        if validation_split > 0 and len(ids) > 1:
+            n_val = max(n_val, 1)
+        val_ids.extend(ids[:n_val])
+        train_ids.extend(ids[n_val:])
+    return train_ids, val_ids
+
+
+def kfold_videos(store, k=5, seed=0):
+    """Split the store's video IDs into `k` (train_ids, val_ids) folds per video, stratified by label.
+
+    Every video is in exactly one validation fold.
+    """
+    rng = np.random.default_rng(seed)
+    folds = [[] for _ in range(k)]
+    for label in sorted({store.label(video_id) for video_id in store.video_ids}):
+        ids = sorted(video_id for video_id in store.video_ids if store.label(video_id) == label)
+        if len(ids) < k:
+            print(f"⚠️ Only {len(ids)} videos with label {label}; some folds won't validate on it")
+        rng.shuffle(ids)
+        offset = int(rng.integers(k))  # Spread each label's remainder over different folds
+        for i, video_id in enumerate(ids):
+            folds[(i + offset) % k].append(video_id)
+    return [([video_id for j, fold in enumerate(folds) if j != i for video_id in fold], folds[i])
+            for i in range(k)]
+
+
+def window_starts(store, video_ids, window=WINDOW_LENGTH, stride=WINDOW_STRIDE):
+    """Global start rows and labels of every window that fits entirely inside one video."""
+    starts, labels = [], []
+    for video_id in video_ids:
+        start, stop = store.frame_range(video_id)
+        video_starts = np.arange(start, stop - window + 1, stride, dtype=np.int64)
+        starts.append(video_starts)
+        labels.append(np.full(len(video_starts), store.label(video_id), dtype=np.float32))
+    if not starts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return np.concatenate(starts), np.concatenate(labels)
+
+
+def make_dataset(store, video_ids, window=WINDOW_LENGTH, stride=WINDOW_STRIDE, batch_size=256,
+                 shuffle=True, shuffle_buffer=100000, seed=None):
+    """Stream (batch, window, features) windows over the given videos as a tf.data pipeline.
+
+    Only window start indices are held in memory; each batch is gathered from the memory-mapped
+    store by a parallel map, and batches are prefetched while the model trains.
+    """
+    import tensorflow as tf  # Imported here so window helpers stay usable without TensorFlow
+
+    starts, labels = window_starts(store, video_ids, window, stride)
+    if len(starts) == 0:
+        raise ValueError(f"No windows of length {window} found; videos may be shorter than the window.")
+
+    offsets = np.arange(window, dtype=np.int64)
+    n_features = store.n_features
+
+    def gather(batch_starts):
+        rows = batch_starts[:, None] + offsets  # (batch, window) row indices
+        return np.concatenate(
+            (store.lip_distance[rows][..., None], store.mfcc[rows]), axis=-1).astype(np.float32)
+
+    def load(batch_starts, batch_labels):
+        X = tf.numpy_function(gather, [batch_starts], tf.float32)
+        X.set_shape([None, window, n_features])
+        return X, batch_labels
+
+    dataset = tf.data.Dataset.from_tensor_slices((starts, labels))
+    if shuffle:
+        dataset = dataset.shuffle(min(shuffle_buffer, len(starts)), seed=seed, reshuffle_each_iteration=True)
+    # Batch the indices first so each map call gathers a whole batch with one vectorised read
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,155 @@
+import json
+import numpy as np
+
+_ACTIVATIONS = {
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 0.5 * (np.tanh(0.5 * x) + 1.0),  # Overflow-free logistic
+    "hard_sigmoid": lambda x: np.clip(x / 6.0 + 0.5, 0.0, 1.0),
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+}
+
+
+def _activation(name):
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return _ACTIVATIONS[name]
+
+
+def _h5_layer_weights(group):
+    """{'kernel': ..., 'recurrent_kernel': ..., 'bias': ...} from a layer's weight group in a Keras .h5 file."""
+    weights = {}
+
+    def visit(name, obj):
+        if hasattr(obj, "shape"):
+            weights[name.rsplit("/", 1)[-1].split(":")[0]] = np.asarray(obj, dtype=np.float32)
+
+    group.visititems(visit)
+    return weights
+
+
+def load_layers(path):
+    """Layer configs and weights of a saved Sequential LSTM/Dense model, read with h5py (no TensorFlow)."""
+    try:
+        import h5py
+    except ImportError:
+        return _keras_layers(path)
+
+    with h5py.File(path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        layers = []
+        for layer in config["config"]["layers"]:
+            name = layer["config"]["name"]
+            weights = _h5_layer_weights(f["model_weights"][name]) if name in f["model_weights"] else {}
+            layers.append((layer["class_name"], layer["config"], weights))
+    return layers
+
+
+def _keras_layers(path):
+    from scripts.model_loader import load_model
+
+    layers = []
+    for layer in load_model(path).layers:
+        names = [w.path.rsplit("/", 1)[-1] if hasattr(w, "path") else w.name.split(":")[0] for w in layer.weights]
+        weights = {name: np.asarray(w, dtype=np.float32) for name, w in zip(names, layer.get_weights())}
+        layers.append((layer.__class__.__name__, layer.get_config(), weights))
+    return layers
+
+
+class _LSTMCell:
+    def __init__(self, config, weights):
+        self.units = config["units"]
+        self.kernel = weights["kernel"]
+        self.recurrent_kernel = weights["recurrent_kernel"]
+        self.bias = weights.get("bias", np.zeros(4 * self.units, dtype=np.float32))
+        self.activation = _activation(config.get("activation", "tanh"))
+        self.recurrent_activation = _activation(config.get("recurrent_activation", "sigmoid"))
+        self.return_sequences = config.get("return_sequences", False)
+
+    def step(self, x_proj, h, c):
+        """One time step given the precomputed input projection x @ kernel + bias. Gate order is i, f, c, o."""
+        z = x_proj + h @ self.recurrent_kernel
+        u = self.units
+        i = self.recurrent_activation(z[:, :u])
+        f = self.recurrent_activation(z[:, u:2 * u])
+        o = self.recurrent_activation(z[:, 3 * u:])
+        c = f * c + i * self.activation(z[:, 2 * u:3 * u])
+        return o * self.activation(c), c
+
+
+class NumpyLSTM:
+    """NumPy forward pass of the trained LSTM → LSTM → Dense stack, loaded from the Keras .h5 file.
+
+    `predict` scores whole sequences from a zero state, matching the Keras model. `stream()` returns a
+    StreamingLSTM that carries the recurrent state across calls.
+    """
+
+    def __init__(self, path):
+        self.cells = []
+        self.dense = []
+        for class_name, config, weights in load_layers(path):
+            if class_name == "LSTM":
+                if self.dense:
+                    raise ValueError("LSTM layers after Dense layers are not supported")
+                self.cells.append(_LSTMCell(config, weights))
+            elif class_name == "Dense":
+                activation = _activation(config.get("activation", "linear"))
+                self.dense.append((weights["kernel"], weights.get("bias", 0.0), activation))
+            elif class_name not in ("InputLayer", "Dropout"):
+                raise ValueError(f"Unsupported layer for the NumPy model: {class_name}")
+        if not self.cells or self.cells[-1].return_sequences:
+            raise ValueError("Expected an LSTM stack whose last LSTM returns only its final state")
+        self.n_features = self.cells[0].kernel.shape[0]
+
+    def initial_state(self, batch=1):
+        return [(np.zeros((batch, cell.units), dtype=np.float32), np.zeros((batch, cell.units), dtype=np.float32))
+                for cell in self.cells]
+
+    def run(self, x, state):
+        """Advance (batch, steps, features) inputs from `state`; returns the new state and per-step outputs."""
+        outputs = x
+        new_state = []
+        for cell, (h, c) in zip(self.cells, state):
+            # The input projection for every step is one matrix multiply; only the recurrence is sequential
+            projected = outputs @ cell.kernel + cell.bias
+            hidden = np.empty(projected.shape[:2] + (cell.units,), dtype=np.float32)
+            for t in range(projected.shape[1]):
+                h, c = cell.step(projected[:, t], h, c)
+                hidden[:, t] = h
+            new_state.append((h, c))
+            outputs = hidden
+        return new_state, outputs
+
+    def head(self, h):
+        for kernel, bias, activation in self.dense:
+            h = activation(h @ kernel + bias)
+        return h.reshape(h.shape[0], -1)[:, 0]
+
+    def predict(self, x):
+        """Class probabilities for (batch, time_steps, features) sequences, each from a zero state."""
+        x = np.asarray(x, dtype=np.float32)
+        state, _ = self.run(x, self.initial_state(len(x)))
+        return self.head(state[-1][0])
+
+    def stream(self):
+        return StreamingLSTM(self)
+
+
+class StreamingLSTM:
+    """Stateful per-frame inference: each call advances the recurrent state by one or more steps."""
+
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        """Start from a zero state (e.g. at a session boundary)."""
+        self.state = self.model.initial_state(1)
+        self.steps = 0
+
+    def step(self, features):
+        """Advance by one (features,) vector or a (steps, features) micro-batch; returns each step's probability."""
+        x = np.asarray(features, dtype=np.float32).reshape(1, -1, self.model.n_features)
+        self.state, outputs = self.model.run(x, self.state)
+        self.steps += x.shape[1]
+        return self.model.head(outputs[0])
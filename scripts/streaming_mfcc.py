@@ -0,0 +1,112 @@
+import functools
+import librosa
+import numpy as np
+
+# Defaults mirror librosa.feature.mfcc / melspectrogram so offline and live features agree
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+AMIN = 1e-10
+
+# Maximum absolute difference from librosa.feature.mfcc on the same signal (float32 rounding)
+MFCC_TOLERANCE = 1e-3
+
+# Number of frames transformed per block when processing a whole signal
+_BLOCK_FRAMES = 1024
+
+
+@functools.lru_cache(maxsize=8)
+def _get_bases(sr, n_fft, n_mfcc, n_mels):
+    """Build the analysis window, mel filterbank and orthonormal DCT-II matrix once per configuration."""
+    window = librosa.filters.get_window("hann", n_fft, fftbins=True)
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+
+    k = np.arange(n_mfcc)[:, None]
+    n = np.arange(n_mels)[None, :]
+    dct = np.sqrt(2.0 / n_mels) * np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels))
+    dct[0] /= np.sqrt(2.0)
+
+    for matrix in (window, mel_basis, dct):
+        matrix.setflags(write=False)
+    return window, mel_basis, dct
+
+
+class StreamingMFCC:
+    """Stateful MFCC extractor that keeps the STFT overlap between chunks and emits only new frames.
+
+    Frames are identical to `librosa.feature.mfcc(y=..., sr=sr, n_mfcc=n_mfcc)` computed on the
+    concatenated signal (within MFCC_TOLERANCE). The only exception is the `top_db` floor, which
+    librosa takes relative to the loudest bin of the whole signal; a stream can only use the
+    loudest bin seen so far, so early frames may differ when the signal's dynamic range exceeds
+    `top_db`. Use `compute_mfcc` for whole files.
+    """
+
+    def __init__(self, sr, n_mfcc=13, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS, top_db=TOP_DB):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.top_db = top_db
+        self.window, self.mel_basis, self.dct = _get_bases(sr, n_fft, n_mfcc, n_mels)
+        self.reset()
+
+    def reset(self):
+        """Start a new signal (librosa's centred framing pads the start with n_fft // 2 zeros)."""
+        self._buffer = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._max_db = -np.inf
+
+    def log_mel(self, samples):
+        """Append samples and return the unclamped log-mel frames (n_frames, n_mels) they complete."""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        self._buffer = np.concatenate((self._buffer, samples))
+
+        if len(self._buffer) < self.n_fft:
+            return np.empty((0, self.mel_basis.shape[0]))
+
+        n_frames = 1 + (len(self._buffer) - self.n_fft) // self.hop_length
+        blocks = []
+        for start in range(0, n_frames, _BLOCK_FRAMES):
+            count = min(_BLOCK_FRAMES, n_frames - start)
+            offset = start * self.hop_length
+            segment = self._buffer[offset:offset + (count - 1) * self.hop_length + self.n_fft]
+            frames = np.lib.stride_tricks.sliding_window_view(segment, self.n_fft)[::self.hop_length]
+            power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+            mel = power @ self.mel_basis.T
+            blocks.append(10.0 * np.log10(np.maximum(AMIN, mel)))
+
+        # Keep only the overlap needed by the next frame
+        self._buffer = self._buffer[n_frames * self.hop_length:]
+        return np.vstack(blocks)
+
+    def to_mfcc(self, log_mel, max_db):
+        """Apply the top_db floor relative to `max_db` and project onto the DCT basis."""
+        if self.top_db is not None:
+            log_mel = np.maximum(log_mel, max_db - self.top_db)
+        return log_mel @ self.dct.T
+
+    def push(self, samples):
+        """Feed a chunk of audio and return the new MFCC frames it completes, shape (n_frames, n_mfcc)."""
+        log_mel = self.log_mel(samples)
+        if len(log_mel) == 0:
+            return np.empty((0, self.n_mfcc))
+        self._max_db = max(self._max_db, log_mel.max())
+        return self.to_mfcc(log_mel, self._max_db)
+
+    def flush(self):
+        """Pad the end of the signal like librosa, return the remaining frames and reset the stream."""
+        frames = self.push(np.zeros(self.n_fft // 2, dtype=np.float32))
+        self.reset()
+        return frames
+
+
+def compute_mfcc(y, sr, n_mfcc=13, **kwargs):
+    """Compute MFCCs for a whole signal, shape (time, n_mfcc); matches librosa.feature.mfcc(...).T."""
+    stream = StreamingMFCC(sr, n_mfcc=n_mfcc, **kwargs)
+    log_mel = np.vstack([
+        stream.log_mel(y),
+        stream.log_mel(np.zeros(stream.n_fft // 2, dtype=np.float32)),
+    ])
+    if len(log_mel) == 0:
+        return np.empty((0, n_mfcc))
+    return stream.to_mfcc(log_mel, log_mel.max())
@@ -1,103 +1,71 @@
-import numpy as np
-import tensorflow as tf
+import argparse
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 import os
-
-def load_features(feature_folder):
-    """Load all .npy files from a feature folder."""
-    files = [f for f in os.listdir(feature_folder) if f.endswith('.npy')]
-    if not files:
-        print(f"⚠️ Warning: No feature files found in {feature_folder}")
-        return []
-    return [np.load(os.path.join(feature_folder, f)) for f in files]
-
-# Load features for both categories
-X_stuttering_motion = load_features("data/features/mouth_motion/stuttering")
-X_stuttering_mfcc = load_features("data/features/mfcc/stuttering")
-X_lisp_motion = load_features("data/features/mouth_motion/lisp")
-X_lisp_mfcc = load_features("data/features/mfcc/lisp")
-
-# Ensure all feature sets are aligned in time steps
-X_stuttering = []
-X_lisp = []
-y_stuttering = []
-y_lisp = []
-
-for motion, mfcc in zip(X_stuttering_motion, X_stuttering_mfcc):
-    if len(motion.shape) < 1 or len(mfcc.shape) < 2:  # Ensure valid shapes
-        print(f"Skipping invalid file: Motion {motion.shape}, MFCC {mfcc.shape}")
-        continue
-    min_length = min(len(motion), mfcc.shape[0])
-
-    motion = motion[:min_length].reshape(-1, 1)  # Reshape to (time_steps, 1)
-    mfcc = mfcc[:min_length]  # Trim to min_length
-
-    stacked_features = np.hstack((motion, mfcc))  # Correct stacking
-    X_stuttering.append(stacked_features)
-
-    # Expand labels to match sequence length
-    y_stuttering.extend([0] * min_length)  # Label 0 for each time step
-
-for motion, mfcc in zip(X_lisp_motion, X_lisp_mfcc):
-    if len(motion.shape) < 1 or len(mfcc.shape) < 2:  # Ensure valid shapes
-        print(f"Skipping invalid file: Motion {motion.shape}, MFCC {mfcc.shape}")
-        continue
-    min_length = min(len(motion), mfcc.shape[0])
-
-    motion = motion[:min_length].reshape(-1, 1)  # Reshape to (time_steps, 1)
-    mfcc = mfcc[:min_length]  # Trim to min_length
-
-    stacked_features = np.hstack((motion, mfcc))  # Correct stacking
-    X_lisp.append(stacked_features)
-
-    # Expand labels to match sequence length
-    y_lisp.extend([1] * min_length)  # Label 1 for each time step
-
-# Ensure there's data before training
-if not X_stuttering and not X_lisp:
-    raise ValueError("No training data found! Ensure feature extraction scripts have been run.")
-
-# Stack both categories into training data
-X_train = np.vstack(X_stuttering + X_lisp)
-y_train = np.array(y_stuttering + y_lisp)  # Convert to NumPy array
-
-# Debugging Output
-print(f"Final X_train shape: {X_train.shape}")  # Should be (total_samples, time_steps)
-print(f"Final y_train shape: {y_train.shape}")  # Should match X_train (total_samples,)
-
-# Ensure the shapes match
-assert X_train.shape[0] == y_train.shape[0], "Error: X_train and y_train must have the same number of samples!"
-
-# Ensure X_train is 3D for LSTM
-X_train = np.array(X_train, dtype=np.float32)
-
-# Final reshape
-X_train = X_train.reshape(X_train.shape[0], 1, X_train.shape[1])  # Reshape for LSTM
-
-print(f"X_train shape after reshaping: {X_train.shape}")  # Should be (samples, time_steps, features)
-
-# Define LSTM Model
-model = Sequential([
-    LSTM(64, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])),
-    Dropout(0.2),
-    LSTM(32),
-    Dense(16, activation='relu'),
-    Dense(1, activation='sigmoid')  # Binary classification (stuttering or lisp)
-])
-
-model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
-model.summary()
-
-# Train Model with Validation Split (20%)
-history = model.fit(X_train, y_train, epochs=10, batch_size=8, validation_split=0.2)
-
-# Save Model
-model.save("data/model/speech_dysfunction_model.h5")
-
-# Evaluate the Model
-final_loss, final_accuracy = model.evaluate(X_train, y_train)
-
-print(f"Final Training Accuracy: {final_accuracy:.4f}")
-
-print("Model training complete and saved.")
\ No newline at end of file
+import sys
+
+# Run as `python -m scripts.train_model` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_store import STORE_FOLDER, open_store
+from scripts.model_loader import MODEL_PATH
+from scripts.sequence_dataset import WINDOW_LENGTH, WINDOW_STRIDE, make_dataset, split_videos
+
+# Units of the two stacked LSTM layers
+HIDDEN_SIZES = (64, 32)
+
+def build_model(n_features, hidden=HIDDEN_SIZES):
+    """Define the LSTM model; it accepts sequences of any length, from single frames to full windows."""
+    model = Sequential([
+        LSTM(hidden[0], return_sequences=True, input_shape=(None, n_features)),
+        Dropout(0.2),
+        LSTM(hidden[1]),
+        Dense(16, activation='relu'),
+        Dense(1, activation='sigmoid')  # Binary classification (stuttering or lisp)
+    ])
+
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+def train(model_path=MODEL_PATH, window=WINDOW_LENGTH, stride=WINDOW_STRIDE, batch_size=256,
+          epochs=10, validation_split=0.2, hidden=HIDDEN_SIZES, store_folder=STORE_FOLDER):
+    """Train the model on sliding windows from the feature store and save it to `model_path`."""
+    store = open_store(store_folder)
+
+    # Split by video so no window from a validation video is ever seen in training
+    train_ids, val_ids = split_videos(store, validation_split)
+    print(f"Training videos: {len(train_ids)}, validation videos: {len(val_ids)}")
+
+    train_data = make_dataset(store, train_ids, window, stride, batch_size)
+    val_data = make_dataset(store, val_ids, window, stride, batch_size, shuffle=False) if val_ids else None
+
+    model = build_model(store.n_features, hidden)
+    model.summary()
+
+    history = model.fit(train_data, epochs=epochs, validation_data=val_data)
+
+    # Save Model
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    model.save(model_path)
+
+    # Evaluate the Model on held-out videos
+    if val_data is not None:
+        final_loss, final_accuracy = model.evaluate(val_data)
+        print(f"Final Validation Accuracy: {final_accuracy:.4f}")
+
+    print("Model training complete and saved.")
+    return model, history
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the speech dysfunction model.")
+    parser.add_argument("--window", type=int, default=WINDOW_LENGTH, help="Window length in frames")
+    parser.add_argument("--stride", type=int, default=WINDOW_STRIDE, help="Window stride in frames")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--hidden", type=int, nargs=2, default=HIDDEN_SIZES, metavar=("FIRST", "SECOND"),
+                        help="Units of the two LSTM layers")
+    parser.add_argument("--store", default=STORE_FOLDER, help="Feature store folder")
+    args = parser.parse_args()
+
+    train(window=args.window, stride=args.stride, batch_size=args.batch_size, epochs=args.epochs,
+          hidden=tuple(args.hidden), store_folder=args.store)
@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import sys
+
+# Run as `python -m scripts.tune_model` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_store import STORE_FOLDER, FeatureStore, open_store
+from scripts.model_loader import MODEL_FOLDER, N_FEATURES
+from scripts.sequence_dataset import WINDOW_STRIDE, kfold_videos
+
+LEADERBOARD_PATH = os.path.join(MODEL_FOLDER, "leaderboard.json")
+
+# Default search space
+WINDOW_CHOICES = (16, 32, 64)
+HIDDEN_CHOICES = ((32, 16), (64, 32), (128, 64))
+BATCH_SIZE_CHOICES = (128, 256, 512)
+
+# Live inference budget per prediction: a 512-sample chunk arrives every 32 ms, and inference
+# shares it with lip tracking and MFCC extraction
+LATENCY_BUDGET_MS = 5.0
+LATENCY_CALLS = 200
+
+# Feature store opened once per worker process; its arrays are memory-mapped, so every worker
+# shares the same page cache instead of holding its own copy
+_store = None
+
+
+def _init_worker(store_folder, threads):
+    global _store
+    import tensorflow as tf
+
+    # Trials run side by side, so each one gets a fixed share of the CPU
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+    _store = FeatureStore(store_folder)  # tune() has already brought it up to date
+
+
+def search_space(windows=WINDOW_CHOICES, hidden_sizes=HIDDEN_CHOICES, batch_sizes=BATCH_SIZE_CHOICES, trials=None,
+                 seed=0):
+    """Every combination (grid search), or `trials` of them sampled without replacement (random search)."""
+    configs = [{"window": window, "hidden": list(hidden), "batch_size": batch_size}
+               for window, hidden, batch_size in itertools.product(windows, hidden_sizes, batch_sizes)]
+    if trials is not None and trials < len(configs):
+        configs = random.Random(seed).sample(configs, trials)
+    return configs
+
+
+def config_name(config):
+    return f"w{config['window']}-h{config['hidden'][0]}x{config['hidden'][1]}-b{config['batch_size']}"
+
+
+def run_fold(config, fold, train_ids, val_ids, stride, epochs, patience, save_path=None):
+    """Train one configuration on one fold with early stopping; returns its validation metrics."""
+    import tensorflow as tf
+    from scripts.sequence_dataset import make_dataset
+    from scripts.train_model import build_model
+
+    tf.keras.utils.set_random_seed(fold)
+    started = time.perf_counter()
+    train_data = make_dataset(_store, train_ids, config["window"], stride, config["batch_size"], seed=fold)
+    val_data = make_dataset(_store, val_ids, config["window"], stride, config["batch_size"], shuffle=False)
+
+    model = build_model(_store.n_features, config["hidden"])
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience,
+                                                      restore_best_weights=True)
+    history = model.fit(train_data, epochs=epochs, validation_data=val_data, callbacks=[early_stopping], verbose=0)
+    loss, accuracy = model.evaluate(val_data, verbose=0)
+
+    if save_path:
+        model.save(save_path)  # Kept for the latency measurement, which runs after all trials
+    # With restore_best_weights the model is the one from the best epoch, not the last one run
+    best_epoch = int(np.argmin(history.history["val_loss"])) + 1
+    return {"fold": fold, "accuracy": float(accuracy), "loss": float(loss),
+            "epochs": len(history.history["loss"]), "best_epoch": best_epoch, "seconds": time.perf_counter() - started}
+
+
+def inference_latency(model_path, window, calls=LATENCY_CALLS):
+    """Single-window Keras latency and per-frame streaming latency of a saved model, in milliseconds."""
+    from scripts.model_loader import get_predictor
+    from scripts.streaming_lstm import NumpyLSTM
+
+    rng = np.random.default_rng(0)
+    predictor = get_predictor(model_path, "keras")
+    sample = rng.normal(size=(1, window, N_FEATURES)).astype(np.float32)
+    window_ms = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        predictor(sample)
+        window_ms.append(1000.0 * (time.perf_counter() - started))
+
+    stream = NumpyLSTM(model_path).stream()
+    frame = rng.normal(size=N_FEATURES).astype(np.float32)
+    stream_ms = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        stream.step(frame)
+        stream_ms.append(1000.0 * (time.perf_counter() - started))
+
+    return {"window_p50_ms": float(np.percentile(window_ms, 50)), "window_p99_ms": float(np.percentile(window_ms, 99)),
+            "stream_p50_ms": float(np.percentile(stream_ms, 50)), "stream_p99_ms": float(np.percentile(stream_ms, 99))}
+
+
+def tune(configs, folds=5, stride=None, epochs=20, patience=3, workers=None, threads_per_worker=1,
+         budget_ms=LATENCY_BUDGET_MS, store_folder=STORE_FOLDER, output_path=LEADERBOARD_PATH, seed=0):
+    """Cross-validate every configuration on video-level folds in parallel and write a leaderboard.
+
+    Returns the leaderboard rows, best mean accuracy first.
+    """
+    stride = stride or WINDOW_STRIDE
+    store = open_store(store_folder)  # Built or refreshed once here; workers only map it
+    splits = kfold_videos(store, folds, seed)
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    print(f"Searching {len(configs)} configurations × {folds} folds on {len(store)} videos "
+          f"with {workers} worker(s)")
+
+    model_folder = tempfile.mkdtemp(prefix="talkify-tune-")
+    results = {config_name(config): {"config": config, "folds": [], "errors": []} for config in configs}
+    started = time.time()
+    try:
+        # TensorFlow isn't fork-safe, so workers are spawned fresh
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(store_folder, threads_per_worker)) as pool:
+            futures = {}
+            for config in configs:
+                name = config_name(config)
+                for fold, (train_ids, val_ids) in enumerate(splits):
+                    save_path = os.path.join(model_folder, f"{name}.h5") if fold == 0 else None
+                    future = pool.submit(run_fold, config, fold, train_ids, val_ids, stride, epochs, patience,
+                                         save_path)
+                    futures[future] = (name, fold)
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                name, fold = futures[future]
+                try:
+                    result = future.result()
+                    results[name]["folds"].append(result)
+                    print(f"[{done}/{len(futures)}] ✅ {name} fold {fold}: accuracy {result['accuracy']:.4f} "
+                          f"after {result['epochs']} epochs")
+                except Exception as e:
+                    results[name]["errors"].append(f"fold {fold}: {type(e).__name__}: {str(e)}")
+                    print(f"[{done}/{len(futures)}] ❌ {name} fold {fold} failed ({str(e)})")
+
+        # Latency is measured one model at a time, after training, so trials don't skew each other's timings
+        rows = []
+        for name, entry in results.items():
+            accuracies = [fold["accuracy"] for fold in entry["folds"]]
+            row = {"name": name, **entry["config"], "folds": len(accuracies),
+                   "mean_accuracy": float(np.mean(accuracies)) if accuracies else None,
+                   "std_accuracy": float(np.std(accuracies)) if accuracies else None,
+                   "mean_epochs": float(np.mean([fold["epochs"] for fold in entry["folds"]])) if accuracies else None,
+                   "mean_best_epoch": float(np.mean([fold["best_epoch"] for fold in entry["folds"]]))
+                   if accuracies else None,
+                   "errors": entry["errors"]}
+            model_path = os.path.join(model_folder, f"{name}.h5")
+            if os.path.exists(model_path):
+                row.update(inference_latency(model_path, entry["config"]["window"]))
+                row["meets_budget"] = row["stream_p99_ms"] <= budget_ms
+            rows.append(row)
+    finally:
+        shutil.rmtree(model_folder, ignore_errors=True)
+
+    rows.sort(key=lambda row: -1.0 if row["mean_accuracy"] is None else row["mean_accuracy"], reverse=True)
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "folds": folds, "stride": stride, "epochs": epochs,
+              "patience": patience, "budget_ms": budget_ms, "seconds": time.time() - started, "results": rows}
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'configuration':<20}{'accuracy':>10}{'± std':>8}{'best ep':>8}{'window ms':>11}{'stream ms':>11}  budget")
+    for row in rows:
+        if row["mean_accuracy"] is None:
+            print(f"{row['name']:<20}{'failed':>10}")
+            continue
+        latency = (f"{row['window_p99_ms']:>11.2f}{row['stream_p99_ms']:>11.3f}  {'✅' if row['meets_budget'] else '❌'}"
+                   if "meets_budget" in row else f"{'-':>11}{'-':>11}")
+        print(f"{row['name']:<20}{row['mean_accuracy']:>10.4f}{row['std_accuracy']:>8.4f}{row['mean_best_epoch']:>8.1f}"
+              f"{latency}")
+    print(f"Leaderboard saved to {output_path} (latencies are p99; budget {budget_ms} ms per streaming step)")
+    return rows
+
+
+def best_within_budget(rows):
+    """The most accurate configuration that meets the latency budget, or None."""
+    for row in rows:
+        if row["mean_accuracy"] is not None and row.get("meets_budget"):
+            return row
+    return None
+
+
+def _hidden_pair(value):
+    first, second = value.lower().split("x")
+    return int(first), int(second)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validate and tune the speech dysfunction model.")
+    parser.add_argument("--folds", type=int, default=5, help="Folds, split by video")
+    parser.add_argument("--windows", type=int, nargs="+", default=WINDOW_CHOICES, help="Window lengths in frames")
+    parser.add_argument("--hidden", type=_hidden_pair, nargs="+", default=HIDDEN_CHOICES,
+                        help="LSTM sizes as FIRSTxSECOND, e.g. 64x32")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZE_CHOICES)
+    parser.add_argument("--trials", type=int, help="Random search over this many configurations (default: full grid)")
+    parser.add_argument("--stride", type=int, help="Window stride in frames (default: the training stride)")
+    parser.add_argument("--epochs", type=int, default=20, help="Maximum epochs per trial")
+    parser.add_argument("--patience", type=int, default=3, help="Epochs without val_loss improvement before stopping")
+    parser.add_argument("--workers", type=int, help="Parallel trials (default: CPUs / threads per worker)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--budget-ms", type=float, default=LATENCY_BUDGET_MS,
+                        help="p99 streaming inference budget per prediction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", default=STORE_FOLDER, help="Feature store folder")
+    parser.add_argument("--output", default=LEADERBOARD_PATH)
+    parser.add_argument("--save-best", action="store_true",
+                        help="Retrain the most accurate configuration within budget and save it as the live model")
+    args = parser.parse_args()
+
+    configs = search_space(args.windows, args.hidden, args.batch_sizes, args.trials, args.seed)
+    rows = tune(configs, args.folds, args.stride, args.epochs, args.patience, args.workers, args.threads_per_worker,
+                args.budget_ms, args.store, args.output, args.seed)
+
+    if args.save_best:
+        best = best_within_budget(rows)
+        if best is None:
+            print("⚠️ No configuration meets the latency budget; keeping the current model")
+        else:
+            from scripts.train_model import train
+
+            # As many epochs as the folds needed to reach their best validation loss, on the store they were scored on
+            epochs = max(1, round(best["mean_best_epoch"]))
+            print(f"Retraining {best['name']} for {epochs} epochs")
+            train(window=best["window"], stride=args.stride or WINDOW_STRIDE, batch_size=best["batch_size"],
+                  epochs=epochs, hidden=tuple(best["hidden"]), store_folder=args.store)
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Blocks quieter than this RMS level (dB relative to full scale) are silence
+ENERGY_THRESHOLD_DB = -40.0
+
+# Noise and fricatives both cross zero often; a noisy-looking block only counts as speech when it is
+# also FRICATIVE_MARGIN_DB above the energy threshold (so /s/ and /z/ survive but hiss doesn't)
+MAX_ZCR_HZ = 4000.0
+FRICATIVE_MARGIN_DB = 10.0
+
+# Speech keeps being reported for this long after the last speech block, bridging short pauses
+HANGOVER_SECONDS = 0.3
+
+VAD_PARAMS = {"energy_db": ENERGY_THRESHOLD_DB, "max_zcr_hz": MAX_ZCR_HZ,
+              "fricative_margin_db": FRICATIVE_MARGIN_DB, "hangover_seconds": HANGOVER_SECONDS}
+
+
+def energy_db(blocks):
+    """RMS level of each row of float samples in [-1, 1], in dBFS."""
+    blocks = np.atleast_2d(blocks)
+    rms = np.sqrt(np.mean(np.square(blocks, dtype=np.float64), axis=-1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def zero_crossing_rate(blocks, sr):
+    """Zero crossings per second of each row of samples."""
+    blocks = np.atleast_2d(blocks)
+    crossings = np.count_nonzero(np.signbit(blocks[:, 1:]) != np.signbit(blocks[:, :-1]), axis=-1)
+    return crossings * sr / max(blocks.shape[-1] - 1, 1)
+
+
+def is_voiced(level_db, zcr_hz, energy_threshold=ENERGY_THRESHOLD_DB, max_zcr_hz=MAX_ZCR_HZ,
+              fricative_margin_db=FRICATIVE_MARGIN_DB):
+    """Per-block speech decision before hangover smoothing."""
+    loud = level_db >= energy_threshold
+    return loud & ((zcr_hz <= max_zcr_hz) | (level_db >= energy_threshold + fricative_margin_db))
+
+
+class VoiceActivityDetector:
+    """Streaming energy + zero-crossing VAD with hangover, for gating the per-chunk feature stages.
+
+    `is_speech(samples)` classifies one chunk and counts how many chunks were skipped, so callers can
+    report the fraction of MFCC/inference work saved.
+    """
+
+    def __init__(self, sr, chunk_size, energy_threshold=ENERGY_THRESHOLD_DB, max_zcr_hz=MAX_ZCR_HZ,
+                 fricative_margin_db=FRICATIVE_MARGIN_DB, hangover_seconds=HANGOVER_SECONDS):
+        self.sr = sr
+        self.energy_threshold = energy_threshold
+        self.max_zcr_hz = max_zcr_hz
+        self.fricative_margin_db = fricative_margin_db
+        self.hangover_chunks = int(round(hangover_seconds * sr / chunk_size))
+        self.reset()
+
+    def reset(self):
+        self._hangover = 0
+        self.chunks = 0
+        self.speech_chunks = 0
+
+    def is_speech(self, samples):
+        """True if this chunk (float samples in [-1, 1]) is speech or within the hangover after speech."""
+        samples = np.asarray(samples, dtype=np.float32)
+        voiced = bool(is_voiced(energy_db(samples), zero_crossing_rate(samples, self.sr),
+                                self.energy_threshold, self.max_zcr_hz, self.fricative_margin_db)[0])
+        if voiced:
+            self._hangover = self.hangover_chunks
+        elif self._hangover > 0:
+            self._hangover -= 1
+            voiced = True
+
+        self.chunks += 1
+        self.speech_chunks += voiced
+        return voiced
+
+    def stats(self):
+        skipped = self.chunks - self.speech_chunks
+        return {
+            "chunks": self.chunks,
+            "speech_chunks": self.speech_chunks,
+            "skipped_chunks": skipped,
+            "saved_fraction": skipped / self.chunks if self.chunks else 0.0,
+        }
+
+
+def speech_mask(y, sr, hop_length, energy_threshold=ENERGY_THRESHOLD_DB, max_zcr_hz=MAX_ZCR_HZ,
+                fricative_margin_db=FRICATIVE_MARGIN_DB, hangover_seconds=HANGOVER_SECONDS):
+    """Speech decision for every centred `hop_length` frame of a whole signal (the MFCC frame timeline).
+
+    Same rule and hangover as VoiceActivityDetector, vectorised; has 1 + len(y) // hop_length entries.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    n_frames = 1 + len(y) // hop_length
+    half = hop_length // 2
+    padded = np.pad(y, (half, n_frames * hop_length - len(y) + half))
+    blocks = padded[:n_frames * hop_length].reshape(n_frames, hop_length)
+
+    voiced = is_voiced(energy_db(blocks), zero_crossing_rate(blocks, sr),
+                       energy_threshold, max_zcr_hz, fricative_margin_db)
+    hangover = int(round(hangover_seconds * sr / hop_length))
+    # A frame is kept if any of the `hangover` frames before it (or itself) was voiced
+    return np.convolve(voiced.astype(np.int32), np.ones(hangover + 1, dtype=np.int32))[:n_frames] > 0
@@ -0,0 +1,276 @@
+import collections
+import multiprocessing
+import threading
+import time
+import uuid
+from multiprocessing.connection import wait
+import instrumentation
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+DONE = (FINISHED, FAILED, CANCELLED)
+
+# How often the event listener checks that every worker process is still alive
+WORKER_CHECK_SECONDS = 1.0
+
+SESSIONS = instrumentation.counter("analysis_sessions", "Completed analysis sessions by final status", ["status"])
+REJECTED = instrumentation.counter("analysis_sessions_rejected", "Sessions refused by admission control")
+SESSION_SECONDS = instrumentation.histogram("analysis_session_seconds", "Analysis session wall time",
+                                            buckets=(1, 5, 10, 30, 60, 120, 300, 600))
+RESTARTS = instrumentation.counter("analysis_worker_restarts", "Analysis workers respawned after dying")
+
+
+class PoolBusyError(Exception):
+    """Raised when a session is submitted while every worker is busy and the queue is full."""
+
+
+def _worker_main(index, tasks, events, cancel_event):
+    """Worker process: import and warm up the analysis stack once, then run sessions as they arrive.
+
+    `events` is this worker's own pipe: sends are synchronous and unshared, so a worker killed mid-send
+    can't leave a lock held on a queue the other workers report through.
+    """
+    try:
+        import real_time_analysis
+        real_time_analysis.warm_up_model()  # Loads the model; FaceMesh is built at import
+    except Exception as e:
+        events.send(("crashed", index, str(e)))
+        return
+    events.send(("ready", index, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        session_id, options = task
+        events.send(("started", index, session_id))
+        try:
+            result = real_time_analysis.start_analysis(stop_event=cancel_event, session_id=session_id, **options)
+            events.send(("finished", index, (session_id, result)))
+        except Exception as e:
+            events.send(("failed", index, (session_id, str(e))))
+
+
+class AnalysisPool:
+    """Fixed pool of pre-warmed analysis worker processes with admission control.
+
+    At most `workers` sessions run at once and at most `max_queued` more wait for a free worker;
+    further submissions raise PoolBusyError. Finished sessions stay queryable until
+    `max_history` newer sessions have completed. A worker that dies mid-session (segfault, OOM kill)
+    fails its session and is respawned; one that fails to start is not, since it would fail again.
+    """
+
+    def __init__(self, workers=1, max_queued=4, max_history=1000):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self._ctx = multiprocessing.get_context("spawn")
+        self._processes = [None] * workers
+        self._tasks = [None] * workers
+        self._cancel_events = [None] * workers
+        self._events = [None] * workers  # Read end of each worker's event pipe
+        self._ready = set()
+        self._failed = {}  # worker index -> startup error
+        self._busy = {}  # worker index -> session_id
+        self._queue = collections.deque()
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stopping = False
+
+    def start(self):
+        """Spawn the workers; each loads the model and FaceMesh before reporting ready. Safe to call again."""
+        with self._lock:
+            if self._listener is not None:
+                return
+            for index in range(self.workers):
+                self._spawn(index)
+            self._listener = threading.Thread(target=self._listen, name="analysis-pool-events", daemon=True)
+            self._listener.start()
+
+    def _spawn(self, index):
+        """Start (or replace) worker `index` with fresh queues, pipe and cancel event. Caller holds the lock."""
+        tasks = self._ctx.Queue()
+        cancel_event = self._ctx.Event()
+        events, worker_events = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_worker_main, args=(index, tasks, worker_events, cancel_event),
+                                    name=f"analysis-worker-{index}", daemon=True)
+        process.start()
+        worker_events.close()  # Only the worker holds the write end, so its death shows up as EOF
+        if self._events[index] is not None:
+            self._events[index].close()
+        self._processes[index] = process
+        self._tasks[index] = tasks
+        self._cancel_events[index] = cancel_event
+        self._events[index] = events
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has warmed up (or the timeout passes). Returns True when all are ready."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            with self._lock:
+                if len(self._ready) == self.workers:
+                    return True
+            time.sleep(0.05)
+        return False
+
+    def submit(self, **options):
+        """Admit a new session and return its ID; it starts as soon as a warm worker is free.
+
+        Starts the workers on first use, so the pool works under any WSGI server.
+        """
+        self.start()
+        with self._lock:
+            if len(self._failed) == self.workers:
+                raise RuntimeError(f"No analysis worker could start: {next(iter(self._failed.values()))}")
+            running = len(self._busy)
+            if running + len(self._queue) >= self.workers + self.max_queued:
+                REJECTED.inc()
+                raise PoolBusyError(f"{running} sessions running and {len(self._queue)} queued")
+            session_id = uuid.uuid4().hex
+            self._sessions[session_id] = {
+                "session_id": session_id, "status": QUEUED, "worker": None, "result": None, "error": None,
+                "created": time.time(), "started": None, "finished": None,
+            }
+            self._queue.append((session_id, options))
+            self._dispatch()
+            return session_id
+
+    def _dispatch(self):
+        """Hand queued sessions to idle, warm workers. Caller holds the lock."""
+        for index in sorted(self._ready - set(self._busy)):
+            if not self._queue:
+                return
+            session_id, options = self._queue.popleft()
+            self._busy[index] = session_id
+            self._sessions[session_id]["worker"] = index
+            self._cancel_events[index].clear()
+            self._tasks[index].put((session_id, options))
+
+    def _finish(self, session_id, status, result=None, error=None):
+        session = self._sessions.get(session_id)
+        if session is None or session["finished"] is not None:
+            return
+        if session["status"] == CANCELLED or status == CANCELLED:
+            status = CANCELLED
+        session.update(status=status, result=result, error=error, finished=time.time())
+        SESSIONS.inc(status=status)
+        if session["started"] is not None:
+            SESSION_SECONDS.observe(session["finished"] - session["started"])
+        done = [sid for sid, s in self._sessions.items() if s["status"] in DONE]
+        for sid in done[:max(0, len(done) - self.max_history)]:
+            del self._sessions[sid]
+
+    def _listen(self):
+        while not self._stopping:
+            with self._lock:
+                pipes = [events for events in self._events if events is not None]
+                sentinels = [process.sentinel for process in self._processes if process is not None]
+            # Wakes on an event, on a worker exiting, or every WORKER_CHECK_SECONDS
+            readable = wait(pipes + sentinels, timeout=WORKER_CHECK_SECONDS)
+            with self._lock:
+                for index, events in enumerate(self._events):
+                    if events is None or events not in readable:
+                        continue
+                    try:
+                        while events.poll():
+                            self._handle(*events.recv())
+                    except (EOFError, OSError):
+                        self._events[index] = None  # Worker gone; _check_workers fails its session
+                        events.close()
+                self._check_workers()
+                self._dispatch()
+
+    def _handle(self, kind, index, payload):
+        """Apply one worker event. Caller holds the lock."""
+        if kind == "ready":
+            self._ready.add(index)
+            print(f"✅ Analysis worker {index} ready")
+        elif kind == "crashed":
+            self._failed[index] = payload
+            print(f"Analysis worker {index} failed to start: {payload}")
+        elif kind == "started":
+            session = self._sessions.get(payload)
+            if session is not None and session["status"] == QUEUED:
+                session.update(status=RUNNING, started=time.time())
+        elif kind in ("finished", "failed"):
+            session_id, data = payload
+            if self._busy.get(index) == session_id:
+                self._busy.pop(index)
+            if kind == "finished" and not (data or {}).get("error"):
+                self._finish(session_id, FINISHED, result=data)
+            else:
+                error = data["error"] if kind == "finished" else data
+                self._finish(session_id, FAILED, result=data if kind == "finished" else None, error=error)
+
+    def _check_workers(self):
+        """Fail the session of any worker that died without reporting back, and respawn it. Caller holds the lock."""
+        if self._stopping:
+            return
+        for index, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            self._ready.discard(index)
+            session_id = self._busy.pop(index, None)
+            if session_id is not None:
+                self._finish(session_id, FAILED, error=f"Analysis worker exited with code {process.exitcode}")
+            if index in self._failed:
+                self._processes[index] = None  # Failed to start; respawning would only fail again
+                if len(self._failed) == self.workers:
+                    while self._queue:
+                        queued_id, _ = self._queue.popleft()
+                        self._finish(queued_id, FAILED, error=f"No analysis worker could start: {self._failed[index]}")
+                continue
+            print(f"⚠️ Analysis worker {index} died (exit code {process.exitcode}); respawning")
+            RESTARTS.inc()
+            self._spawn(index)
+
+    def status(self, session_id):
+        """Snapshot of a session, or None if unknown."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return dict(session) if session else None
+
+    def cancel(self, session_id):
+        """Cancel a queued or running session. Returns False if it is unknown or already done."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session["status"] in DONE:
+                return False
+            for i, (queued_id, _) in enumerate(self._queue):
+                if queued_id == session_id:
+                    del self._queue[i]
+                    self._finish(session_id, CANCELLED)
+                    return True
+            # Dispatched: the worker stops its loop at the next frame and reports back
+            session["status"] = CANCELLED
+            self._cancel_events[session["worker"]].set()
+            return True
+
+    def stats(self):
+        with self._lock:
+            counts = collections.Counter(session["status"] for session in self._sessions.values())
+            return {
+                "workers": self.workers,
+                "ready_workers": len(self._ready),
+                "failed_workers": len(self._failed),
+                "busy_workers": len(self._busy),
+                "queued": len(self._queue),
+                "max_queued": self.max_queued,
+                "sessions": dict(counts),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._stopping = True
+            workers = [(process, tasks, cancel_event)
+                       for process, tasks, cancel_event in zip(self._processes, self._tasks, self._cancel_events)
+                       if process is not None]
+        for process, tasks, cancel_event in workers:
+            cancel_event.set()
+            tasks.put(None)
+        for process, _, _ in workers:
+            process.join(timeout=5)
@@ -1,15 +1,28 @@
+import json
 import os
 import requests
-from flask import Flask, request, jsonify, send_file
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, request, jsonify, send_file
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, firestore
 from flask_cors import CORS
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from textwrap import wrap
+import atexit
+import io
+import sys
+import threading
 import time
 
+# Run as `python -m server.app` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation
+from server.hedging import HedgedCaller
+from server.lesson_cache import LessonCache, normalize_issue
+from server.lesson_jobs import JobManager, QueueFullError
+from server.lesson_store import WriteBehindWriter
+from server.pdf_renderer import PdfCache, content_key
+
 # Load environment variables
 load_dotenv()
 HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
@@ -27,6 +40,14 @@ cred = credentials.Certificate(os.path.join(os.path.dirname(__file__), "babble-8
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
+# Lesson writes are batched off the request path and flushed on shutdown
+lesson_writer = WriteBehindWriter(
+    db, "lessons",
+    max_batch=int(os.getenv("FIRESTORE_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("FIRESTORE_FLUSH_INTERVAL", "1.0")),
+)
+atexit.register(lesson_writer.close)
+
 # Initialize Flask
 app = Flask(__name__)
 CORS(app)
@@ -35,6 +56,44 @@ CORS(app)
 PRIMARY_MODEL = "meta-llama/Llama-2-7b-chat-hf"  # More reliable than GPT-2
 BACKUP_MODEL = "meta-llama/Llama-2-13b-chat-hf"  # Stronger backup model
 
+# Inference endpoint; point it at a local stand-in for testing
+INFERENCE_API_URL = os.getenv("INFERENCE_API_URL", "https://api-inference.huggingface.co/models").rstrip("/")
+
+# Lesson generation runs in the background; requests only enqueue and poll
+LESSON_WORKERS = int(os.getenv("LESSON_WORKERS", "4"))
+LESSON_QUEUE_LIMIT = int(os.getenv("LESSON_QUEUE_LIMIT", "100"))
+lesson_jobs = JobManager(max_workers=LESSON_WORKERS, max_pending=LESSON_QUEUE_LIMIT)
+
+# Generated lessons, keyed on the normalised speech issue and model
+LESSON_CACHE_SIZE = int(os.getenv("LESSON_CACHE_SIZE", "256"))
+LESSON_CACHE_TTL = float(os.getenv("LESSON_CACHE_TTL", str(24 * 3600)))
+LESSON_CACHE_FIRESTORE = os.getenv("LESSON_CACHE_FIRESTORE", "1") == "1"  # Read through to stored lessons
+
+# Rendered lesson PDFs, deduplicated by content hash
+PDF_CACHE_MB = int(os.getenv("PDF_CACHE_MB", "32"))
+PDF_PRERENDER = os.getenv("PDF_PRERENDER", "0") == "1"  # Render in the background instead of on first download
+pdf_cache = PdfCache(folder="pdfs", max_memory_bytes=PDF_CACHE_MB * 1024 * 1024)
+
+# Latest lesson per user: user_id -> (content key, lesson, speech issue)
+lesson_index = {}
+lesson_index_lock = threading.Lock()
+
+# Request-path metrics, exported on /metrics
+LLM_SECONDS = instrumentation.histogram("llm_request_seconds", "Inference API call latency", ["model", "outcome"])
+LESSON_FALLBACKS = instrumentation.counter("lesson_fallbacks", "Lessons served from the default template")
+instrumentation.gauge("lesson_jobs_queued", "Lesson jobs waiting for a worker",
+                      func=lambda: lesson_jobs.stats()["queued"])
+instrumentation.gauge("lesson_jobs_running", "Lesson jobs being generated",
+                      func=lambda: lesson_jobs.stats()["running"])
+instrumentation.gauge("firestore_queue_depth", "Lesson writes waiting to be flushed",
+                      func=lambda: lesson_writer.queue_depth())
+
+# Pooled HTTP session so every worker reuses keep-alive connections to the inference API
+http = requests.Session()
+http.headers.update(HEADERS)
+http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=LESSON_WORKERS * 2))
+http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=LESSON_WORKERS * 2))
+
 
 def create_default_lesson(speech_issue):
     """Creates a structured fallback lesson plan."""
@@ -72,54 +131,140 @@ Practicing daily for at least 20 minutes leads to noticeable improvement!
 
 
 def request_ai_response(prompt, model):
-    """Requests AI-generated text using Llama-2 with structured outputs."""
-    MAX_RETRIES = 3
-    for attempt in range(MAX_RETRIES):
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 1024,  # Increase tokens for a detailed lesson
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "stop_sequences": ["\n\n"]  # Helps prevent incomplete responses
-            }
+    """Requests AI-generated text from one model in a single attempt. Returns None if the response is unusable."""
+    payload = {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": 1024,  # Increase tokens for a detailed lesson
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "stop_sequences": ["\n\n"]  # Helps prevent incomplete responses
         }
+    }
 
-        response = requests.post(
-            f"https://api-inference.huggingface.co/models/{model}",
-            headers=HEADERS,
-            json=payload,
-            timeout=30
-        )
-
-        print(f"API Attempt {attempt + 1} (Model: {model}): Status Code {response.status_code}")
-
-        if response.status_code == 200:
-            try:
-                response_json = response.json()
-                print("Full AI Response:", response_json)
+    started = time.perf_counter()
+    outcome = "invalid"
+    try:
+        response = http.post(f"{INFERENCE_API_URL}/{model}", json=payload, timeout=30)
 
-                if isinstance(response_json, list) and len(response_json) > 0:
-                    lesson_text = response_json[0].get("generated_text", "").strip()
+        if response.status_code != 200:
+            outcome = f"http_{response.status_code}"
+            print(f"API Attempt (Model: {model}): Status Code {response.status_code}")
+            return None
 
-                    # 🚨 Filter out invalid responses 🚨
-                    if lesson_text in ["User", "---", "I hope this helps!"] or len(lesson_text.split()) < 50:
-                        print("⚠️ AI Response Invalid (too short or contains placeholders):", lesson_text)
-                        return None  # Retry with another model
+        try:
+            response_json = response.json()
 
-                    return lesson_text  # Valid response
+            if isinstance(response_json, list) and len(response_json) > 0:
+                lesson_text = response_json[0].get("generated_text", "").strip()
 
-            except Exception as e:
-                print("Error processing AI response:", str(e))
+                # 🚨 Filter out invalid responses 🚨
+                if lesson_text in ["User", "---", "I hope this helps!"] or len(lesson_text.split()) < 50:
+                    print(f"⚠️ AI Response Invalid (too short or contains placeholders): {lesson_text[:80]!r}")
+                    return None  # Let another model answer
 
-        time.sleep(2 ** attempt)  # Exponential backoff
+                outcome = "ok"
+                return lesson_text  # Valid response
 
-    return None  # If all retries fail, return None instead of crashing
+        except Exception as e:
+            print("Error processing AI response:", str(e))
+
+        return None
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        LLM_SECONDS.observe(time.perf_counter() - started, model=model, outcome=outcome)
+
+
+# Primary and backup model are raced: the backup fires when the primary is slower than its
+# HEDGE_PERCENTILE latency or fails, and models with an open circuit breaker are skipped
+ai_caller = HedgedCaller(
+    request_ai_response, [PRIMARY_MODEL, BACKUP_MODEL],
+    hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "90")),
+    default_hedge_delay=float(os.getenv("HEDGE_DEFAULT_DELAY", "10")),
+    max_workers=LESSON_WORKERS * 2,
+    cooldown=float(os.getenv("BREAKER_COOLDOWN", "30")),
+)
+
+
+def generate_ai_lesson(speech_issue, job=None):
+    """Generates a lesson with the primary model, hedged with the backup model.
+
+    Returns (lesson, model that wrote it), or (None, None) on failure.
+    """
+    prompt = f"Generate a structured speech therapy lesson plan for improving '{speech_issue}' pronunciation."
+
+    def on_hedge(model):
+        print(f"⚠️ Primary AI model slow or failing. Also trying {model}...")
+        if job is not None:
+            job.update(stage="generating_backup", progress=0.4)
+
+    return ai_caller.call_with_model(prompt, on_hedge=on_hedge)
+
+
+def load_cached_lesson(issue_key, model):
+    """Read-through for the lesson cache: (latest stored AI lesson, Unix time stored) for this issue and model."""
+    # Needs a composite index on (speech_issue_key, model, timestamp)
+    docs = (db.collection("lessons")
+            .where("speech_issue_key", "==", issue_key)
+            .where("model", "==", model)
+            .order_by("timestamp", direction=firestore.Query.DESCENDING)
+            .limit(1)
+            .stream())
+    for doc in docs:
+        data = doc.to_dict()
+        stored_at = data.get("timestamp")
+        return data.get("lesson"), stored_at.timestamp() if stored_at is not None else None
+    return None
+
+
+lesson_cache = LessonCache(max_entries=LESSON_CACHE_SIZE, ttl=LESSON_CACHE_TTL,
+                           loader=load_cached_lesson if LESSON_CACHE_FIRESTORE else None)
+
+
+def build_lesson(job, user_id, speech_issue):
+    """Background job: generate the lesson, store it in Firebase and render the PDF."""
+    # Request AI-generated lesson; identical concurrent requests share one upstream call
+    job.update(stage="generating", progress=0.1)
+    # Cached under the model that actually answered, preferring the primary model's lessons
+    lesson_text, model = lesson_cache.get_or_create(
+        speech_issue, (PRIMARY_MODEL, BACKUP_MODEL), lambda: generate_ai_lesson(speech_issue, job))
+
+    # If AI still fails, use a default lesson template (never cached, so the next request retries the AI)
+    if not lesson_text:
+        print("⚠️ AI failed completely. Using default lesson format.")
+        lesson_text = create_default_lesson(speech_issue)
+        model = "default"
+        LESSON_FALLBACKS.inc()
+
+    # Store in Firebase (queued; written in batches by the write-behind writer)
+    job.update(stage="saving", progress=0.7)
+    if not lesson_writer.put(user_id, {
+        "lesson": lesson_text,
+        "speech_issue": speech_issue,
+        "speech_issue_key": normalize_issue(speech_issue),
+        "model": model,
+        "timestamp": firestore.SERVER_TIMESTAMP
+    }):
+        print(f"Firebase error: write queue full, lesson for {user_id} not stored")
+
+    # The PDF is rendered on first download (or ahead of time when PDF_PRERENDER is on)
+    key = content_key(lesson_text, speech_issue)
+    with lesson_index_lock:
+        lesson_index[user_id] = (key, lesson_text, speech_issue)
+    if PDF_PRERENDER:
+        pdf_cache.prerender(key, lesson_text, speech_issue)
+
+    return {
+        "lesson": lesson_text,
+        "pdf_url": f"/download_lesson/{user_id}"
+    }
 
 
 @app.route("/generate_lesson", methods=["POST"])
 def generate_lesson():
-    """Generates a concise lesson plan using AI or default fallback."""
+    """Queues lesson generation and returns a job ID to poll."""
     try:
         data = request.json
         user_id = data.get("user_id", "").strip()
@@ -128,79 +273,116 @@ def generate_lesson():
         if not user_id or not speech_issue:
             return jsonify({"error": "Missing required fields"}), 400
 
-        # Request AI-generated lesson
-        prompt = f"Generate a structured speech therapy lesson plan for improving '{speech_issue}' pronunciation."
-        lesson_text = request_ai_response(prompt, PRIMARY_MODEL)
+        job = lesson_jobs.submit(build_lesson, user_id, speech_issue)
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/lesson_jobs/{job.id}",
+            "events_url": f"/lesson_jobs/{job.id}/events"
+        }), 202
+
+    except QueueFullError:
+        return jsonify({"error": "Too many lessons in progress, try again shortly"}), 503
+    except Exception as e:
+        print(f"Error in generate_lesson: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
-        # If primary model fails, try backup model
-        if not lesson_text:
-            print("⚠️ Primary AI model failed. Trying backup model...")
-            lesson_text = request_ai_response(prompt, BACKUP_MODEL)
 
-        # If AI still fails, use a default lesson template
-        if not lesson_text:
-            print("⚠️ AI failed completely. Using default lesson format.")
-            lesson_text = create_default_lesson(speech_issue)
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text exposition of the server's timers, counters and gauges."""
+    return instrumentation.metrics_response()
 
-        # Store in Firebase
-        try:
-            db.collection("lessons").document(user_id).set({
-                "lesson": lesson_text,
-                "speech_issue": speech_issue,
-                "timestamp": firestore.SERVER_TIMESTAMP
-            })
-        except Exception as e:
-            print(f"Firebase error: {str(e)}")
 
-        # Generate PDF
-        pdf_filename = f"lesson_{user_id}.pdf"
-        pdf_path = os.path.join("pdfs", pdf_filename)
-        os.makedirs("pdfs", exist_ok=True)
+@app.route("/model_health", methods=["GET"])
+def model_health():
+    """Rolling latency/error stats, breaker state and hedge delays per model."""
+    return jsonify(ai_caller.stats())
 
-        try:
-            c = canvas.Canvas(pdf_path, pagesize=letter)
-            width, height = letter
-            margin = 40
-            y_position = height - 50
-
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(margin, y_position, f"Speech Therapy Lesson Plan: {speech_issue}")
-            y_position -= 30
-
-            c.setFont("Helvetica", 12)
-            for line in lesson_text.split("\n"):
-                if y_position < 50:
-                    c.showPage()
-                    y_position = height - 50
-                c.drawString(margin, y_position, line)
-                y_position -= 18
-
-            c.save()
-        except Exception as e:
-            print(f"PDF generation error: {str(e)}")
 
-        return jsonify({
-            "lesson": lesson_text,
-            "pdf_url": f"/download_lesson/{user_id}"
-        })
+@app.route("/lesson_cache/stats", methods=["GET"])
+def lesson_cache_stats():
+    """Lesson cache hit/miss counters."""
+    return jsonify(lesson_cache.stats())
 
-    except Exception as e:
-        print(f"Error in generate_lesson: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+
+@app.route("/lesson_jobs/<job_id>", methods=["GET"])
+def lesson_job_status(job_id):
+    """Returns the status of a lesson job, including the lesson once it has succeeded."""
+    job = lesson_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/lesson_jobs/<job_id>/events", methods=["GET"])
+def lesson_job_events(job_id):
+    """Streams lesson job progress as server-sent events until the job finishes."""
+    if lesson_jobs.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        for snapshot in lesson_jobs.watch(job_id):
+            yield f"data: {json.dumps(snapshot)}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def find_lesson(user_id):
+    """(content key, lesson, speech issue) for a user's latest lesson, falling back to Firebase after a restart."""
+    with lesson_index_lock:
+        entry = lesson_index.get(user_id)
+    if entry is not None:
+        return entry
+
+    doc = db.collection("lessons").document(user_id).get()
+    if not doc.exists:
+        return None
+    data = doc.to_dict() or {}
+    if not data.get("lesson") or not data.get("speech_issue"):
+        return None  # Incomplete document; treated like a missing lesson
+    entry = (content_key(data["lesson"], data["speech_issue"]), data["lesson"], data["speech_issue"])
+    with lesson_index_lock:
+        lesson_index[user_id] = entry
+    return entry
 
 
 @app.route("/download_lesson/<user_id>", methods=["GET"])
 def download_lesson(user_id):
-    """Downloads the generated PDF."""
+    """Downloads the lesson PDF, rendering it on first request and serving it from cache afterwards."""
     try:
-        pdf_path = os.path.join("pdfs", f"lesson_{user_id}.pdf")
-        if not os.path.exists(pdf_path):
+        entry = find_lesson(user_id)
+        if entry is None:
             return jsonify({"error": "Lesson PDF not found"}), 404
-        return send_file(pdf_path, as_attachment=True)
+        key, lesson_text, speech_issue = entry
+
+        # The ETag is the content hash, so an unchanged lesson never needs re-sending
+        if key in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(key)
+            return response
+
+        pdf_data = pdf_cache.get(key, lesson_text, speech_issue)
+        response = send_file(io.BytesIO(pdf_data), mimetype="application/pdf", as_attachment=True,
+                             download_name=f"lesson_{user_id}.pdf", etag=False)
+        response.set_etag(key)
+        return response
     except Exception as e:
         print(f"Error downloading lesson: {str(e)}")
         return jsonify({"error": "Error downloading PDF"}), 500
 
 
+@app.route("/lesson_store/stats", methods=["GET"])
+def lesson_store_stats():
+    """Write-behind queue depth and Firestore flush latency."""
+    return jsonify(lesson_writer.stats())
+
+
+@app.route("/pdf_cache/stats", methods=["GET"])
+def pdf_cache_stats():
+    """PDF render time and cache hit rate."""
+    return jsonify(pdf_cache.stats())
+
+
 if __name__ == "__main__":
     app.run(debug=True)
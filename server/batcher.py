@@ -0,0 +1,149 @@
+import collections
+import threading
+import time
+import numpy as np
+import instrumentation
+
+BATCH_SIZE = instrumentation.histogram("inference_batch_size", "Windows scored per model call",
+                                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_SECONDS = instrumentation.histogram("inference_queue_seconds", "Time a window waited to be batched")
+MODEL_SECONDS = instrumentation.histogram("inference_model_seconds", "Model call latency per batch")
+SHED = instrumentation.counter("inference_shed", "Windows dropped because they missed their deadline")
+
+
+class BatcherBusyError(Exception):
+    """Raised when a window is submitted while `max_queue` windows are already waiting."""
+
+
+class DeadlineExceededError(Exception):
+    """Raised for a window that waited longer than its deadline and was dropped without being scored."""
+
+
+class _Request:
+    def __init__(self, features, deadline):
+        self.features = features
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        """Block until the window is scored; returns its probability or raises the batch's error."""
+        if not self.done.wait(timeout):
+            raise DeadlineExceededError("Timed out waiting for the model")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class DynamicBatcher:
+    """Collects (time_steps, features) windows from many sessions and scores them in shared model calls.
+
+    A batch is sent as soon as `max_batch` windows are waiting or `max_wait` seconds after its oldest
+    window arrived, so a lone session pays at most `max_wait` extra latency. Windows still queued
+    `timeout` seconds after they were submitted are shed instead of scored. Windows with different
+    lengths (sessions still filling their first window) go to separate calls within the same batch.
+    """
+
+    def __init__(self, predict, max_batch=64, max_wait=0.005, max_queue=1024, timeout=0.25):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._scored = 0
+        self._shed = 0
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """Queue one window; returns a request whose `wait()` gives the probability."""
+        return self.submit_many([features])[0]
+
+    def submit_many(self, windows):
+        """Queue several windows all or nothing: raises BatcherBusyError without queuing any that don't all fit."""
+        deadline = time.monotonic() + self.timeout
+        requests = [_Request(np.asarray(features, dtype=np.float32), deadline) for features in windows]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            if len(self._queue) + len(requests) > self.max_queue:
+                raise BatcherBusyError(f"{len(self._queue)} windows already waiting")
+            self._queue.extend(requests)
+            self._cond.notify()
+        return requests
+
+    def predict_one(self, features):
+        """Score one window with whatever else is waiting; blocks for at most about `timeout` seconds."""
+        return self.submit(features).wait(self.timeout + self.max_wait + 1.0)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            # Give other sessions until the oldest window's batching window closes to join this call
+            flush_at = self._queue[0].enqueued + self.max_wait
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            now = time.monotonic()
+            groups = collections.defaultdict(list)
+            for request in batch:
+                if request.deadline < now:
+                    self._shed += 1
+                    SHED.inc()
+                    request.error = DeadlineExceededError("Dropped after missing its deadline")
+                    request.done.set()
+                    continue
+                QUEUE_SECONDS.observe(now - request.enqueued)
+                groups[request.features.shape].append(request)
+
+            for requests in groups.values():
+                try:
+                    with MODEL_SECONDS.time():
+                        probabilities = self.predict(np.stack([request.features for request in requests]))
+                    for request, probability in zip(requests, probabilities):
+                        request.result = float(probability)
+                except Exception as e:
+                    for request in requests:
+                        request.error = e
+                BATCH_SIZE.observe(len(requests))
+                self._batches += 1
+                self._scored += len(requests)
+                for request in requests:
+                    request.done.set()
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "batches": self._batches,
+            "scored": self._scored,
+            "shed": self._shed,
+            "mean_batch_size": self._scored / self._batches if self._batches else 0.0,
+        }
+
+    def close(self):
+        """Score what's already queued, then stop the batching thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,186 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import instrumentation
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+HEDGES = instrumentation.counter("llm_hedges", "Backup model calls fired alongside a slow or failed one")
+RETRY_ROUNDS = instrumentation.counter("llm_retry_rounds", "Extra hedged rounds after every model failed")
+BREAKER_SKIPS = instrumentation.counter("llm_breaker_skips", "Calls skipped because a circuit was open", ["model"])
+EXHAUSTED = instrumentation.counter("llm_exhausted", "Calls where every model failed in every round")
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker driven by a rolling window of call latencies and outcomes.
+
+    The breaker opens when at least `min_calls` of the last `window` calls were recorded and the
+    failure rate reaches `failure_threshold`. After `cooldown` seconds one probe call is let through;
+    its outcome closes the breaker again or re-opens it.
+    """
+
+    def __init__(self, name, window=50, min_calls=5, failure_threshold=0.5, cooldown=30.0):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self._calls = collections.deque(maxlen=window)  # (latency, ok)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be sent to this endpoint now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._calls.append((latency, ok))
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self.state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open()
+            elif self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for _, call_ok in self._calls if not call_ok)
+                if failures / len(self._calls) >= self.failure_threshold:
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f"⚠️ Circuit opened for {self.name}")
+
+    def latency_percentile(self, percentile):
+        """Latency percentile (0-100) of successful calls in the window, or None without data."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._calls if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile / 100.0 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def stats(self):
+        with self._lock:
+            calls = list(self._calls)
+            state = self.state
+        failures = sum(1 for _, ok in calls if not ok)
+        return {
+            "state": state,
+            "calls": len(calls),
+            "error_rate": failures / len(calls) if calls else 0.0,
+            "p50_latency": self.latency_percentile(50),
+            "p90_latency": self.latency_percentile(90),
+            "p99_latency": self.latency_percentile(99),
+        }
+
+
+class HedgedCaller:
+    """Calls `attempt(prompt, model)` on an ordered list of models with hedging.
+
+    The first model is asked first; if it hasn't answered within its `hedge_percentile` latency
+    (or `default_hedge_delay` before there is data), or it fails, the next model is fired in
+    parallel. The first non-None result wins. Models whose breaker is open are skipped.
+    `call_with_model` also says which model answered.
+    """
+
+    def __init__(self, attempt, models, hedge_percentile=90, default_hedge_delay=5.0,
+                 rounds=3, max_workers=8, **breaker_options):
+        self.attempt = attempt
+        self.models = list(models)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.rounds = rounds
+        self.breakers = {model: CircuitBreaker(model, **breaker_options) for model in self.models}
+        self.counters = {"calls": 0, "hedges": 0, "wins": {model: 0 for model in self.models},
+                         "skipped_open": 0, "exhausted": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def _timed_attempt(self, prompt, model):
+        started = time.monotonic()
+        try:
+            result = self.attempt(prompt, model)
+        except Exception as e:
+            print(f"AI request error (Model: {model}): {str(e)}")
+            result = None
+        self.breakers[model].record(time.monotonic() - started, result is not None)
+        return result
+
+    def hedge_delay(self, model):
+        delay = self.breakers[model].latency_percentile(self.hedge_percentile)
+        return self.default_hedge_delay if delay is None else delay
+
+    def _round(self, prompt, on_hedge):
+        pending = {}
+        queue = list(self.models)
+
+        def launch():
+            while queue:
+                model = queue.pop(0)
+                if self.breakers[model].allow():
+                    pending[self._executor.submit(self._timed_attempt, prompt, model)] = model
+                    return model
+                self.counters["skipped_open"] += 1
+                BREAKER_SKIPS.inc(model=model)
+            return None
+
+        if launch() is None:
+            return None, None
+        while pending:
+            # Wait for a result, but only as long as the newest request's hedge delay when a backup remains
+            timeout = self.hedge_delay(list(pending.values())[-1]) if queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = pending.pop(future)
+                result = future.result()
+                if result is not None:
+                    self.counters["wins"][model] += 1
+                    return result, model
+            if queue and (not done or not pending):
+                # Slow or failed: fire the next model alongside whatever is still running
+                hedged = launch()
+                if hedged is not None:
+                    self.counters["hedges"] += 1
+                    HEDGES.inc()
+                    if on_hedge is not None:
+                        on_hedge(hedged)
+        return None, None
+
+    def call_with_model(self, prompt, on_hedge=None):
+        """(first valid response, model that gave it), or (None, None) if every model failed in every round."""
+        self.counters["calls"] += 1
+        for attempt in range(self.rounds):
+            result, model = self._round(prompt, on_hedge)
+            if result is not None:
+                return result, model
+            if attempt < self.rounds - 1:
+                RETRY_ROUNDS.inc()
+                time.sleep(2 ** attempt)  # Exponential backoff between rounds
+        self.counters["exhausted"] += 1
+        EXHAUSTED.inc()
+        return None, None
+
+    def __call__(self, prompt, on_hedge=None):
+        """Return the first valid response, or None if every model failed in every round."""
+        return self.call_with_model(prompt, on_hedge)[0]
+
+    def stats(self):
+        return {
+            "counters": self.counters,
+            "hedge_delays": {model: self.hedge_delay(model) for model in self.models},
+            "breakers": {model: breaker.stats() for model, breaker in self.breakers.items()},
+        }
@@ -0,0 +1,132 @@
+import collections
+import re
+import threading
+import time
+
+
+def normalize_issue(speech_issue):
+    """Cache key form of a speech issue: lowercase, no surrounding quotes/punctuation, single spaces."""
+    issue = re.sub(r"\s+", " ", speech_issue.strip().lower())
+    return issue.strip(" '\"`.,;:!?")
+
+
+class _InFlight:
+    """An upstream call that other requests for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LessonCache:
+    """LRU + TTL cache of generated lessons keyed on (normalised speech issue, model).
+
+    A lookup names the acceptable models in order of preference and returns the first cached one.
+    Concurrent misses for the same issue are coalesced: one caller runs `create()` and the rest wait
+    for its result. `loader(issue_key, model)` is an optional read-through source (e.g. Firestore)
+    consulted before `create()`; it returns (lesson, Unix time it was stored) or None, and a stored
+    lesson older than the TTL (or with no time) counts as a miss. `create()` returns (lesson, model that wrote it), and the lesson is
+    cached under that model; a None lesson is never cached (e.g. a fallback lesson).
+    """
+
+    def __init__(self, max_entries=256, ttl=24 * 3600, loader=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.loader = loader
+        self._entries = collections.OrderedDict()  # key -> (expires_at, lesson)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "loader_hits": 0, "coalesced": 0,
+                         "evictions": 0, "expirations": 0, "errors": 0}
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, lesson = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return lesson
+
+    def _store(self, key, lesson, age=0.0):
+        self._entries[key] = (time.monotonic() + self.ttl - age, lesson)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get_or_create(self, speech_issue, models, create):
+        """(lesson, model) for this issue from the first of `models` cached, loading or creating it on a miss."""
+        issue_key = normalize_issue(speech_issue)
+        with self._lock:
+            for model in models:
+                lesson = self._lookup((issue_key, model))
+                if lesson is not None:
+                    self.counters["hits"] += 1
+                    return lesson, model
+            pending = self._in_flight.get(issue_key)
+            if pending is None:
+                pending = self._in_flight[issue_key] = _InFlight()
+                leader = True
+                self.counters["misses"] += 1
+            else:
+                leader = False
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            lesson, model, age = None, None, 0.0
+            if self.loader is not None:
+                for candidate in models:
+                    try:
+                        loaded = self.loader(issue_key, candidate)
+                    except Exception as e:
+                        print(f"Lesson cache loader error: {str(e)}")
+                        loaded = None
+                    if loaded is None or loaded[0] is None:
+                        continue
+                    stored_at = loaded[1]
+                    age = max(time.time() - stored_at, 0.0) if stored_at is not None else self.ttl
+                    if age >= self.ttl:  # Stale, or no timestamp to prove otherwise
+                        self.counters["expirations"] += 1
+                        continue
+                    lesson, model = loaded[0], candidate
+                    self.counters["loader_hits"] += 1
+                    break
+            if lesson is None:
+                lesson, model = create()
+                age = 0.0
+            if lesson is not None:
+                with self._lock:
+                    self._store((issue_key, model), lesson, age)
+            pending.value = (lesson, model)
+            return pending.value
+        except Exception as e:
+            self.counters["errors"] += 1
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[issue_key]
+            pending.done.set()
+
+    def invalidate(self, speech_issue, model):
+        with self._lock:
+            self._entries.pop((normalize_issue(speech_issue), model), None)
+
+    def stats(self):
+        """Counters plus current size, for sizing the cache."""
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+            return dict(self.counters, size=len(self._entries), max_entries=self.max_entries,
+                        in_flight=len(self._in_flight),
+                        hit_rate=self.counters["hits"] / lookups if lookups else 0.0)
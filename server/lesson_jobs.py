@@ -0,0 +1,127 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the manager already holds `max_pending` unfinished jobs."""
+
+
+class Job:
+    """State of one background job. `update()` bumps `version` so watchers can wait for changes."""
+
+    def __init__(self, job_id, manager):
+        self.id = job_id
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self.version = 0
+        self._manager = manager
+
+    def update(self, stage=None, progress=None, **fields):
+        """Report progress from inside the job function."""
+        with self._manager._cond:
+            if stage is not None:
+                self.stage = stage
+            if progress is not None:
+                self.progress = progress
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated = time.time()
+            self.version += 1
+            self._manager._cond.notify_all()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps their state for polling or streaming."""
+
+    def __init__(self, max_workers=4, max_pending=100, retention=3600):
+        self.max_pending = max_pending
+        self.retention = retention  # Seconds a finished job stays queryable
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lesson-job")
+        self._jobs = {}
+        self._cond = threading.Condition()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue `func(job, *args, **kwargs)`; its return value becomes the job result. Returns the job."""
+        with self._cond:
+            self._expire()
+            pending = sum(1 for job in self._jobs.values() if job.status not in FINISHED)
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs already pending")
+            job = Job(uuid.uuid4().hex, self)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.update(status=RUNNING, stage=RUNNING)
+        try:
+            result = func(job, *args, **kwargs)
+            job.update(status=SUCCEEDED, stage=SUCCEEDED, progress=1.0, result=result)
+        except Exception as e:
+            print(f"Job {job.id} failed: {str(e)}")
+            job.update(status=FAILED, stage=FAILED, error=str(e))
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job.id for job in self._jobs.values() if job.status in FINISHED and job.updated < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Snapshot of a job as a dict, or None if unknown or expired."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def watch(self, job_id, timeout=300):
+        """Yield a snapshot on every change until the job finishes or `timeout` seconds pass."""
+        deadline = time.time() + timeout
+        seen = -1
+        while True:
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                while job.version == seen and time.time() < deadline:
+                    self._cond.wait(deadline - time.time())
+                if job.version == seen:
+                    return  # Timed out without a change
+                seen = job.version
+                snapshot = job.to_dict()
+            yield snapshot
+            if snapshot["status"] in FINISHED:
+                return
+
+    def stats(self):
+        with self._cond:
+            counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,152 @@
+import collections
+import threading
+import time
+import instrumentation
+
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+BATCH_SECONDS = instrumentation.histogram("firestore_batch_seconds", "Firestore batch commit latency", ["outcome"])
+RETRIES = instrumentation.counter("firestore_retries", "Retried Firestore batch commits")
+DROPPED_WRITES = instrumentation.counter("firestore_dropped_writes", "Writes dropped after exhausting retries")
+REJECTED_WRITES = instrumentation.counter("firestore_rejected_writes", "Writes refused because the queue was full")
+
+
+class WriteBehindWriter:
+    """Queues document writes and commits them to Firestore in batches, off the request path.
+
+    A batch is flushed once `max_batch` writes are queued or `flush_interval` seconds have passed
+    since the oldest queued write. Failed batches are retried with exponential backoff and dropped
+    (and counted) after `max_retries`. Repeated writes to the same document before a flush are
+    collapsed into the latest one. `db` is any client with Firestore's `collection()` / `batch()`
+    interface, so the emulator or an in-memory fake can stand in for tests.
+    """
+
+    def __init__(self, db, collection, max_batch=100, flush_interval=1.0, max_retries=5,
+                 base_backoff=0.5, max_queue=10000):
+        self.db = db
+        self.collection = collection
+        self.max_batch = min(max_batch, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_queue = max_queue
+
+        self._pending = collections.OrderedDict()  # doc_id -> data
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.counters = {"queued": 0, "collapsed": 0, "rejected": 0, "writes": 0, "batches": 0,
+                         "retries": 0, "failed_batches": 0, "dropped_writes": 0}
+        self._flush_latencies = collections.deque(maxlen=100)
+
+        self._thread = threading.Thread(target=self._run, name="firestore-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, doc_id, data):
+        """Queue `data` to be set on document `doc_id`. Returns False if the queue is full."""
+        with self._cond:
+            if self._closed or (doc_id not in self._pending and len(self._pending) >= self.max_queue):
+                self.counters["rejected"] += 1
+                REJECTED_WRITES.inc()
+                return False
+            if doc_id in self._pending:
+                self.counters["collapsed"] += 1
+                del self._pending[doc_id]
+            self._pending[doc_id] = data
+            self.counters["queued"] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+            return True
+
+    def _take_batch(self):
+        with self._cond:
+            items = []
+            while self._pending and len(items) < self.max_batch:
+                items.append(self._pending.popitem(last=False))
+            self._oldest = time.monotonic() if self._pending else None
+            return items
+
+    def _commit(self, items):
+        started = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            attempt_started = time.perf_counter()
+            try:
+                batch = self.db.batch()
+                for doc_id, data in items:
+                    batch.set(self.db.collection(self.collection).document(doc_id), data)
+                batch.commit()
+                BATCH_SECONDS.observe(time.perf_counter() - attempt_started, outcome="ok")
+                with self._cond:
+                    self.counters["batches"] += 1
+                    self.counters["writes"] += len(items)
+                    self._flush_latencies.append(time.monotonic() - started)
+                return True
+            except Exception as e:
+                BATCH_SECONDS.observe(time.perf_counter() - attempt_started, outcome="error")
+                print(f"Firebase error (batch of {len(items)}, attempt {attempt + 1}): {str(e)}")
+                if attempt < self.max_retries:
+                    RETRIES.inc()
+                    with self._cond:
+                        self.counters["retries"] += 1
+                    time.sleep(self.base_backoff * 2 ** attempt)
+        with self._cond:
+            self.counters["failed_batches"] += 1
+            self.counters["dropped_writes"] += len(items)
+        DROPPED_WRITES.inc(len(items))
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._pending) >= self.max_batch:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            self.flush_once()
+
+    def flush_once(self):
+        """Commit up to one batch of queued writes."""
+        with self._flush_lock:
+            items = self._take_batch()
+            if items:
+                self._commit(items)
+
+    def flush(self):
+        """Commit everything queued so far."""
+        while self.queue_depth():
+            self.flush_once()
+
+    def close(self):
+        """Stop the background flusher and write out whatever is still queued (call on shutdown)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self):
+        with self._cond:
+            latencies = sorted(self._flush_latencies)
+            return dict(self.counters,
+                        queue_depth=len(self._pending),
+                        last_flush_ms=1000.0 * self._flush_latencies[-1] if latencies else None,
+                        p50_flush_ms=1000.0 * latencies[len(latencies) // 2] if latencies else None,
+                        max_flush_ms=1000.0 * latencies[-1] if latencies else None)
@@ -1,17 +1,72 @@
 from flask import Flask, jsonify
-import subprocess
+import os
+import sys
+
+# Workers import real_time_analysis from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation
+from server.analysis_pool import AnalysisPool, FINISHED, PoolBusyError
+
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "1"))
+ANALYSIS_QUEUE_LIMIT = int(os.environ.get("ANALYSIS_QUEUE_LIMIT", "4"))
 
 app = Flask(__name__)
+analysis_pool = AnalysisPool(workers=ANALYSIS_WORKERS, max_queued=ANALYSIS_QUEUE_LIMIT)
+instrumentation.gauge("analysis_workers_ready", "Warm analysis workers", func=lambda: analysis_pool.stats()["ready_workers"])
+instrumentation.gauge("analysis_workers_busy", "Workers running a session", func=lambda: analysis_pool.stats()["busy_workers"])
+instrumentation.gauge("analysis_sessions_queued", "Sessions waiting for a worker", func=lambda: analysis_pool.stats()["queued"])
+
+def session_summary(session):
+    """Session status without the (possibly large) result payload."""
+    return {key: value for key, value in session.items() if key != "result"}
 
 @app.route('/start-analysis', methods=['POST'])
 def start_analysis():
     try:
-        # Start the real_time_analysis.py script
-        subprocess.Popen(["python", "real_time_analysis.py"])  # Run the script in the background
-        return jsonify({"status": "started"})
+        # Hand the session to a pre-warmed worker instead of spawning a new interpreter
+        session_id = analysis_pool.submit()
+        return jsonify({"status": "started", "session_id": session_id,
+                        "state": analysis_pool.status(session_id)["status"]})
+    except PoolBusyError as e:
+        return jsonify({"status": "failed", "message": f"Analysis is busy, try again shortly ({e})"}), 429
     except Exception as e:
         print(f"Error starting analysis: {e}")
         return jsonify({"status": "failed", "message": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Live-loop stage timings are recorded in the worker processes and returned with each session result
+    return instrumentation.metrics_response()
+
+@app.route('/analysis', methods=['GET'])
+def analysis_stats():
+    return jsonify(analysis_pool.stats())
+
+@app.route('/analysis/<session_id>', methods=['GET'])
+def analysis_status(session_id):
+    session = analysis_pool.status(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify(session_summary(session))
+
+@app.route('/analysis/<session_id>/cancel', methods=['POST'])
+def cancel_analysis(session_id):
+    if not analysis_pool.cancel(session_id):
+        return jsonify({"error": "Unknown or already finished session"}), 404
+    return jsonify(session_summary(analysis_pool.status(session_id)))
+
+@app.route('/analysis/<session_id>/result', methods=['GET'])
+def analysis_result(session_id):
+    session = analysis_pool.status(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    if session["status"] != FINISHED:
+        return jsonify(session_summary(session)), 409
+    return jsonify(session["result"])
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    # Warm the workers before the first request (under flask run or gunicorn, the first submit starts them);
+    # the reloader would spawn a second pool
+    analysis_pool.start()
+    app.run(debug=True, port=5001, use_reloader=False)
@@ -0,0 +1,186 @@
+import collections
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+import instrumentation
+
+MARGIN = 40
+BODY_FONT = ("Helvetica", 12)
+TITLE_FONT = ("Helvetica-Bold", 16)
+LINE_HEIGHT = 18
+
+RENDER_SECONDS = instrumentation.histogram("pdf_render_seconds", "Lesson PDF render latency")
+LOOKUPS = instrumentation.counter("pdf_cache_lookups", "PDF requests by where they were served from", ["source"])
+
+
+def content_key(lesson_text, speech_issue):
+    """Content hash of a lesson; identical lessons share one rendered PDF (and ETag)."""
+    return hashlib.sha256(f"{speech_issue}\0{lesson_text}".encode("utf-8")).hexdigest()
+
+
+def render_lesson_pdf(lesson_text, speech_issue):
+    """Render a lesson plan to PDF bytes, wrapping lines that are wider than the page."""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    max_width = width - 2 * MARGIN
+    y_position = height - 50
+
+    c.setFont(*TITLE_FONT)
+    for line in simpleSplit(f"Speech Therapy Lesson Plan: {speech_issue}", *TITLE_FONT, max_width):
+        c.drawString(MARGIN, y_position, line)
+        y_position -= 22
+    y_position -= 8
+
+    c.setFont(*BODY_FONT)
+    for paragraph in lesson_text.split("\n"):
+        for line in simpleSplit(paragraph, *BODY_FONT, max_width) or [""]:
+            if y_position < 50:
+                c.showPage()
+                c.setFont(*BODY_FONT)
+                y_position = height - 50
+            c.drawString(MARGIN, y_position, line)
+            y_position -= LINE_HEIGHT
+
+    c.save()
+    return buffer.getvalue()
+
+
+class PdfCache:
+    """Rendered PDFs keyed by content hash: an LRU in memory backed by a bounded folder on disk.
+
+    Renders run on first request (or ahead of time via `prerender`) and concurrent requests for the
+    same key wait for a single render.
+    """
+
+    def __init__(self, folder="pdfs", max_memory_bytes=32 * 1024 * 1024, max_disk_files=1000,
+                 prerender_workers=2):
+        self.folder = folder
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_files = max_disk_files
+        self._memory = collections.OrderedDict()  # key -> pdf bytes
+        self._memory_bytes = 0
+        self._rendering = {}  # key -> Event
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=prerender_workers, thread_name_prefix="pdf-render")
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "render_seconds": 0.0,
+                         "render_errors": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.pdf")
+
+    def _remember(self, key, data):
+        if key in self._memory:
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _memory_lookup(self, key):
+        """PDF bytes from the memory cache, or None. Caller holds the lock."""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            LOOKUPS.inc(source="memory")
+        return data
+
+    def _read_disk(self, key):
+        """PDF bytes from the disk cache, or None. Runs without the lock, so a file evicted meanwhile is a miss."""
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, data):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(".pdf"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass  # Evicted by a concurrent render
+        if len(files) > self.max_disk_files:
+            files.sort()
+            for _, path in files[:len(files) - self.max_disk_files]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def get(self, key, lesson_text, speech_issue):
+        """PDF bytes for this lesson, rendering it if it isn't cached."""
+        while True:
+            with self._lock:
+                data = self._memory_lookup(key)
+                if data is not None:
+                    return data
+                rendering = self._rendering.get(key)
+            if rendering is None:
+                # Disk reads happen outside the lock so a slow read never blocks other lessons
+                data = self._read_disk(key)
+                if data is not None:
+                    with self._lock:
+                        self.counters["disk_hits"] += 1
+                        self._remember(key, data)
+                    LOOKUPS.inc(source="disk")
+                    return data
+                with self._lock:
+                    data = self._memory_lookup(key)  # Rendered by another request meanwhile
+                    if data is not None:
+                        return data
+                    rendering = self._rendering.get(key)
+                    if rendering is None:
+                        rendering = self._rendering[key] = threading.Event()
+                        break
+            rendering.wait()  # Another request is rendering this lesson; reuse its result
+
+        try:
+            started = time.perf_counter()
+            with RENDER_SECONDS.time():
+                data = render_lesson_pdf(lesson_text, speech_issue)
+            LOOKUPS.inc(source="render")
+            self._write_disk(key, data)
+            with self._lock:
+                self.counters["renders"] += 1
+                self.counters["render_seconds"] += time.perf_counter() - started
+                self._remember(key, data)
+            return data
+        except Exception:
+            with self._lock:
+                self.counters["render_errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._rendering[key]
+            rendering.set()
+
+    def prerender(self, key, lesson_text, speech_issue):
+        """Render in the background so the first download is a cache hit."""
+        self._executor.submit(self.get, key, lesson_text, speech_issue)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["renders"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return dict(self.counters,
+                        hit_rate=hits / lookups if lookups else 0.0,
+                        mean_render_ms=1000.0 * self.counters["render_seconds"] / self.counters["renders"]
+                        if self.counters["renders"] else 0.0,
+                        memory_entries=len(self._memory), memory_bytes=self._memory_bytes)
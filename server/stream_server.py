@@ -0,0 +1,298 @@
+"""Multi-session streaming analysis server.
+
+Clients stream audio chunks (plus a lip distance per chunk, or camera frames) over HTTP, and each
+chunk's window is scored together with other sessions' windows in one batched model call.
+
+    POST   /sessions                      -> {"session_id", "sample_rate", "chunk", "record_bytes"}
+    POST   /sessions/<id>/chunks          body: one or more records, may use chunked transfer encoding
+    POST   /sessions/<id>/frame           body: one JPEG/PNG camera frame, updates the session's lip distance
+    GET    /sessions/<id>                 running summary
+    DELETE /sessions/<id>                 final summary
+    GET    /stats, /metrics
+
+A record is CHUNK little-endian int16 samples at SAMPLE_RATE followed by one little-endian float32
+lip distance (NaN to use the distance from the latest /frame).
+"""
+import collections
+import copy
+import os
+import sys
+import threading
+import time
+import uuid
+import cv2
+import numpy as np
+from flask import Flask, jsonify, request
+
+# Run as `python -m server.stream_server` from the repo root, or as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation
+from session_aggregator import CLASSES, condition_for, majority_condition
+from scripts.model_loader import WINDOW_LENGTH, get_predictor
+from scripts.streaming_mfcc import StreamingMFCC
+from server.batcher import BatcherBusyError, DeadlineExceededError, DynamicBatcher
+
+# Same audio format as the desktop loop (real_time_analysis.py)
+SAMPLE_RATE = 16000
+CHUNK = 512
+N_MFCC = 13
+RECORD_DTYPE = np.dtype([("samples", "<i2", (CHUNK,)), ("lip_distance", "<f4")])
+RECORD_BYTES = RECORD_DTYPE.itemsize
+
+# Per-session limits; idle sessions are closed so abandoned clients don't hold state forever
+MAX_SESSIONS = int(os.environ.get("STREAM_MAX_SESSIONS", "64"))
+SESSION_IDLE_SECONDS = float(os.environ.get("STREAM_SESSION_IDLE_SECONDS", "60"))
+MAX_RECORDS_PER_REQUEST = int(os.environ.get("STREAM_MAX_RECORDS_PER_REQUEST", "64"))
+
+# Dynamic batching and latency SLO: a batch waits at most BATCH_MAX_WAIT_MS for other sessions, and
+# windows not scored within INFERENCE_SLO_MS are shed so a backlog never turns into unbounded latency
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+BATCH_QUEUE_LIMIT = int(os.environ.get("BATCH_QUEUE_LIMIT", "1024"))
+INFERENCE_SLO_MS = float(os.environ.get("INFERENCE_SLO_MS", "250"))
+
+CHUNK_SECONDS = instrumentation.histogram("stream_chunk_seconds", "Server time per chunk request")
+STREAM_SESSIONS = instrumentation.counter("stream_sessions", "Streaming sessions by outcome", ["outcome"])
+
+
+class SessionLimitError(Exception):
+    """Raised when a session is opened while MAX_SESSIONS are already active."""
+
+
+class StreamSession:
+    """Per-client feature state: the streaming MFCC extractor, the model window and running results."""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.mfcc = StreamingMFCC(sr=SAMPLE_RATE, n_mfcc=N_MFCC, hop_length=CHUNK)
+        self.window = collections.deque(maxlen=WINDOW_LENGTH)
+        self.lip_distance = 0.0
+        self.tracker = None
+        self.lock = threading.Lock()  # Chunks of one session are processed in order
+        self.tracker_lock = threading.Lock()  # FaceMesh and optical flow aren't thread-safe
+        self.created = time.time()
+        self.last_seen = self.created
+        self.chunks = 0
+        self.shed = 0
+        self.conditions = collections.Counter()
+        self.probability_sum = 0.0
+
+    def track(self, frame):
+        """Update the lip distance from a camera frame with this session's own tracker."""
+        with self.tracker_lock:
+            if self.tracker is None:
+                from scripts.lip_tracker import LipTracker  # FaceMesh only loads for clients that send frames
+                self.tracker = LipTracker()
+            lip_distance = self.tracker.process(frame)
+            self.lip_distance = lip_distance if lip_distance is not None else 0.0
+            return self.lip_distance
+
+    def summary(self):
+        predictions = sum(self.conditions.values())
+        mean_probability = self.probability_sum / predictions if predictions else None
+        return {
+            "session_id": self.id,
+            "chunks": self.chunks,
+            "predictions": predictions,
+            "shed": self.shed,
+            "conditions": dict(self.conditions),
+            "condition": majority_condition([self.conditions[name] for name in CLASSES], mean_probability)
+            if predictions else None,
+            "mean_probability": mean_probability,
+            "duration": self.chunks * CHUNK / SAMPLE_RATE,
+        }
+
+
+class SessionManager:
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_seconds=SESSION_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        now = time.time()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_seen > self.idle_seconds:
+                del self._sessions[session_id]
+                STREAM_SESSIONS.inc(outcome="expired")
+                print(f"⚠️ Closed idle streaming session {session_id}")
+
+    def open(self):
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"{len(self._sessions)} sessions already active")
+            session = StreamSession(uuid.uuid4().hex)
+            self._sessions[session.id] = session
+        STREAM_SESSIONS.inc(outcome="opened")
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_seen = time.time()
+        return session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            STREAM_SESSIONS.inc(outcome="closed")
+        return session
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def read_records(stream, limit=MAX_RECORDS_PER_REQUEST):
+    """Read and validate a whole request body; raises ValueError past `limit` records or on a partial record."""
+    data = b""
+    while len(data) <= limit * RECORD_BYTES:  # Chunked bodies can arrive in short reads
+        more = stream.read(limit * RECORD_BYTES + 1 - len(data))
+        if not more:
+            break
+        data += more
+    if len(data) > limit * RECORD_BYTES:
+        raise ValueError(f"More than {limit} records in one request")
+    if len(data) % RECORD_BYTES:
+        raise ValueError(f"Truncated record ({len(data) % RECORD_BYTES} of {RECORD_BYTES} bytes)")
+    return np.frombuffer(data, dtype=RECORD_DTYPE)
+
+
+def process_chunks(session, records, batcher):
+    """Extract features for each record, queue one window per record, then collect the predictions.
+
+    Features are computed on copies of the session state, which is only updated once every window is
+    queued, so a request rejected with BatcherBusyError leaves the session as it was and can be retried.
+    """
+    mfcc = copy.copy(session.mfcc)  # push() replaces its buffer rather than writing into it
+    window = collections.deque(session.window, maxlen=WINDOW_LENGTH)
+    lip_distance, sent_lip_distance = session.lip_distance, False
+    windows = []
+    for record in records:
+        if not np.isnan(record["lip_distance"]):
+            lip_distance, sent_lip_distance = float(record["lip_distance"]), True
+        frames = mfcc.push(record["samples"].astype(np.float32) / 32768.0)  # Scale like librosa.load
+        for mfcc_frame in frames:
+            window.append(np.hstack((lip_distance, mfcc_frame)))
+        if len(frames):
+            windows.append(np.array(window))
+
+    pending = batcher.submit_many(windows)
+    session.mfcc, session.window = mfcc, window
+    if sent_lip_distance:  # Otherwise keep whatever /frame set meanwhile
+        session.lip_distance = lip_distance
+    session.chunks += len(records)
+
+    predictions = []
+    for window_request in pending:
+        try:
+            probability = window_request.wait(batcher.timeout + batcher.max_wait + 1.0)
+        except DeadlineExceededError:
+            session.shed += 1
+            continue
+        condition = condition_for(probability)
+        session.conditions[condition] += 1
+        session.probability_sum += probability
+        predictions.append({"probability": probability, "condition": condition})
+    return predictions
+
+
+app = Flask(__name__)
+sessions = SessionManager()
+batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """The shared batcher, created with a warmed-up predictor on first use."""
+    global batcher
+    with _batcher_lock:  # Concurrent first requests must not each load a model and start a batching thread
+        if batcher is None:
+            batcher = DynamicBatcher(get_predictor(), max_batch=BATCH_MAX_SIZE, max_wait=BATCH_MAX_WAIT_MS / 1000.0,
+                                     max_queue=BATCH_QUEUE_LIMIT, timeout=INFERENCE_SLO_MS / 1000.0)
+        return batcher
+
+
+instrumentation.gauge("stream_sessions_active", "Open streaming sessions", func=lambda: len(sessions))
+instrumentation.gauge("inference_queue_depth", "Windows waiting to be batched",
+                      func=lambda: batcher.stats()["queued"] if batcher else 0)
+
+
+@app.route('/sessions', methods=['POST'])
+def open_session():
+    try:
+        session = sessions.open()
+    except SessionLimitError as e:
+        return jsonify({"error": f"Too many sessions, try again shortly ({e})"}), 503
+    return jsonify({"session_id": session.id, "sample_rate": SAMPLE_RATE, "chunk": CHUNK,
+                    "record_bytes": RECORD_BYTES, "window": WINDOW_LENGTH})
+
+
+@app.route('/sessions/<session_id>/chunks', methods=['POST'])
+def post_chunks(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    if not session.lock.acquire(blocking=False):
+        return jsonify({"error": "Session already has a request in flight"}), 409
+    try:
+        with CHUNK_SECONDS.time():
+            predictions = process_chunks(session, read_records(request.stream), get_batcher())
+    except BatcherBusyError as e:
+        return jsonify({"error": f"Model is overloaded, slow down ({e})"}), 429
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        session.lock.release()
+    return jsonify({"predictions": predictions, "condition": session.summary()["condition"], "shed": session.shed})
+
+
+@app.route('/sessions/<session_id>/frame', methods=['POST'])
+def post_frame(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    frame = cv2.imdecode(np.frombuffer(request.get_data(), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return jsonify({"error": "Could not decode the frame"}), 400
+    try:
+        return jsonify({"lip_distance": session.track(frame)})
+    except Exception as e:
+        print(f"Error tracking lips for session {session_id}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+def session_status(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify(session.summary())
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    session = sessions.close(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify(session.summary())
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({"sessions": len(sessions), "batcher": get_batcher().stats()})
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return instrumentation.metrics_response()
+
+
+if __name__ == "__main__":
+    get_batcher()  # Load and warm up the model before accepting sessions
+    app.run(port=int(os.environ.get("STREAM_SERVER_PORT", "5002")), threaded=True)
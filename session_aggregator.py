@@ -0,0 +1,204 @@
+import math
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+CLASSES = ("Stutter", "Lisp")
+
+# Timeline file: a header, then one fixed-size record per prediction, appended as they happen
+TIMELINE_MAGIC = b"TKTL"
+TIMELINE_VERSION = 1
+TIMELINE_HEADER = struct.Struct("<4sHd")  # magic, version, session start (Unix time)
+TIMELINE_RECORD = np.dtype([("t", "<f4"), ("probability", "<u2")])  # Seconds since start, probability * 65535
+
+# Weight of the newest prediction in the smoothed vote (~1 s memory at 31 predictions per second)
+VOTE_ALPHA = 0.03
+HISTOGRAM_BINS = 10
+SEGMENT_SECONDS = 5.0
+MAX_SEGMENTS = 256
+
+
+def condition_for(probability):
+    """Class for a model probability, using the live loop's threshold."""
+    return CLASSES[0] if probability < 0.5 else CLASSES[1]
+
+
+def majority_condition(votes, mean_probability):
+    """Condition for a run of predictions: the majority of per-class `votes`, ties going to the mean probability."""
+    if votes[0] != votes[1]:
+        return CLASSES[0] if votes[0] > votes[1] else CLASSES[1]
+    return condition_for(mean_probability)
+
+
+def _new_segment(start):
+    return {"start": start, "end": start, "count": 0, "sum": 0.0, "min": 1.0, "max": 0.0, "votes": [0, 0]}
+
+
+def _merge_segments(a, b):
+    return {"start": a["start"], "end": b["end"], "count": a["count"] + b["count"], "sum": a["sum"] + b["sum"],
+            "min": min(a["min"], b["min"]), "max": max(a["max"], b["max"]),
+            "votes": [a["votes"][0] + b["votes"][0], a["votes"][1] + b["votes"][1]]}
+
+
+class SessionAggregator:
+    """Constant-time, bounded-memory summary of every prediction in a session.
+
+    Keeps an exponentially smoothed class vote, whole-session vote counts and probability moments,
+    per-class confidence histograms and fixed-duration segment summaries. Past `max_segments`, the
+    segment length doubles and neighbouring segments merge, so the summaries always cover the whole
+    session in bounded memory. With `timeline_path`, every prediction is also appended to a compact
+    binary file (6 bytes each) that `read_timeline` and `replay` can load later.
+    """
+
+    def __init__(self, timeline_path=None, alpha=VOTE_ALPHA, bins=HISTOGRAM_BINS,
+                 segment_seconds=SEGMENT_SECONDS, max_segments=MAX_SEGMENTS, started=None):
+        self.alpha = alpha
+        self.bins = bins
+        self.segment_seconds = segment_seconds
+        self.max_segments = max(2, max_segments)
+        self.started = time.time() if started is None else started
+        self._clock_started = time.monotonic()
+        self.count = 0
+        self.votes = [0, 0]
+        self.smoothed_vote = None  # Smoothed share of "Lisp" votes
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._confidence_sum = 0.0
+        self.histograms = np.zeros((len(CLASSES), bins), dtype=np.int64)
+        self.segments = []
+        self._lock = threading.Lock()
+
+        self.timeline_path = timeline_path
+        self._timeline = None
+        if timeline_path:
+            os.makedirs(os.path.dirname(os.path.abspath(timeline_path)), exist_ok=True)
+            self._timeline = open(timeline_path, "wb")
+            self._timeline.write(TIMELINE_HEADER.pack(TIMELINE_MAGIC, TIMELINE_VERSION, self.started))
+
+    def update(self, probability, t=None):
+        """Add one prediction; `t` is seconds since the session started (default: now)."""
+        probability = min(max(float(probability), 0.0), 1.0)
+        t = time.monotonic() - self._clock_started if t is None else float(t)
+        vote = 0 if probability < 0.5 else 1
+
+        with self._lock:
+            self.count += 1
+            self.votes[vote] += 1
+            self.smoothed_vote = vote if self.smoothed_vote is None else \
+                self.smoothed_vote + self.alpha * (vote - self.smoothed_vote)
+
+            # Welford's running mean and variance
+            delta = probability - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (probability - self._mean)
+
+            confidence = abs(probability - 0.5) * 2.0
+            self._confidence_sum += confidence
+            self.histograms[vote, min(int(confidence * self.bins), self.bins - 1)] += 1
+
+            self._add_to_segment(t, probability, vote)
+
+            if self._timeline is not None:
+                self._timeline.write(struct.pack("<fH", t, int(round(probability * 65535))))
+
+    def _add_to_segment(self, t, probability, vote):
+        start = math.floor(t / self.segment_seconds) * self.segment_seconds
+        if not self.segments or start > self.segments[-1]["start"]:
+            self.segments.append(_new_segment(start))  # Gaps (e.g. silence) leave no empty segments
+            if len(self.segments) > self.max_segments:
+                self._compact()
+        segment = self.segments[-1]
+        segment["end"] = max(segment["end"], t)
+        segment["count"] += 1
+        segment["sum"] += probability
+        segment["min"] = min(segment["min"], probability)
+        segment["max"] = max(segment["max"], probability)
+        segment["votes"][vote] += 1
+
+    def _compact(self):
+        """Double the segment length and merge the segments that now share a slot, at least halving them."""
+        self.segment_seconds *= 2
+        merged = []
+        for segment in self.segments:
+            start = math.floor(segment["start"] / self.segment_seconds) * self.segment_seconds
+            if merged and merged[-1]["start"] == start:
+                merged[-1] = _merge_segments(merged[-1], segment)
+            else:
+                merged.append(dict(segment, start=start))
+        self.segments = merged
+
+    def current_condition(self):
+        """Smoothed condition for display, or None before the first prediction."""
+        with self._lock:
+            if self.smoothed_vote is None:
+                return None
+            return CLASSES[0] if self.smoothed_vote < 0.5 else CLASSES[1]
+
+    def condition(self):
+        """Whole-session condition: the majority vote, with ties going to the mean probability."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            return majority_condition(self.votes, self._mean)
+
+    def summary(self):
+        condition = self.condition()
+        with self._lock:
+            segments = list(self.segments)
+            return {
+                "condition": condition,
+                "predictions": self.count,
+                "votes": dict(zip(CLASSES, self.votes)),
+                "vote_share": {name: votes / self.count for name, votes in zip(CLASSES, self.votes)}
+                if self.count else None,
+                "smoothed_vote": self.smoothed_vote,
+                "mean_probability": self._mean if self.count else None,
+                "std_probability": math.sqrt(self._m2 / self.count) if self.count else None,
+                "mean_confidence": self._confidence_sum / self.count if self.count else None,
+                "confidence_histograms": {
+                    "edges": [i / self.bins for i in range(self.bins + 1)],
+                    **{name: self.histograms[i].tolist() for i, name in enumerate(CLASSES)},
+                },
+                "segment_seconds": self.segment_seconds,
+                "segments": [
+                    {"start": round(s["start"], 3), "end": round(s["end"], 3), "count": s["count"],
+                     "mean_probability": s["sum"] / s["count"], "min": s["min"], "max": s["max"],
+                     "condition": CLASSES[0] if s["votes"][0] >= s["votes"][1] else CLASSES[1]}
+                    for s in segments
+                ],
+                "timeline": self.timeline_path,
+            }
+
+    def close(self):
+        """Flush and close the timeline file; returns the final summary."""
+        with self._lock:
+            if self._timeline is not None:
+                self._timeline.close()
+                self._timeline = None
+        return self.summary()
+
+
+def read_timeline(path):
+    """(session start Unix time, structured array of (t, probability)) from a timeline file."""
+    with open(path, "rb") as f:
+        magic, version, started = TIMELINE_HEADER.unpack(f.read(TIMELINE_HEADER.size))
+        if magic != TIMELINE_MAGIC or version != TIMELINE_VERSION:
+            raise ValueError(f"Not a version {TIMELINE_VERSION} timeline file: {path}")
+        data = f.read()
+    n = len(data) // TIMELINE_RECORD.itemsize  # A session cut off mid-write leaves a partial record
+    records = np.frombuffer(data[:n * TIMELINE_RECORD.itemsize], dtype=TIMELINE_RECORD)
+    timeline = np.empty(n, dtype=[("t", np.float64), ("probability", np.float64)])
+    timeline["t"] = records["t"]
+    timeline["probability"] = records["probability"] / 65535.0
+    return started, timeline
+
+
+def replay(path, **kwargs):
+    """Rebuild a session's aggregator from its timeline file (without writing a new one)."""
+    started, timeline = read_timeline(path)
+    aggregator = SessionAggregator(started=started, **kwargs)
+    for t, probability in timeline:
+        aggregator.update(probability, t)
+    return aggregator
@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture_pipeline import DROP_NEWEST, DROP_OLDEST, AnalysisEngine, RingBuffer
+
+
+def run_engine(drop_policy, frames=60, analyze_delay=0.0):
+    """Run the engine on counting fake devices until `frames` frames were captured; returns it stopped."""
+    frame_counter = iter(range(10 ** 6))
+    lock = threading.Lock()
+    seen = []
+
+    def read_audio():
+        time.sleep(0.001)
+        return b"\0" * 8
+
+    def read_frame():
+        time.sleep(0.002)
+        with lock:
+            return True, next(frame_counter)
+
+    def analyze(chunk, frame):
+        time.sleep(analyze_delay)
+        seen.append(frame)
+        return "Lisp"
+
+    engine = AnalysisEngine(read_audio, read_frame, analyze, chunk_duration=0.001,
+                            audio_capacity=4, video_capacity=4, drop_policy=drop_policy)
+    engine.start()
+    deadline = time.monotonic() + 10
+    while engine.frames_captured < frames and time.monotonic() < deadline:
+        time.sleep(0.005)
+    latest = engine.latest_frame()
+    engine.stop()
+    return engine, latest, seen
+
+
+def test_video_buffer_keeps_latest_frame_with_both_policies():
+    for policy in (DROP_OLDEST, DROP_NEWEST):
+        engine, latest, seen = run_engine(policy)
+        assert engine.frames_captured >= 60
+        # Far past the buffer's capacity of 4, the display and the analysis still follow new frames
+        assert latest >= engine.frames_captured - 5, policy
+        assert max(seen) > 4, policy
+
+
+def test_only_unread_frames_count_as_dropped():
+    for policy in (DROP_OLDEST, DROP_NEWEST):
+        engine, _, _ = run_engine(policy)
+        assert engine.stats()["dropped_video"] < engine.frames_captured - 4, policy
+
+
+def test_audio_policy_applies_when_inference_falls_behind():
+    for policy in (DROP_OLDEST, DROP_NEWEST):
+        engine, _, _ = run_engine(policy, analyze_delay=0.02)
+        assert engine.audio_buffer.dropped > 0, policy
+
+
+def test_ring_buffer_counts_evicted_unread_items():
+    buffer = RingBuffer(2, DROP_OLDEST)
+    buffer.put("a")
+    buffer.put("b")
+    buffer.latest()  # Marks "b" as seen
+    buffer.put("c")  # Evicts unread "a"
+    buffer.put("d")  # Evicts "b", which was seen
+    assert buffer.dropped == 1
+
+    rejecting = RingBuffer(1, DROP_NEWEST)
+    assert rejecting.put("a")
+    assert not rejecting.put("b")
+    assert rejecting.dropped == 1
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.lesson_cache import LessonCache
+
+
+def make_cache(stored, ttl=60):
+    created = []
+
+    def create():
+        created.append(1)
+        return "fresh lesson", "primary"
+
+    cache = LessonCache(ttl=ttl, loader=lambda issue_key, model: stored.get(model))
+    return cache, create, created
+
+
+def test_loader_hit_within_ttl_is_used():
+    cache, create, created = make_cache({"primary": ("stored lesson", time.time() - 10)})
+    assert cache.get_or_create("Lisp", ("primary",), create) == ("stored lesson", "primary")
+    assert not created
+    assert cache.stats()["loader_hits"] == 1
+
+
+def test_stale_loader_hit_is_a_miss():
+    cache, create, created = make_cache({"primary": ("old lesson", time.time() - 120)})
+    assert cache.get_or_create("Lisp", ("primary",), create) == ("fresh lesson", "primary")
+    assert created
+    assert cache.stats()["expirations"] == 1
+
+
+def test_stale_preferred_model_falls_back_to_fresh_one():
+    cache, create, created = make_cache({"primary": ("old lesson", time.time() - 120),
+                                         "backup": ("backup lesson", time.time() - 5)})
+    assert cache.get_or_create("Lisp", ("primary", "backup"), create) == ("backup lesson", "backup")
+    assert not created
+
+
+def test_loaded_lesson_keeps_only_its_remaining_ttl():
+    cache, create, created = make_cache({"primary": ("stored lesson", time.time() - 59.5)})
+    cache.get_or_create("Lisp", ("primary",), create)
+    time.sleep(0.6)
+    cache.loader = None
+    assert cache.get_or_create("Lisp", ("primary",), create) == ("fresh lesson", "primary")
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_aggregator import SessionAggregator, condition_for, majority_condition
+
+
+def test_majority_condition_follows_votes_not_mean():
+    # Three confident Stutter windows outweigh one very confident Lisp window
+    probabilities = [0.45, 0.45, 0.45, 1.0]
+    assert condition_for(sum(probabilities) / len(probabilities)) == "Lisp"
+    assert majority_condition([3, 1], sum(probabilities) / len(probabilities)) == "Stutter"
+
+
+def test_majority_condition_ties_go_to_mean():
+    assert majority_condition([2, 2], 0.4) == "Stutter"
+    assert majority_condition([2, 2], 0.6) == "Lisp"
+
+
+def test_aggregator_uses_shared_rule():
+    aggregator = SessionAggregator()
+    for t, probability in enumerate([0.45, 0.45, 0.45, 1.0]):
+        aggregator.update(probability, t)
+    assert aggregator.condition() == "Stutter"
+    assert SessionAggregator().condition() is None